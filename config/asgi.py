@@ -1,7 +1,13 @@
 import os
+
 from django.core.asgi import get_asgi_application
+from config import executor
 from config.environment import SETTINGS_MODULE
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS_MODULE)
 
 application = get_asgi_application()
+
+# sync code of the async views runs in the bounded thread pool of the
+# process instead of a thread per request
+executor.enable()
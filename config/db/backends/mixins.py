@@ -0,0 +1,134 @@
+import os
+import threading
+
+from django.utils.asyncio import async_unsafe
+
+from config.db.pool import ConnectionPool
+
+# pools of this process by the database alias
+pools = {}
+pools_lock = threading.Lock()
+
+
+def check_connection(connection, idle_seconds, check_after=0):
+    """
+    Checks the DB-API connection by a round trip, unless it was idle for less
+    than `check_after` seconds.
+    """
+    if idle_seconds < check_after:
+        return True
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+    finally:
+        cursor.close()
+    return True
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Database wrapper with connection health checks and an optional
+    in-process connection pool.
+
+    `CONN_HEALTH_CHECKS` (backport of the Django 4.1 option) checks a
+    persistent connection before its first use in a request, so a connection
+    closed by the server is replaced instead of failing the request.
+
+    `POOL` option enables the pool shared by all threads of the process::
+
+        'POOL': {
+            'SIZE': 5,           # connections kept open
+            'MAX_OVERFLOW': 10,  # extra connections opened under load
+            'TIMEOUT': 30,       # seconds to wait for a free connection
+            'RECYCLE': 3600,     # maximum age of a connection
+            'CHECK_AFTER': 0,    # check connections idle for longer
+        }
+
+    Connection is taken from the pool when Django connects and is returned
+    when Django closes it, so with the pool `CONN_MAX_AGE` should be `0`.
+    """
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        # pools of the parent aren't used after fork
+        key = (self.alias, os.getpid())
+        with pools_lock:
+            if key not in pools:
+                pools[key] = self.create_pool(options)
+            return pools[key]
+
+    def create_pool(self, options):
+        check_after = options.get('CHECK_AFTER', 0)
+        return ConnectionPool(
+            connect=None,
+            close=lambda connection: connection.close(),
+            check=lambda connection, idle: check_connection(
+                connection, idle, check_after),
+            size=options.get('SIZE', 5),
+            max_overflow=options.get('MAX_OVERFLOW', 10),
+            timeout=options.get('TIMEOUT', 30),
+            recycle=options.get('RECYCLE', 3600),
+        )
+
+    def pool_stats(self):
+        """
+        :return: Pool metrics or `None` without the pool.
+        """
+        pool = self.pool
+        return pool.get_stats() if pool is not None else None
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        # opened by this wrapper, backends set their state while connecting
+        return pool.acquire(
+            lambda: super(PooledDatabaseWrapperMixin,
+                          self).get_new_connection(conn_params))
+
+    @async_unsafe
+    def connect(self):
+        super().connect()
+        # new connection needs no check
+        self.health_check_done = True
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        reusable = not self.errors_occurred or self.is_usable()
+        if reusable:
+            # unfinished transaction mustn't leak to the next user
+            try:
+                with self.wrap_database_errors:
+                    self.connection.rollback()
+            except Exception:
+                reusable = False
+        pool.release(self.connection, reusable)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # called at the start and the end of every request
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or not self.health_check_enabled
+                or getattr(self, 'health_check_done', True)):
+            return
+        if not self.is_usable():
+            # not returned to the pool
+            self.errors_occurred = True
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,9 @@
+from django.db.backends.postgresql import base
+
+from config.db.backends.mixins import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+    PostgreSQL backend with connection health checks and the pool.
+    """
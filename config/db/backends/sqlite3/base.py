@@ -0,0 +1,10 @@
+from django.db.backends.sqlite3 import base
+
+from config.db.backends.mixins import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+    SQLite backend with connection health checks and the pool, stand-in of
+    the PostgreSQL one in development and tests.
+    """
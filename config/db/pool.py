@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """
+    No connection was released in time.
+    """
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of DB-API connections.
+
+    Connections are opened by `connect()` and closed by `close(connection)`.
+    Up to `size` connections are kept open while idle, `max_overflow` more
+    are opened under load. Released connection is closed only if `size`
+    connections are idle already, so the pool doesn't reopen connections
+    while the load stays above `size`. If all of them are in
+    use, `acquire` waits for one up to `timeout` seconds. Idle connections
+    are checked by `check(connection, idle_seconds)` before they are handed
+    out, connections older than `recycle` seconds are replaced.
+    """
+
+    def __init__(self, connect, close, check=None, size=5, max_overflow=10,
+                 timeout=30, recycle=3600):
+        self.connect = connect
+        self.close = close
+        self.check = check
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+
+        self._condition = threading.Condition()
+        # idle connections as `(connection, opened, released)`
+        self._idle = deque()
+        # opened time of the connections in use, by their `id`
+        self._in_use = {}
+        # slots reserved by connections being opened
+        self._opening = 0
+
+        self.stats = {
+            'checkouts': 0,
+            'opened': 0,
+            'closed': 0,
+            'failed_checks': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'timeouts': 0,
+        }
+
+    @property
+    def opened(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def get_stats(self):
+        with self._condition:
+            return dict(self.stats, idle=len(self._idle),
+                        in_use=len(self._in_use), size=self.size,
+                        max_overflow=self.max_overflow)
+
+    def acquire(self, connect=None):
+        """
+        :param connect: Opens a new connection instead of `self.connect`.
+        :return: Healthy connection, it must be returned by `release`.
+        """
+        while True:
+            connection, opened, idle_seconds = self._reserve()
+            if connection is None:
+                return self._open(connect or self.connect)
+            if self._is_healthy(connection, opened, idle_seconds):
+                return connection
+            self._discard(connection)
+
+    def release(self, connection, reusable=True):
+        """
+        Returns the connection to the pool. It is closed if it isn't
+        `reusable` or `size` connections are idle already.
+        """
+        with self._condition:
+            opened = self._in_use.pop(id(connection), None)
+            keep = (reusable and opened is not None
+                    and len(self._idle) < self.size)
+            if keep:
+                self._idle.append((connection, opened, time.monotonic()))
+            self._condition.notify()
+        if not keep:
+            self._close(connection)
+
+    def close_all(self):
+        with self._condition:
+            idle = [connection for connection, _, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._close(connection)
+
+    def _reserve(self):
+        """
+        Takes an idle connection or reserves a slot for a new one (returns
+        `None` connection). Waits if the pool is exhausted.
+        """
+        with self._condition:
+            started = None
+            while True:
+                if self._idle:
+                    connection, opened, released = self._idle.pop()
+                    self._in_use[id(connection)] = opened
+                    idle_seconds = time.monotonic() - released
+                    break
+                if self.opened < self.size + self.max_overflow:
+                    connection, opened, idle_seconds = None, None, 0
+                    self._opening += 1
+                    break
+                now = time.monotonic()
+                if started is None:
+                    started = now
+                    self.stats['waits'] += 1
+                remaining = self.timeout - (now - started)
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No connection available in {self.timeout} s')
+                self._condition.wait(remaining)
+
+            if started is not None:
+                waited = time.monotonic() - started
+                self.stats['wait_seconds'] += waited
+                self.stats['max_wait_seconds'] = max(
+                    self.stats['max_wait_seconds'], waited)
+            self.stats['checkouts'] += 1
+            return connection, opened, idle_seconds
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._opening -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opening -= 1
+            self._in_use[id(connection)] = time.monotonic()
+            self.stats['opened'] += 1
+        return connection
+
+    def _is_healthy(self, connection, opened, idle_seconds):
+        if time.monotonic() - opened >= self.recycle:
+            return False
+        if self.check is None:
+            return True
+        try:
+            healthy = self.check(connection, idle_seconds)
+        except Exception:
+            healthy = False
+        if not healthy:
+            with self._condition:
+                self.stats['failed_checks'] += 1
+        return healthy
+
+    def _discard(self, connection):
+        with self._condition:
+            self._in_use.pop(id(connection), None)
+            self._condition.notify()
+        self._close(connection)
+
+    def _close(self, connection):
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+        with self._condition:
+            self.stats['closed'] += 1
@@ -1,5 +1,7 @@
-ENVIRONMENT = 'development'
-# ENVIRONMENT = 'production'
+import os
+
+# development or production, it can be set by the `ENVIRONMENT` variable
+ENVIRONMENT = os.getenv('ENVIRONMENT', 'development')
 
 SETTINGS_MODULE = 'config.settings.development'
 
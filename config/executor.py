@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+# set by `config.asgi`, the sync code of async views runs in the pool then
+enabled = False
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def get_executor():
+    """
+    :return: Thread pool of the process, `ASGI_SYNC_WORKERS` threads at
+        most. It is created lazily, so every forked worker has its own.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASGI_SYNC_WORKERS,
+                thread_name_prefix='asgi-sync')
+        return _executor
+
+
+def run_with_connections(func, *args, **kwargs):
+    """
+    Runs `func` between the checks Django does at the start and the end of
+    a request, so the persistent connections of the pool threads are reused
+    for `CONN_MAX_AGE`, returned to the connection pool (`POOL`) and
+    replaced when broken.
+    """
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def sync_to_pool(func):
+    """
+    `sync_to_async` for the ORM and file system calls of async views.
+
+    Under ASGI (`config.asgi`) the calls of all the requests run in the
+    bounded thread pool of the process, so the number of threads and of DB
+    connections doesn't grow with the number of connected clients.
+    Otherwise (WSGI, test client) they run in the thread of the request, as
+    `sync_to_async` does.
+    """
+    if not enabled:
+        return sync_to_async(func)
+
+    async def call(*args, **kwargs):
+        return await sync_to_async(
+            run_with_connections, thread_sensitive=False,
+            executor=get_executor())(func, *args, **kwargs)
+
+    return call
@@ -0,0 +1,64 @@
+"""
+Gunicorn configuration of the production server.
+
+    gunicorn -c config/gunicorn.py
+
+`SERVER_MODE` selects WSGI (threaded `gthread` workers) or ASGI (uvicorn
+workers). `WEB_CONCURRENCY` sets the number of worker processes, one by
+default in development. The application is preloaded in the master, so workers are
+forked with Django already set up.
+"""
+import multiprocessing
+import os
+import time
+
+from config.environment import ENVIRONMENT
+
+START_TIME = time.monotonic()
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+# development settings (SQLite) run one process by default, several
+# processes need a shared database and a shared cache
+if ENVIRONMENT == 'production':
+    default_workers = multiprocessing.cpu_count() * 2 + 1
+else:
+    default_workers = 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'gthread'
+
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# recycle workers to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+# empty value disables the access log
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+
+def when_ready(server):
+    server.log.info('Server is ready in %.2f s (%s, %d workers)',
+                    time.monotonic() - START_TIME, SERVER_MODE, workers)
+
+
+def post_fork(server, worker):
+    # connections mustn't be shared with the master
+    from django.db import connections
+    connections.close_all()
+
+    # jobs left pending (or abandoned) by recycled workers are picked up
+    # right away, threads don't survive the fork from the preloading master
+    from v1.jobs.worker import worker as job_worker
+    job_worker.wake()
@@ -0,0 +1,50 @@
+import logging
+
+from django.db import connections
+from django.http import JsonResponse
+
+from v1.albums.cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+
+def live(request):
+    """
+    Liveness probe, the process serves requests.
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+def ready(request):
+    """
+    Readiness probe, the databases and the cache are reachable.
+
+    :return: 200 or 503 Response with status of every check and metrics of
+        the connection pools. The endpoint is public, so errors are only
+        logged.
+    """
+    checks = {}
+    pools = {}
+    for alias in connections:
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            checks[f'database:{alias}'] = 'ok'
+        except Exception:
+            logger.exception('Readiness check of database %s failed', alias)
+            checks[f'database:{alias}'] = 'error'
+        if getattr(connection, 'pool', None) is not None:
+            pools[alias] = connection.pool_stats()
+    try:
+        cache = get_cache()
+        cache.set('health:ready', 1, 10)
+        checks['cache'] = 'ok' if cache.get('health:ready') == 1 else 'miss'
+    except Exception:
+        logger.exception('Readiness check of cache failed')
+        checks['cache'] = 'error'
+
+    healthy = all(value == 'ok' for value in checks.values())
+    return JsonResponse({'status': 'ok' if healthy else 'error',
+                         'checks': checks, 'pools': pools},
+                        status=200 if healthy else 503)
@@ -0,0 +1,82 @@
+"""
+Measures cold start of the production server: time from the server start
+to the first served request (`/health/live`) and to the first request which
+uses the database (`/health/ready`).
+
+    python -m config.measure_cold_start [--runs 3] [--mode wsgi|asgi]
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# local server, proxies from the environment mustn't be used
+opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def wait_for(url, deadline):
+    while time.monotonic() < deadline:
+        try:
+            with opener.open(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.monotonic()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def measure(mode, workers, timeout):
+    port = free_port()
+    env = dict(os.environ, SERVER_MODE=mode, BIND=f'127.0.0.1:{port}',
+               WEB_CONCURRENCY=str(workers), GUNICORN_ACCESS_LOG='')
+    start = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'config/gunicorn.py'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f'http://127.0.0.1:{port}'
+        live = wait_for(f'{base}/health/live', start + timeout) - start
+        ready = wait_for(f'{base}/health/ready', start + timeout) - start
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+    return live, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    results = []
+    for run in range(args.runs):
+        live, ready = measure(args.mode, args.workers, args.timeout)
+        results.append((live, ready))
+        print(f'run {run + 1}: first request {live * 1000:.0f} ms, '
+              f'first database request {ready * 1000:.0f} ms')
+    best_live = min(live for live, _ in results)
+    best_ready = min(ready for _, ready in results)
+    print(f'{args.mode}, {args.workers} workers: best first request '
+          f'{best_live * 1000:.0f} ms, best first database request '
+          f'{best_ready * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
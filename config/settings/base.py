@@ -13,6 +13,7 @@ INSTALLED_APPS = [
     'v1.accounts.apps.AccountsConfig',
     'v1.albums.apps.AlbumsConfig',
     'v1.images.apps.ImagesConfig',
+    'v1.jobs.apps.JobsConfig',
 
     # Base
     'django.contrib.admin',
@@ -45,6 +46,20 @@ ROOT_URLCONF = 'config.urls'
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
+# Passwords are hashed by `PASSWORD_HASHER`, the ones hashed by another
+# hasher (or with another cost) are rehashed on the next login.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER',
+                            'v1.accounts.hashers.PBKDF2PasswordHasher')
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 260000))
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    hasher for hasher in (
+        'v1.accounts.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ) if hasher != PASSWORD_HASHER
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',},
@@ -56,14 +71,113 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # token is resolved from the cache, password (PBKDF2) is checked only
+    # for the requests with basic credentials
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'v1.accounts.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema'
 }
 
+# Per-process cache of resolved auth tokens: max entries and TTL (s). Its
+# entries are invalidated through user versions in the default cache.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 60))
+
+# Keyset pagination of albums and images.
+GALLERY_PAGE_SIZE = int(os.getenv('GALLERY_PAGE_SIZE', 100))
+GALLERY_MAX_PAGE_SIZE = int(os.getenv('GALLERY_MAX_PAGE_SIZE', 1000))
+
+# Size of the thread pool which stores and parses uploaded images.
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 4))
+
+# Under ASGI, size of the thread pool which runs the ORM and file system calls
+# of the async views (each thread keeps its own DB connection).
+ASGI_SYNC_WORKERS = int(os.getenv('ASGI_SYNC_WORKERS', 16))
+
+# Chunked uploads: staging area of the chunks (out of `MEDIA_ROOT`), maximum
+# sizes of a file and of a chunk (bytes) and lifetime of an abandoned session
+# (s, since its last chunk).
+UPLOAD_STAGING_DIR = os.getenv('UPLOAD_STAGING_DIR',
+                               os.path.join(BASE_DIR, 'uploads/'))
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 200 * 1024 * 1024))
+UPLOAD_CHUNK_MAX_SIZE = int(os.getenv('UPLOAD_CHUNK_MAX_SIZE',
+                                      8 * 1024 * 1024))
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 24 * 60 * 60))
+
+# ZIP import: images validated and inserted per batch, directory of the
+# archives waiting for their job (apart from the upload staging area, its
+# sweeper must not delete them).
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 200))
+IMPORT_ARCHIVE_DIR = os.getenv('IMPORT_ARCHIVE_DIR',
+                               os.path.join(BASE_DIR, 'imports/'))
+
+# Background jobs: images deleted per batch and worker poll interval (s).
+JOBS_DELETE_BATCH_SIZE = int(os.getenv('JOBS_DELETE_BATCH_SIZE', 500))
+JOBS_POLL_INTERVAL = int(os.getenv('JOBS_POLL_INTERVAL', 60))
+# Running job bumps its `modified` every `JOBS_HEARTBEAT_INTERVAL` seconds,
+# job without heartbeat for `JOBS_LEASE_TIMEOUT` seconds (its process died)
+# is started again, at most `JOBS_MAX_ATTEMPTS` times.
+JOBS_HEARTBEAT_INTERVAL = int(os.getenv('JOBS_HEARTBEAT_INTERVAL', 30))
+JOBS_LEASE_TIMEOUT = int(os.getenv('JOBS_LEASE_TIMEOUT', 300))
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 3))
+# Web processes run the worker thread, disable it if the `process_jobs`
+# command runs as a separate service.
+JOBS_WORKER_THREAD = os.getenv('JOBS_WORKER_THREAD', '1') == '1'
+
+# Metadata extraction job: size of its process pool and images per batch.
+METADATA_WORKERS = int(os.getenv('METADATA_WORKERS', 2))
+METADATA_BATCH_SIZE = int(os.getenv('METADATA_BATCH_SIZE', 200))
+
+# Derivatives of the images in modern formats (e.g. 'AVIF,WEBP'), formats
+# Pillow can't encode are skipped and empty value disables them. They are
+# transcoded in background by a process pool of `TRANSCODE_WORKERS` in
+# batches of `TRANSCODE_BATCH_SIZE` images.
+IMAGE_DERIVATIVE_FORMATS = [
+    name.strip().upper()
+    for name in os.getenv('IMAGE_DERIVATIVE_FORMATS', '').split(',')
+    if name.strip()
+]
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', 80))
+TRANSCODE_WORKERS = int(os.getenv('TRANSCODE_WORKERS', 2))
+TRANSCODE_BATCH_SIZE = int(os.getenv('TRANSCODE_BATCH_SIZE', 50))
+
+# Widths of the size variants (srcset) pre-rendered in background for every
+# uploaded image wider than them, empty value disables them. Images are
+# processed in batches of `VARIANTS_BATCH_SIZE`.
+IMAGE_VARIANT_WIDTHS = sorted(
+    int(width) for width in
+    os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')
+    if width.strip()
+)
+VARIANTS_BATCH_SIZE = int(os.getenv('VARIANTS_BATCH_SIZE', 50))
+
+# Per-user cache of album list and album detail responses. It must be shared
+# by all the worker processes (file based cache in a shared directory, redis,
+# memcached), invalidation of a process-local cache reaches only the process
+# which handled the write.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR', os.path.join(BASE_DIR, 'cache/')),
+    }
+}
+GALLERY_CACHE_ALIAS = 'default'
+GALLERY_CACHE_TIMEOUT = int(os.getenv('GALLERY_CACHE_TIMEOUT', 3600))
+
+# Media serving: `Cache-Control` max age and optional nginx internal
+# location (e.g. '/protected-media/') to offload files via X-Accel-Redirect.
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 24 * 60 * 60))
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+
+# On-disk cache of image previews, least recently used ones are evicted.
+THUMBNAILS_CACHE_MAX_BYTES = int(
+    os.getenv('THUMBNAILS_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# Largest width or height of a preview.
+PREVIEW_MAX_SIZE = int(os.getenv('PREVIEW_MAX_SIZE', 4096))
+
 
 TEMPLATES = [
     {
@@ -9,15 +9,34 @@ INTERNAL_IPS = [
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'config.db.backends.postgresql',
         'NAME': os.getenv('DB_NAME', ''),
         'USER': os.getenv('DB_USER', ''),
         'PASSWORD': os.getenv('DB_PASS', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': '5432',
+        'PORT': os.getenv('DB_PORT', '5432'),
+        # connections are kept open between the requests of a worker thread
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # persistent connection is checked before its first use in a request
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
+# in-process pool shared by the threads of a worker, enabled by DB_POOL_SIZE
+if os.getenv('DB_POOL_SIZE'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['POOL'] = {
+        'SIZE': int(os.getenv('DB_POOL_SIZE')),
+        'MAX_OVERFLOW': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+        'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'RECYCLE': int(os.getenv('DB_POOL_RECYCLE', 3600)),
+        # connections idle for less seconds aren't checked
+        'CHECK_AFTER': int(os.getenv('DB_POOL_CHECK_AFTER', 10)),
+    }
+
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 
@@ -0,0 +1,221 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from config.db.backends.mixins import pools
+from config.db.pool import ConnectionPool, PoolTimeout
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def create_pool(self, **kwargs):
+        return ConnectionPool(
+            connect=lambda: sqlite3.connect(':memory:',
+                                            check_same_thread=False),
+            close=lambda connection: connection.close(),
+            **kwargs
+        )
+
+    def test_size_and_overflow(self):
+        pool = self.create_pool(size=1, max_overflow=1, timeout=0)
+        first = pool.acquire()
+        second = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        pool.release(first)
+        pool.release(second)
+        stats = pool.get_stats()
+        # connection over the idle size is closed
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['opened'], 2)
+        self.assertEqual(stats['closed'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertIs(pool.acquire(), first)
+
+    def test_sustained_overflow(self):
+        pool = self.create_pool(size=2, max_overflow=2, timeout=0)
+        in_use = [pool.acquire() for _ in range(3)]
+        # load stays above the size, released connections are reused
+        for _ in range(50):
+            pool.release(in_use.pop(0))
+            in_use.append(pool.acquire())
+        stats = pool.get_stats()
+        self.assertEqual(stats['opened'], 3)
+        self.assertEqual(stats['closed'], 0)
+
+        for connection in in_use:
+            pool.release(connection)
+        stats = pool.get_stats()
+        self.assertEqual(stats['idle'], 2)
+        self.assertEqual(stats['closed'], 1)
+
+    def test_wait_for_connection(self):
+        pool = self.create_pool(size=1, max_overflow=0, timeout=5)
+        connection = pool.acquire()
+        timer = threading.Timer(0.1, pool.release, [connection])
+        timer.start()
+        self.assertIs(pool.acquire(), connection)
+        timer.join()
+
+        stats = pool.get_stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertGreater(stats['max_wait_seconds'], 0.05)
+        self.assertEqual(stats['wait_seconds'], stats['max_wait_seconds'])
+
+    def test_concurrent_checkouts(self):
+        pool = self.create_pool(size=2, max_overflow=1, timeout=5)
+        in_use = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            for _ in range(20):
+                connection = pool.acquire()
+                with lock:
+                    in_use.append(connection)
+                    peak.append(len(in_use))
+                connection.execute('SELECT 1')
+                time.sleep(0.001)
+                with lock:
+                    in_use.remove(connection)
+                pool.release(connection)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = pool.get_stats()
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(stats['checkouts'], 120)
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['idle'], 2)
+        self.assertEqual(stats['opened'] - stats['closed'], 2)
+
+    def test_failed_check(self):
+        healthy = {'value': True}
+        pool = self.create_pool(
+            check=lambda connection, idle: healthy['value'])
+        connection = pool.acquire()
+        pool.release(connection)
+        healthy['value'] = False
+        self.assertIsNot(pool.acquire(), connection)
+        stats = pool.get_stats()
+        self.assertEqual(stats['failed_checks'], 1)
+        self.assertEqual(stats['closed'], 1)
+
+    def test_recycle_and_discard(self):
+        pool = self.create_pool(recycle=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIsNot(pool.acquire(), connection)
+
+        pool = self.create_pool()
+        connection = pool.acquire()
+        pool.release(connection, reusable=False)
+        self.assertEqual(pool.get_stats()['idle'], 0)
+        self.assertIsNot(pool.acquire(), connection)
+
+
+class PooledDatabaseWrapperTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = os.path.join(directory.name, 'db.sqlite3')
+        self.handler = self.create_handler(
+            POOL={'SIZE': 1, 'MAX_OVERFLOW': 1, 'TIMEOUT': 1})
+        self.addCleanup(self.close_pools)
+
+    def create_handler(self, **options):
+        return ConnectionHandler({
+            'default': {'ENGINE': 'django.db.backends.sqlite3'},
+            'pooled': {
+                'ENGINE': 'config.db.backends.sqlite3',
+                'NAME': self.name,
+                'CONN_HEALTH_CHECKS': True,
+                **options
+            },
+        })
+
+    def close_pools(self):
+        self.handler.close_all()
+        for key in [key for key in pools if key[0] == 'pooled']:
+            pools.pop(key).close_all()
+
+    def query(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            return cursor.fetchone()[0]
+
+    def test_connection_reused(self):
+        connection = self.handler['pooled']
+        self.assertEqual(self.query(connection), 1)
+        raw = connection.connection
+        connection.close()
+        self.assertIsNone(connection.connection)
+
+        self.assertEqual(self.query(connection), 1)
+        self.assertIs(connection.connection, raw)
+        stats = connection.pool_stats()
+        self.assertEqual(stats['opened'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_threads_share_pool(self):
+        stats = []
+
+        def work():
+            connection = self.handler['pooled']
+            self.query(connection)
+            stats.append(connection.pool_stats()['in_use'])
+            connection.close()
+
+        self.query(self.handler['pooled'])
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        # overflow connection of the second thread is kept idle
+        self.assertEqual(stats, [2])
+        pool_stats = self.handler['pooled'].pool_stats()
+        self.assertEqual((pool_stats['idle'], pool_stats['closed']), (1, 0))
+
+    def test_unfinished_transaction_rolled_back(self):
+        connection = self.handler['pooled']
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        connection.set_autocommit(False)
+        with connection.cursor() as cursor:
+            cursor.execute('INSERT INTO item VALUES (1)')
+        connection.close()
+
+        connection.connect()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_health_check(self):
+        handler = self.create_handler(CONN_MAX_AGE=60)
+        self.addCleanup(handler.close_all)
+        connection = handler['pooled']
+        self.query(connection)
+        raw = connection.connection
+        connection.is_usable = lambda: False
+        # connection opened in this request isn't checked
+        self.query(connection)
+        self.assertIs(connection.connection, raw)
+
+        # next request checks the connection once
+        connection.close_if_unusable_or_obsolete()
+        self.query(connection)
+        self.assertIsNot(connection.connection, raw)
+        raw = connection.connection
+        self.query(connection)
+        self.assertIs(connection.connection, raw)
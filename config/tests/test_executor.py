@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+
+from config import executor
+from config.executor import sync_to_pool
+
+
+@override_settings(ASGI_SYNC_WORKERS=2)
+class SyncToPoolTest(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(executor, enabled=True, _executor=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: executor.get_executor().shutdown())
+
+    def test_bounded_threads(self):
+        def current_thread():
+            time.sleep(0.05)
+            return threading.get_ident()
+
+        async def run_concurrently():
+            return await asyncio.gather(*(
+                sync_to_pool(current_thread)() for _ in range(8)))
+
+        threads = set(async_to_sync(run_concurrently)())
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_connections_checked(self):
+        calls = []
+        close_old_connections = mock.Mock(
+            side_effect=lambda: calls.append('close_old_connections'))
+
+        def query():
+            calls.append('query')
+
+        with mock.patch.object(executor, 'close_old_connections',
+                               close_old_connections):
+            async_to_sync(sync_to_pool(query))()
+        # as at the start and the end of a request
+        self.assertEqual(calls, ['close_old_connections', 'query',
+                                 'close_old_connections'])
+
+    def test_disabled(self):
+        with mock.patch.object(executor, 'enabled', False):
+            thread = async_to_sync(sync_to_pool(threading.get_ident))()
+        self.assertEqual(thread, threading.get_ident())
@@ -0,0 +1,21 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.reverse import reverse
+
+
+class HealthTest(TestCase):
+
+    def test_ready(self):
+        response = self.client.get(reverse('health-ready'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['checks']['cache'], 'ok')
+
+    def test_ready_hides_errors(self):
+        error = Exception('cache at /secret/path is unreachable')
+        with mock.patch('config.health.get_cache', side_effect=error), \
+                self.assertLogs('config.health', 'ERROR'):
+            response = self.client.get(reverse('health-ready'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['cache'], 'error')
+        self.assertNotIn(b'secret', response.content)
@@ -1,21 +1,33 @@
+import re
+
 from django.conf import settings
 from django.conf.urls import include, url
 from django.conf.urls.static import static
 from django.contrib import admin
 from rest_framework.documentation import include_docs_urls
 
+from config import health
+from v1.images.views.media import serve_media
+
 urlpatterns = [
     # API (v1)
     url(r'^auth/', include('v1.accounts.urls')),
     url(r'^album/', include('v1.albums.urls')),
+    url(r'^search/', include('v1.albums.search_urls')),
+    url(r'^jobs/', include('v1.jobs.urls')),
 
     # Core
     url(r'^admin/', admin.site.urls),
     url(r'^docs/', include_docs_urls(title='Gallery')),
+    url(r'^health/live$', health.live, name='health-live'),
+    url(r'^health/ready$', health.ready, name='health-ready'),
+
+    # Media
+    url(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+        serve_media, name='media'),
 ]
 
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 if settings.DEBUG:
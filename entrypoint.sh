@@ -1,4 +1,10 @@
 #!/bin/sh
-python manage.py makemigrations --noinput
-python manage.py migrate
-python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+set -e
+
+# migrations are applied by the one-off `migrate` service (or with
+# RUN_MIGRATIONS=1), never by every starting server
+if [ "$RUN_MIGRATIONS" = "1" ]; then
+    python manage.py migrate --noinput
+fi
+
+exec "$@"
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'v1.accounts'
+
+    def ready(self):
+        from v1.accounts import signals  # noqa: F401
@@ -0,0 +1,131 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.authentication import TokenAuthentication
+
+# the versions stored in these caches don't reach the other processes
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def user_version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def is_version_shared():
+    """
+    Versions are shared by the processes only if the default cache is (file
+    based cache, redis, memcached).
+    """
+    return not isinstance(caches['default'], PROCESS_LOCAL_CACHES)
+
+
+def get_user_version(user_id):
+    """
+    Returns current version of the tokens of the user. It is stored in the
+    default cache, which must be shared by all the processes (see
+    `is_version_shared`).
+    """
+    key = user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user_tokens(user_id):
+    """
+    Makes all the processes resolve tokens of the user again. It must be
+    called after changes which bypass the signals (e.g. queryset `update`).
+    """
+    cache.set(user_version_key(user_id), time.time(), None)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of resolved tokens. Entries expire after
+    `AUTH_TOKEN_CACHE_TTL` seconds, the least recently used ones are dropped
+    when there are more than `AUTH_TOKEN_CACHE_SIZE` of them.
+
+    Cache is per process, every entry keeps version of the tokens of its
+    user (`get_user_version`). Deleted tokens and changed users bump the
+    version in the shared cache, so the entries are dropped by all the
+    processes on their next use. With a process-local default cache the
+    tokens aren't cached at all, another process couldn't revoke them.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+
+    def get(self, key):
+        """
+        :return: Tuple `(user, token, version)` or `None`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token, version = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # every request gets its own copy of the user
+        return copy.copy(user), token, version
+
+    def set(self, key, user, token, version):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user, token,
+                                  version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    `TokenAuthentication` which keeps resolved tokens in `token_cache`, so
+    repeated requests with the same token cost no query, only a lookup of
+    the user version in the shared cache.
+    """
+
+    def authenticate_credentials(self, key):
+        if not is_version_shared():
+            return super().authenticate_credentials(key)
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token, version = cached
+            if version == get_user_version(user.pk):
+                return user, token
+            token_cache.delete(key)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, get_user_version(user.pk))
+        return user, token
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher with the cost from `PASSWORD_HASH_ITERATIONS`. Passwords
+    hashed with another cost are rehashed on the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS',
+                       hashers.PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,51 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from v1.accounts.models.user import User
+from v1.accounts.views.auth import login
+
+
+class Command(BaseCommand):
+    help = ('Measures logins per second of one process (one core). '
+            'Test user is created in a transaction which is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins', type=int, default=100,
+            help='Number of measured logins.',
+        )
+
+    def handle(self, *args, **options):
+        email = f'benchmark-{uuid.uuid4().hex}@example.com'
+        password = uuid.uuid4().hex
+        factory = APIRequestFactory()
+
+        def request():
+            response = login(factory.post(
+                '/auth/login', {'email': email, 'password': password},
+                format='json'))
+            assert response.status_code == 200, response.data
+
+        with transaction.atomic():
+            user = User(username=email, email=email)
+            user.set_password(password)
+            user.save()
+            # first login creates the token
+            request()
+
+            start = time.perf_counter()
+            for _ in range(options['logins']):
+                request()
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Hasher: {settings.PASSWORD_HASHERS[0]}, '
+                          f'{settings.PASSWORD_HASH_ITERATIONS} iterations')
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["logins"] / elapsed:.1f} logins/s per core '
+            f'({elapsed * 1000 / options["logins"]:.1f} ms per login)'))
@@ -50,12 +50,15 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class LoginSerializer(serializers.Serializer):
+    """
+    Login credentials. Password validators are run on registration only,
+    login just checks the password.
+    """
     email = serializers.EmailField(
         required=True,
     )
     password = serializers.CharField(
-        required=True,
-        validators=[validate_password])
+        required=True)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from v1.accounts.authentication import invalidate_user_tokens, token_cache
+from v1.accounts.models.user import User
+
+# changes of only these user fields don't affect the authentication
+IGNORED_USER_FIELDS = {'last_login'}
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+    invalidate_user_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Cached user is refreshed on every change, so the deactivated user is
+    rejected on the next request in every process.
+    """
+    if update_fields and set(update_fields) <= IGNORED_USER_FIELDS:
+        return
+    invalidate_user_tokens(instance.pk)
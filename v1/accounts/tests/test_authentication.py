@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase, override_settings
+
+from v1.accounts.authentication import (
+    TokenCache, invalidate_user_tokens, token_cache
+)
+from v1.accounts.models.user import User
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create(email="test_user@email.com",
+                                        username="testinger")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_resolved_once(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token(self):
+        self.client.get(reverse('profile'))
+        self.token.delete()
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user(self):
+        self.client.get(reverse('album'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('album'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidated_by_another_process(self):
+        self.client.get(reverse('profile'))
+        # bulk update bypasses the signals, the version is bumped as by
+        # another process
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNotNone(token_cache.get(self.token.key))
+        invalidate_user_tokens(self.user.pk)
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_last_login_keeps_cached_token(self):
+        self.client.get(reverse('profile'))
+        self.user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(AUTH_TOKEN_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        other = User.objects.create(email="other@email.com",
+                                    username="other")
+        other_token = Token.objects.create(user=other)
+        self.client.get(reverse('profile'))
+        APIClient(HTTP_AUTHORIZATION=f'Token {other_token.key}').get(
+            reverse('profile'))
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertIsNotNone(token_cache.get(other_token.key))
+
+    def test_token_revoked_in_another_process(self):
+        # both processes have their own token cache and share the default
+        # cache with the versions
+        other_process_cache = TokenCache()
+        with mock.patch('v1.accounts.authentication.token_cache',
+                        other_process_cache):
+            self.client.get(reverse('profile'))
+        self.assertIsNotNone(other_process_cache.get(self.token.key))
+
+        # token is deleted in this process
+        self.token.delete()
+        with mock.patch('v1.accounts.authentication.token_cache',
+                        other_process_cache):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_disables_token_cache(self):
+        self.client.get(reverse('profile'))
+        self.assertIsNone(token_cache.get(self.token.key))
+        # token is deleted by another process, it bumps the version in its
+        # own cache only
+        with mock.patch('v1.accounts.authentication.cache',
+                        LocMemCache('other-process', {})), \
+                mock.patch('v1.accounts.signals.token_cache', TokenCache()):
+            self.token.delete()
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
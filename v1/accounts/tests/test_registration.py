@@ -111,4 +111,37 @@ class RegistrationTest(APITestCase):
          "last_name": "Testerov", "email": "test_user@email.com"}
         self.assertEqual(content, user_data)
 
+    def test_login_query_count(self):
+        self.create_user()
+        login_data = {
+            "email": self.user_data["email"],
+            "password": self.user_data["password"]
+        }
+        self.client.post(reverse("login"), data=login_data, format="json")
+        # user and the existing token are loaded with one query
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse("login"), data=login_data,
+                                        format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_login_skips_password_validators(self):
+        user = User.objects.create(email="weak@email.com", username="weak")
+        user.set_password("123")
+        user.save()
+        response = self.client.post(reverse("login"), data={
+            "email": "weak@email.com", "password": "123"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_rehashes_password(self):
+        self.create_user()
+        login_data = {
+            "email": self.user_data["email"],
+            "password": self.user_data["password"]
+        }
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            response = self.client.post(reverse("login"), data=login_data,
+                                        format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            user = User.objects.get(email=self.user_data["email"])
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+            self.assertTrue(user.check_password(self.user_data["password"]))
@@ -1,6 +1,5 @@
 from django.contrib.auth import authenticate
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, \
     authentication_classes
 from rest_framework.generics import get_object_or_404
@@ -9,6 +8,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 
+from v1.accounts.authentication import CachedTokenAuthentication
 from v1.accounts.models.user import User
 from v1.accounts.serializers.user_auth import (
     RegisterSerializer, LoginSerializer, UserSerializer
@@ -43,13 +43,20 @@ def login(request):
 
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid(raise_exception=True):
-        user = get_object_or_404(User, email=serializer.data['email'])
-        if user.check_password(serializer.data['password']):
-            token, _ = Token.objects.get_or_create(user=user)
+        email = serializer.validated_data['email']
+        # user and its token are loaded with one query
+        user = get_object_or_404(User.objects.select_related('auth_token'),
+                                 email=email)
+        # password is rehashed if the hasher or its cost was changed
+        if user.check_password(serializer.validated_data['password']):
+            try:
+                token = user.auth_token
+            except Token.DoesNotExist:
+                token, _ = Token.objects.get_or_create(user=user)
             return Response(
                 {
                     "token": token.key,
-                    "email": serializer.data['email'],
+                    "email": email,
                 },
                 status=status.HTTP_200_OK
             )
@@ -61,7 +68,7 @@ def login(request):
 
 @api_view(['GET'])
 @permission_classes((IsAuthenticated, ))
-@authentication_classes((TokenAuthentication, ))
+@authentication_classes((CachedTokenAuthentication, ))
 def profile(request):
     """
     Give full users' info.
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import get_storage_class
+from django.db import connections
+
+from v1.images.models.image import Image
+
+logger = logging.getLogger(__name__)
+storage = get_storage_class()()
+
+# images selected per query and size of the blocks read from the files
+BATCH_SIZE = 500
+BLOCK_SIZE = 256 * 1024
+
+# already compressed formats aren't compressed again (deflate level 0), it
+# only wastes CPU
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+
+class ZipStream:
+    """
+    Write-only file object which collects the data written by `ZipFile`.
+    It has no `tell` and `seek`, so the entries are written with data
+    descriptors and nothing is ever rewritten. All the entries are deflated
+    then, many unzippers (e.g. Java `ZipInputStream`) reject stored entries
+    with data descriptors.
+    """
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        """
+        :return: Data written since the last call.
+        """
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def fetch_album_files(album_id, after):
+    """
+    Returns next batch of `(pk, path, file, modified)` of the album images
+    ordered by pk.
+    """
+    return list(Image.objects.filter(
+        album_id=album_id, pk__gt=after
+    ).order_by('pk').values_list('pk', 'path', 'file', 'modified')[
+        :BATCH_SIZE])
+
+
+def iter_album_files(album_id):
+    """
+    Yields `(path, file, modified)` of all the album images, one batch is in
+    the memory at a time.
+
+    Django 3.2 ASGI handler iterates streaming responses in the event loop,
+    where the ORM can't be used, so then the batches are selected by a
+    helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        executor = None
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+
+    try:
+        after = 0
+        while True:
+            if executor is None:
+                batch = fetch_album_files(album_id, after)
+            else:
+                batch = executor.submit(fetch_album_files, album_id,
+                                        after).result()
+            if not batch:
+                return
+            for _, path, name, modified in batch:
+                yield path, name, modified
+            after = batch[-1][0]
+    finally:
+        if executor is not None:
+            executor.submit(connections.close_all).result()
+            executor.shutdown()
+
+
+def stream_album_archive(album):
+    """
+    Generates ZIP archive of all the album images chunk by chunk. Neither
+    the archive nor a whole image is held in the memory.
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', allowZip64=True) as archive:
+        for path, name, modified in iter_album_files(album.pk):
+            try:
+                source = storage.open(name, 'rb')
+            except OSError:
+                logger.warning('Missing file %s of album %s', name, album.pk)
+                continue
+
+            with source:
+                info = zipfile.ZipInfo(path, modified.timetuple()[:6])
+                info.file_size = source.size
+                info.compress_type = zipfile.ZIP_DEFLATED
+                if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS:
+                    # `ZipFile.open` takes the level of `ZipInfo` from here
+                    info._compresslevel = 0
+                with archive.open(info, 'w') as entry:
+                    for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+                        entry.write(block)
+                        yield stream.pop()
+            yield stream.pop()
+    # central directory
+    yield stream.pop()
@@ -0,0 +1,120 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+def get_cache():
+    return caches[getattr(settings, 'GALLERY_CACHE_ALIAS', 'default')]
+
+
+def _hash(value):
+    return hashlib.md5(value.encode('utf-8')).hexdigest()
+
+
+def album_list_namespace(user_id):
+    """
+    Cache namespace of the album list of the user.
+    """
+    return f'gallery:{user_id}:albums'
+
+
+def album_namespace(user_id, album_path):
+    """
+    Cache namespace of the album detail. `album_path` is `Album.path`.
+    """
+    return f'gallery:{user_id}:album:{_hash(album_path)}'
+
+
+def get_version(namespace):
+    """
+    Returns current version of the namespace. Version is the timestamp of
+    the last invalidation, so it is also used as `Last-Modified` floor.
+    """
+    cache = get_cache()
+    key = f'{namespace}:version'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), None)
+        version = cache.get(key, time.time())
+    return version
+
+
+def latest_timestamp(*values):
+    """
+    Returns POSIX timestamp of the latest of the datetimes (`None` values are
+    skipped) or `None`.
+    """
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return max(values).timestamp()
+
+
+def invalidate(namespace):
+    """
+    Invalidates all the responses cached in the namespace.
+    """
+    get_cache().set(f'{namespace}:version', time.time(), None)
+
+
+def invalidate_album_list(user_id):
+    invalidate(album_list_namespace(user_id))
+
+
+def invalidate_album(album):
+    """
+    Invalidates detail of the album and album list of its owner, because
+    the list shows the album cover.
+    """
+    invalidate(album_namespace(album.user_id, album.path))
+    invalidate_album_list(album.user_id)
+
+
+def cached_response(request, namespace, build):
+    """
+    Returns cached response of the GET request. Response data is built by
+    `build` on a cache miss, it returns the data and the timestamp of the
+    last modification of the data (or `None`).
+
+    Response has `ETag` and `Last-Modified` headers, if they match
+    conditional headers of the request 304 response is returned.
+    """
+    cache = get_cache()
+    version = get_version(namespace)
+    key = f'{namespace}:{version!r}:{_hash(request.build_absolute_uri())}'
+
+    entry = cache.get(key)
+    if entry is None:
+        data, last_modified = build()
+        etag = quote_etag(
+            hashlib.md5(JSONRenderer().render(data)).hexdigest())
+        last_modified = max(last_modified or 0, version)
+        entry = {
+            'data': data,
+            'etag': etag,
+            'last_modified': math.ceil(last_modified),
+        }
+        cache.set(key, entry,
+                  getattr(settings, 'GALLERY_CACHE_TIMEOUT', 3600))
+
+    headers = {
+        'ETag': entry['etag'],
+        'Last-Modified': http_date(entry['last_modified']),
+    }
+    not_modified = get_conditional_response(
+        request._request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+    )
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+    return Response(entry['data'], headers=headers)
@@ -0,0 +1,144 @@
+import logging
+import os
+import shutil
+import time
+import uuid
+import zipfile
+import zlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.translation import gettext as _
+
+from v1.albums.views.album import (
+    AlbumDetailView, INVALID_IMAGE_MESSAGE, uploaded_image_data
+)
+from v1.images.upload_handlers import get_upload_pool, prepare_uploaded_file
+from v1.jobs.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+CORRUPTED_MEMBER_MESSAGE = _('File in the archive is corrupted.')
+
+
+def store_import_archive(file):
+    """
+    Stores uploaded ZIP archive to `IMPORT_ARCHIVE_DIR`, until it is
+    imported by the background job.
+
+    :return: Absolute path of the stored archive.
+    """
+    os.makedirs(settings.IMPORT_ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(settings.IMPORT_ARCHIVE_DIR, f'{uuid.uuid4()}.zip')
+    if hasattr(file, 'temporary_file_path'):
+        shutil.move(file.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as destination:
+            for chunk in file.chunks():
+                destination.write(chunk)
+    return path
+
+
+def delete_orphaned_archives(max_age=None):
+    """
+    Deletes archives older than `max_age` seconds (`UPLOAD_SESSION_TTL` by
+    default) which no pending or running import job refers to, e.g. of jobs
+    failed after their worker stopped. Archives of the queued jobs are kept
+    however long they wait.
+
+    :return: Number of deleted archives.
+    """
+    if max_age is None:
+        max_age = settings.UPLOAD_SESSION_TTL
+    expired_before = time.time() - max_age
+
+    try:
+        names = os.listdir(settings.IMPORT_ARCHIVE_DIR)
+    except FileNotFoundError:
+        return 0
+    live = {
+        os.path.basename(payload['path']) for payload in Job.objects.filter(
+            kind=Job.KIND_IMPORT_ARCHIVE,
+            status__in=[Job.STATUS_PENDING, Job.STATUS_RUNNING],
+        ).values_list('payload', flat=True)
+    }
+    deleted = 0
+    for name in names:
+        path = os.path.join(settings.IMPORT_ARCHIVE_DIR, name)
+        if name in live or os.path.getmtime(path) >= expired_before:
+            continue
+        logger.info('Deleting orphaned import archive %s', name)
+        os.remove(path)
+        deleted += 1
+    return deleted
+
+
+def is_importable(info):
+    """
+    Skips directories and hidden files (e.g. macOS resource forks).
+    """
+    name = info.filename
+    return (not info.is_dir() and not name.startswith('__MACOSX/')
+            and not os.path.basename(name).startswith('.'))
+
+
+def prepare_member(album, user, archive, info):
+    """
+    Streams one archive member to the album directory and validates it like
+    an uploaded file (`prepare_uploaded_file`).
+
+    :return: `PreparedUpload` or error of the `errors` list.
+    """
+    if info.file_size > settings.UPLOAD_MAX_SIZE:
+        return {'name': info.filename, 'error': {'file': [
+            _('File is larger than {} bytes.').format(
+                settings.UPLOAD_MAX_SIZE)]}}
+    try:
+        with archive.open(info) as member:
+            file = UploadedFile(member, os.path.basename(info.filename),
+                                size=info.file_size)
+            upload = prepare_uploaded_file(album, user, file)
+    except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError):
+        return {'name': info.filename,
+                'error': {'file': [CORRUPTED_MEMBER_MESSAGE]}}
+    if upload.stored_name is None:
+        return {'name': info.filename,
+                'error': {'file': [INVALID_IMAGE_MESSAGE]}}
+    return upload
+
+
+def import_archive(album, user, path, progress=None):
+    """
+    Imports all the images of the ZIP archive to the album. Members are
+    validated in the upload pool and inserted in batches of
+    `IMPORT_BATCH_SIZE`, exactly as uploaded files are.
+
+    :param progress: Called with the number of processed and of all the
+    members after every batch.
+    :return: Dict with the `uploaded` images and `errors` of the members,
+    as in the upload response.
+    """
+    batch_size = getattr(settings, 'IMPORT_BATCH_SIZE', 200)
+    result = {'uploaded': [], 'errors': []}
+    pool = get_upload_pool()
+
+    with zipfile.ZipFile(path) as archive:
+        members = [info for info in archive.infolist() if is_importable(info)]
+        for start in range(0, len(members), batch_size):
+            batch = members[start:start + batch_size]
+            uploads = []
+            for prepared in pool.map(
+                    lambda info: prepare_member(album, user, archive, info),
+                    batch):
+                if isinstance(prepared, dict):
+                    result['errors'].append(prepared)
+                else:
+                    uploads.append(prepared)
+
+            if uploads:
+                images = AlbumDetailView.create_images(user, album, uploads)
+                result['uploaded'] += [uploaded_image_data(img)
+                                       for img in images]
+            if progress is not None:
+                progress(start + len(batch), len(members))
+    return result
@@ -0,0 +1,55 @@
+import os
+
+from django.conf import settings
+
+from v1.albums import imports
+from v1.albums.cache import invalidate_album
+from v1.albums.models.album import Album
+from v1.images.models.image import Image
+
+
+def delete_albums(job):
+    """
+    Job handler which deletes albums from `albums` list of the payload.
+    Images are deleted in batches of `JOBS_DELETE_BATCH_SIZE` files and rows,
+    the progress is stored in `job.processed`.
+    """
+    batch_size = getattr(settings, 'JOBS_DELETE_BATCH_SIZE', 500)
+    albums = Album.objects.filter(pk__in=job.payload['albums'])
+
+    for album in albums.iterator():
+        while True:
+            batch = list(album.image_set.all()[:batch_size])
+            if not batch:
+                break
+            Image.objects.filter(pk__in=[img.pk for img in batch]).delete()
+            Image.delete_image_files(batch)
+            job.processed += len(batch)
+            job.save(update_fields=['processed', 'modified'])
+
+        album.delete_album_directory()
+        album.delete()
+        invalidate_album(album)
+
+
+def import_archive(job):
+    """
+    Job handler which imports images of the ZIP archive (`path` of the
+    payload) to the album (`album`). Progress is stored in `job.processed`
+    and `job.total`, uploaded images and errors in `job.result`. Archive is
+    deleted at the end.
+    """
+    path = job.payload['path']
+    try:
+        album = Album.objects.get(pk=job.payload['album'])
+
+        def progress(processed, total):
+            job.processed = processed
+            job.total = total
+            job.save(update_fields=['processed', 'total', 'modified'])
+
+        job.result = imports.import_archive(album, job.user, path,
+                                            progress)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from v1.accounts.models.user import User
+from v1.albums.imports import import_archive
+from v1.albums.models.album import Album
+
+
+class Command(BaseCommand):
+    help = 'Imports all the images of the ZIP archive to the album.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the album owner.')
+        parser.add_argument('album', help='Name of the album.')
+        parser.add_argument('archive', help='Path to the ZIP archive.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+            album = user.albums.get(
+                path=Album.get_path(user, options['album']))
+        except (User.DoesNotExist, Album.DoesNotExist):
+            raise CommandError('Album {} of {} does not exist.'.format(
+                options['album'], options['email']))
+
+        def progress(processed, total):
+            self.stdout.write(f'Processed {processed}/{total} file(s).')
+
+        result = import_archive(album, user, options['archive'], progress)
+        for error in result['errors']:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(self.style.SUCCESS(
+            'Done: {} imported, {} failed.'.format(len(result['uploaded']),
+                                                   len(result['errors']))))
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import v1.albums.models.album
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Album',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the album. Must be unique.', max_length=1024, validators=[v1.albums.models.album.validate_album_name])),
+                ('path', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp of creation.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp of last modification.')),
+                ('user', models.ForeignKey(help_text='Owner of the album.', on_delete=django.db.models.deletion.CASCADE, related_name='albums', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='albums_albu_user_id_21a603_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='album',
+            unique_together={('user', 'name')},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('albums', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['user', 'path'], name='albums_albu_user_id_154711_idx'),
+        ),
+    ]
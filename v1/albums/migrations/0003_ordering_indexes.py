@@ -0,0 +1,39 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Trigram index of the upper-cased name serves `icontains` and
+    `istartswith` lookups on PostgreSQL. Other databases use the B-tree
+    indexes only.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS albums_album_name_trgm ON albums_album '
+        'USING gin (UPPER("name"::text) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS albums_album_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('albums', '0002_path_lookup_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='albums_albu_user_id_c8f645_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
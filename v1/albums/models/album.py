@@ -57,11 +57,19 @@ class Album(models.Model):
 
     class Meta:
         unique_together = ('user', 'name')
+        indexes = [
+            # keyset pagination of the album list, ordering by name uses
+            # the unique index
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'updated_at', 'id']),
+            # album lookup by its path on every request
+            models.Index(fields=['user', 'path']),
+        ]
 
     def delete_album_directory(self):
         """
-        Deletes album directory recursively with all the images and
-        thumbnails.
+        Deletes album directory recursively with all the images, their
+        derivatives and thumbnails.
         """
 
         # absolute path to album directory
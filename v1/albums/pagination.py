@@ -0,0 +1,182 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination on `(<ordering field>, id)`.
+
+    Every page is selected with a `WHERE (field, id) > (cursor)` filter
+    instead of an `OFFSET`, so a deep page costs the same as the first one.
+    Cursor is an opaque base64 token with the ordering and the position of
+    the last item of the previous page.
+
+    Ordering is chosen by the `ordering` query param from `ordering_fields`
+    (public name to model field), `-` prefix means descending order. Empty
+    values of nullable fields are always at the end.
+    """
+    ordering_fields = {'created': 'created'}
+    default_ordering = 'created'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = _('Invalid cursor')
+    invalid_ordering_message = _('Invalid ordering, choose from: {}')
+
+    def __init__(self):
+        self.request = None
+        self.page_size = None
+        self.ordering = None
+        self.next_position = None
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'GALLERY_PAGE_SIZE', 100)
+        max_page_size = getattr(settings, 'GALLERY_MAX_PAGE_SIZE', 1000)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        if requested <= 0:
+            return page_size
+        return min(requested, max_page_size)
+
+    def get_ordering(self, request):
+        """
+        Returns ordering from the query params (e.g. `-name`).
+        """
+        ordering = request.query_params.get(self.ordering_query_param)
+        if not ordering:
+            return self.default_ordering
+        if ordering.lstrip('-') not in self.ordering_fields:
+            choices = ', '.join(sorted(self.ordering_fields))
+            raise ValidationError({
+                self.ordering_query_param: [
+                    self.invalid_ordering_message.format(choices)]
+            })
+        return ordering
+
+    def encode_cursor(self, position):
+        value, pk = position
+        if isinstance(value, datetime.datetime):
+            # full precision, the position must match the stored value
+            value = value.isoformat()
+        raw = json.dumps([self.ordering, value, pk])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, model_field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii'))
+            ordering, value, pk = json.loads(raw.decode('utf-8'))
+            if ordering != self.ordering:
+                raise ValueError(ordering)
+            if value is not None:
+                value = model_field.to_python(value)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error,
+                DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def filter_after(self, queryset, field, nullable, descending, position):
+        """
+        Filters rows after the position of the cursor.
+        """
+        value, pk = position
+        after = 'lt' if descending else 'gt'
+        if value is None:
+            # only rows without value are left, ordered by pk
+            return queryset.filter(**{
+                f'{field}__isnull': True, f'pk__{after}': pk})
+        condition = (Q(**{f'{field}__{after}': value}) |
+                     Q(**{field: value, f'pk__{after}': pk}))
+        if nullable:
+            condition |= Q(**{f'{field}__isnull': True})
+        return queryset.filter(condition)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.next_position = None
+
+        descending = self.ordering.startswith('-')
+        field = self.ordering_fields[self.ordering.lstrip('-')]
+        model_field = queryset.model._meta.get_field(field)
+        if descending:
+            queryset = queryset.order_by(F(field).desc(nulls_last=True),
+                                         '-pk')
+        else:
+            queryset = queryset.order_by(F(field).asc(nulls_last=True), 'pk')
+
+        position = self.decode_cursor(request, model_field)
+        if position is not None:
+            queryset = self.filter_after(queryset, field, model_field.null,
+                                         descending, position)
+
+        # fetch one extra row to know whether the next page exists
+        results = list(queryset[:self.page_size + 1])
+        page = results[:self.page_size]
+        if len(results) > self.page_size:
+            last = page[-1]
+            self.next_position = (getattr(last, field), last.pk)
+        return page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(self.next_position))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class AlbumKeysetPagination(KeysetPagination):
+    ordering_fields = {
+        'created': 'created_at',
+        'modified': 'updated_at',
+        'name': 'name',
+    }
+
+
+class ImageKeysetPagination(KeysetPagination):
+    ordering_fields = {
+        'created': 'created',
+        'modified': 'modified',
+        'name': 'name',
+        'width': 'width',
+        'height': 'height',
+        'taken': 'taken_at',
+    }
+
+
+class ImageSearchPagination(KeysetPagination):
+    """
+    Pagination of images across the albums, only orderings with
+    `(user, field, id)` index are allowed.
+    """
+    ordering_fields = {
+        'created': 'created',
+        'taken': 'taken_at',
+    }
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views.image import ImageSearchView
+
+# outside of `album/`, where any name is an album path
+urlpatterns = [
+    path('images', ImageSearchView.as_view(), name='album-search'),
+]
@@ -6,7 +6,9 @@ from v1.images.serializers.image import ImageSerializer
 
 class AlbumDetailSerializer(serializers.ModelSerializer):
     """
-    REST API detail serializer show all images of the album.
+    REST API detail serializer show images of the album. Page of images
+    can be passed in the `images` context key, otherwise all the images
+    are shown. The context is passed to `ImageSerializer` (e.g. `variants`).
     """
     images = serializers.SerializerMethodField()
     path = serializers.SerializerMethodField()
@@ -16,8 +18,10 @@ class AlbumDetailSerializer(serializers.ModelSerializer):
         fields = ['path', 'name', 'images']
 
     def get_images(self, obj):
-        image = obj.image_set.all()
-        serializer = ImageSerializer(image, many=True)
+        image = self.context.get('images')
+        if image is None:
+            image = obj.image_set.all()
+        serializer = ImageSerializer(image, many=True, context=self.context)
         return serializer.data
 
     def get_path(self, obj):
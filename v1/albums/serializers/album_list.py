@@ -20,7 +20,11 @@ class AlbumListSerializer(serializers.ModelSerializer):
 
     def get_image(self, obj):
         result = None
-        image = obj.image_set.all().first()
+        if hasattr(obj, 'cover_images'):
+            # covers are prefetched by `AlbumListView`
+            image = next(iter(obj.cover_images), None)
+        else:
+            image = obj.image_set.all().first()
         if image:
             serializer = ImageSerializer(image)
             result = serializer.data
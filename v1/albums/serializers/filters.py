@@ -0,0 +1,108 @@
+from django.db.models import F, Q
+from django.utils.translation import gettext as _
+from rest_framework import serializers
+
+from v1.images.serializers.image import ImageVariantsSerializer
+
+
+class NameFilterSerializer(serializers.Serializer):
+    """
+    Validates filter query params and applies them to the queryset. `search`
+    matches any part of the name, `prefix` its beginning (both case
+    insensitive, backed by the trigram index on PostgreSQL).
+    """
+    created_field = 'created'
+
+    search = serializers.CharField(required=False, max_length=255)
+    prefix = serializers.CharField(required=False, max_length=255)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    # pairs of range fields validated to be in order
+    ranges = [('created_after', 'created_before')]
+
+    def validate(self, data):
+        for start, end in self.ranges:
+            if start in data and end in data and data[start] > data[end]:
+                raise serializers.ValidationError(
+                    {end: [_('It must be after `{}`.').format(start)]})
+        return data
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if 'search' in data:
+            queryset = queryset.filter(name__icontains=data['search'])
+        if 'prefix' in data:
+            queryset = queryset.filter(name__istartswith=data['prefix'])
+        if 'created_after' in data:
+            queryset = queryset.filter(
+                **{f'{self.created_field}__gte': data['created_after']})
+        if 'created_before' in data:
+            queryset = queryset.filter(
+                **{f'{self.created_field}__lte': data['created_before']})
+        return queryset
+
+
+class AlbumFilterSerializer(NameFilterSerializer):
+    created_field = 'created_at'
+
+
+class ImageFilterSerializer(NameFilterSerializer, ImageVariantsSerializer):
+    """
+    Image filters. `taken_*` filter EXIF capture time, `orientation` the
+    shape of the image as displayed (dimensions swapped by EXIF rotation).
+    `variants` isn't a filter, it is passed to the serializer context.
+    """
+    ORIENTATION_LANDSCAPE = 'landscape'
+    ORIENTATION_PORTRAIT = 'portrait'
+    ORIENTATION_SQUARE = 'square'
+
+    taken_after = serializers.DateTimeField(required=False)
+    taken_before = serializers.DateTimeField(required=False)
+    orientation = serializers.ChoiceField(
+        required=False,
+        choices=[ORIENTATION_LANDSCAPE, ORIENTATION_PORTRAIT,
+                 ORIENTATION_SQUARE],
+    )
+    min_width = serializers.IntegerField(required=False, min_value=0)
+    max_width = serializers.IntegerField(required=False, min_value=0)
+    min_height = serializers.IntegerField(required=False, min_value=0)
+    max_height = serializers.IntegerField(required=False, min_value=0)
+
+    # EXIF orientations which rotate the image by 90 degrees
+    rotated = Q(orientation__in=[5, 6, 7, 8])
+
+    ranges = NameFilterSerializer.ranges + [
+        ('taken_after', 'taken_before'),
+        ('min_width', 'max_width'),
+        ('min_height', 'max_height'),
+    ]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        data = self.validated_data
+        lookups = {
+            'taken_after': 'taken_at__gte',
+            'taken_before': 'taken_at__lte',
+            'min_width': 'width__gte',
+            'max_width': 'width__lte',
+            'min_height': 'height__gte',
+            'max_height': 'height__lte',
+        }
+        queryset = queryset.filter(**{
+            lookup: data[param]
+            for param, lookup in lookups.items() if param in data
+        })
+
+        orientation = data.get('orientation')
+        if orientation == self.ORIENTATION_SQUARE:
+            queryset = queryset.filter(width=F('height'))
+        elif orientation:
+            # stored shape of the wanted and of the rotated images
+            stored = Q(width__gt=F('height'))
+            swapped = Q(width__lt=F('height'))
+            if orientation == self.ORIENTATION_PORTRAIT:
+                stored, swapped = swapped, stored
+            queryset = queryset.filter((stored & ~self.rotated) |
+                                       (swapped & self.rotated))
+        return queryset
@@ -1,17 +1,25 @@
+import asyncio
 import json
 import io
 import shutil
 import tempfile
+import zipfile
 
 from PIL import Image
 
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import AsyncClient, TransactionTestCase
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase, APIClient, RequestsClient, override_settings
 from rest_framework.reverse import reverse
 
 from v1.accounts.models.user import User
 from v1.albums.models.album import Album
 from v1.images.models.image import Image as ImageModel
+from v1.jobs.worker import process_jobs
 
 MEDIA_ROOT = tempfile.mkdtemp()
 
@@ -20,6 +28,7 @@ MEDIA_ROOT = tempfile.mkdtemp()
 class AlbumTest(APITestCase):
 
     def setUp(self):
+        cache.clear()
         self.user_data = {
             "email": "test_user@email.com",
             "username": "testinger",
@@ -49,12 +58,12 @@ class AlbumTest(APITestCase):
         client.force_authenticate(u)
         return client
 
-    def generate_photo_file(self, filename=None):
+    def generate_photo_file(self, filename=None, size=(100, 100)):
         n = filename
         if not n:
             n = 'test.png'
         file = io.BytesIO()
-        image = Image.new('RGBA', size=(100, 100), color=(155, 0, 0))
+        image = Image.new('RGBA', size=size, color=(155, 0, 0))
         image.save(file, 'png')
         file.name = n
         file.seek(0)
@@ -70,7 +79,8 @@ class AlbumTest(APITestCase):
         self.assertEqual(json.loads(response.content), expected_response)
         response = self.client.get(reverse('album'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(json.loads(response.content), [expected_response])
+        self.assertEqual(json.loads(response.content),
+                         {"next": None, "results": [expected_response]})
 
     def test_album_duplicate_names(self):
         data = {
@@ -109,7 +119,7 @@ class AlbumTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(json.loads(response.content),
                          {"path": "foo%20boo", "name": "foo boo",
-                          "images": []})
+                          "images": [], "next": None})
 
     def test_album_retrieve_another_user(self):
         data = {
@@ -174,7 +184,7 @@ class AlbumTest(APITestCase):
             self.assertIn(img, response_content['images'])
 
         response = self.client.get(reverse('album'))
-        response_content = json.loads(response.content)
+        response_content = json.loads(response.content)['results']
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response_content), 1)
         self.assertIn(response_content[0]['image'], uploaded_imgs)
@@ -182,7 +192,16 @@ class AlbumTest(APITestCase):
 
         # test deletion
         response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_url = response['Location']
+        self.assertEqual(json.loads(response.content)['status'], 'pending')
+        # metadata extraction of the upload and the deletion
+        self.assertEqual(process_jobs(), 2)
+
+        response = self.client.get(job_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['status'], 'done')
+        self.assertEqual(json.loads(response.content)['processed'], 4)
         self.assertEqual(self.user.albums.count(), 0)
         self.assertEqual(ImageModel.objects.count(), 0)
 
@@ -210,5 +229,319 @@ class AlbumTest(APITestCase):
         user.save()
 
         response = client.delete(reverse('albums-delete-all'))
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        process_jobs()
         self.assertEqual(Album.objects.count(), 0)
+
+    def test_album_list_query_count(self):
+        for i in range(5):
+            response = self.client.post(reverse('album'),
+                                        data={"name": f"foo{i}"})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            url = reverse('album-detail', kwargs={'path': f"foo{i}"})
+            upload = {
+                'file1': self.generate_photo_file(),
+                'file2': self.generate_photo_file(),
+            }
+            response = self.client.post(url, upload)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.post(reverse('album'), data={"name": "empty"})
+
+        # one query for albums and one for all their cover images
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('album'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)['results']
+        self.assertEqual(len(content), 6)
+
+        for album in content:
+            if album['name'] == 'empty':
+                self.assertNotIn('image', album)
+                continue
+            first = ImageModel.objects.filter(
+                album__user=self.user, album__name=album['name']
+            ).order_by('pk').first()
+            self.assertEqual(album['image']['path'], first.path)
+
+    def test_album_list_pagination(self):
+        for i in range(5):
+            response = self.client.post(reverse('album'),
+                                        data={"name": f"foo{i}"})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        names = []
+        url = reverse('album') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            content = json.loads(response.content)
+            self.assertLessEqual(len(content['results']), 2)
+            names += [album['name'] for album in content['results']]
+            url = content['next']
+        self.assertEqual(names, [f"foo{i}" for i in range(5)])
+
+    def test_album_list_invalid_cursor(self):
+        response = self.client.get(reverse('album') + '?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_album_images_pagination(self):
+        self.client.post(reverse('album'), data={"name": "foo"})
+        url = reverse('album-detail', kwargs={'path': "foo"})
+        upload = {f'file{i}': self.generate_photo_file(f'img{i}.png')
+                  for i in range(5)}
+        response = self.client.post(url, upload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        uploaded = json.loads(response.content)['uploaded']
+
+        images = []
+        page_url = url + '?page_size=2'
+        while page_url:
+            response = self.client.get(page_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            content = json.loads(response.content)
+            self.assertLessEqual(len(content['images']), 2)
+            images += content['images']
+            page_url = content['next']
+        self.assertEqual(sorted(img['path'] for img in images),
+                         sorted(img['path'] for img in uploaded))
+
+    def collect_pages(self, url, key):
+        items = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            content = json.loads(response.content)
+            items += content[key]
+            url = content['next']
+        return items
+
+    def test_album_list_search_and_ordering(self):
+        for name in ("Beach 2020", "beach 2021", "Mountains"):
+            self.client.post(reverse('album'), data={"name": name})
+
+        url = reverse('album')
+        response = self.client.get(url, {'search': 'EACH'})
+        self.assertEqual(
+            [album['name'] for album in json.loads(response.content)[
+                'results']],
+            ["Beach 2020", "beach 2021"])
+        response = self.client.get(url, {'prefix': 'moun'})
+        self.assertEqual(
+            [album['name'] for album in json.loads(response.content)[
+                'results']],
+            ["Mountains"])
+
+        albums = self.collect_pages(url + '?ordering=-name&page_size=1',
+                                    'results')
+        self.assertEqual([album['name'] for album in albums],
+                         ["beach 2021", "Mountains", "Beach 2020"])
+
+        response = self.client.get(url, {'ordering': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {
+            'created_after': '2021-02-01T00:00:00Z',
+            'created_before': '2021-01-01T00:00:00Z',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_album_images_filters_and_ordering(self):
+        self.client.post(reverse('album'), data={"name": "foo"})
+        url = reverse('album-detail', kwargs={'path': "foo"})
+        sizes = {'wide': (200, 100), 'tall': (100, 300), 'box': (150, 150)}
+        for name, size in sizes.items():
+            self.client.post(url, {
+                'file': self.generate_photo_file(f'{name}.png', size)})
+        rotated = ImageModel.objects.get(name='Wide')
+        rotated.orientation = 6
+        rotated.save()
+
+        images = self.collect_pages(url + '?ordering=-width&page_size=1',
+                                    'images')
+        self.assertEqual([img['name'] for img in images],
+                         ['Wide', 'Box', 'Tall'])
+        images = self.collect_pages(url + '?ordering=height&page_size=2',
+                                    'images')
+        self.assertEqual([img['name'] for img in images],
+                         ['Wide', 'Box', 'Tall'])
+        # images without capture time are paginated by their ID
+        images = self.collect_pages(url + '?ordering=-taken&page_size=1',
+                                    'images')
+        self.assertEqual([img['name'] for img in images],
+                         ['Box', 'Tall', 'Wide'])
+
+        def names(params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return sorted(img['name'] for img in
+                          json.loads(response.content)['images'])
+
+        self.assertEqual(names({'orientation': 'portrait'}),
+                         ['Tall', 'Wide'])
+        self.assertEqual(names({'orientation': 'square'}), ['Box'])
+        self.assertEqual(names({'min_width': 150}), ['Box', 'Wide'])
+        self.assertEqual(names({'search': 'al', 'max_height': 300}),
+                         ['Tall'])
+        self.assertEqual(names({'prefix': 'b'}), ['Box'])
+
+        response = self.client.get(url, {'min_width': 300, 'max_width': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_album_views_asgi(self):
+        token = await sync_to_async(Token.objects.create)(user=self.user)
+        client = AsyncClient()
+        auth = {'Authorization': f'Token {token.key}'}
+
+        response = await client.post(reverse('album'), {"name": "foo"},
+                                     content_type='application/json', **auth)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        responses = await asyncio.gather(
+            client.get(reverse('album'), **auth),
+            client.get(reverse('album-detail', kwargs={'path': "foo"}),
+                       **auth),
+            client.get(reverse('album-detail', kwargs={'path': "boo"}),
+                       **auth),
+        )
+        self.assertEqual([response.status_code for response in responses],
+                         [status.HTTP_200_OK, status.HTTP_200_OK,
+                          status.HTTP_404_NOT_FOUND])
+        self.assertEqual(json.loads(responses[0].content)['results'][0][
+            'name'], "foo")
+
+    def test_album_list_conditional_get(self):
+        self.client.post(reverse('album'), data={"name": "foo"})
+        response = self.client.get(reverse('album'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        # cached response is served without any query
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('album'),
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(reverse('album'),
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # new album invalidates the list
+        self.client.post(reverse('album'), data={"name": "boo"})
+        response = self.client.get(reverse('album'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)['results']), 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_album_detail_cache_invalidation(self):
+        self.client.post(reverse('album'), data={"name": "foo"})
+        url = reverse('album-detail', kwargs={'path': "foo"})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(json.loads(response.content)['images'], [])
+        list_response = self.client.get(reverse('album'))
+        self.assertNotIn('image', json.loads(list_response.content)['results'][0])
+
+        response = self.client.post(url, {'file': self.generate_photo_file()})
+        img = json.loads(response.content)['uploaded'][0]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)['images']), 1)
+        etag = response['ETag']
+        list_response = self.client.get(reverse('album'))
+        self.assertEqual(
+            json.loads(list_response.content)['results'][0]['image']['path'],
+            img['path'])
+
+        img_url = reverse('album-img-detail', kwargs={
+            "album_path": "foo", "img_path": img['path']})
+        self.client.delete(img_url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['images'], [])
+
+    def test_album_detail_query_count(self):
+        self.client.post(reverse('album'), data={"name": "foo"})
+        url = reverse('album-detail', kwargs={'path': "foo"})
+        upload = {f'file{i}': self.generate_photo_file() for i in range(10)}
+        response = self.client.post(url, upload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # one query for the album and one for the page of its images
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(json.loads(response.content)['images']), 10)
+
+    def upload_archive_images(self):
+        self.client.post(reverse('album'), data={"name": "foo"})
+        url = reverse('album-detail', kwargs={'path': "foo"})
+        upload = {f'file{i}': self.generate_photo_file(f'img{i}.png')
+                  for i in range(3)}
+        upload['file3'] = self.generate_photo_file('img3.bmp')
+        response = self.client.post(url, upload)
+        return {img['path']: ImageModel.objects.get(path=img['path'])
+                for img in json.loads(response.content)['uploaded']}
+
+    def check_archive(self, content, images):
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(sorted(archive.namelist()), sorted(images))
+            for info in archive.infolist():
+                with images[info.filename].file.open('rb') as file:
+                    self.assertEqual(archive.read(info), file.read())
+                # stream isn't seekable, so sizes follow the data, which
+                # only deflated entries allow
+                self.assertTrue(info.flag_bits & 0x08)
+                self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+                if info.filename.endswith('.png'):
+                    # not compressed again
+                    self.assertGreaterEqual(info.compress_size,
+                                            info.file_size)
+                else:
+                    self.assertLess(info.compress_size, info.file_size)
+
+    def test_album_archive(self):
+        images = self.upload_archive_images()
+        url = reverse('album-archive', kwargs={'path': "foo"})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(response['Content-Disposition'],
+                         "attachment; filename*=UTF-8''foo.zip")
+        self.check_archive(b''.join(response.streaming_content), images)
+
+        response = self.client.get(
+            reverse('album-archive', kwargs={'path': "boo"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AlbumArchiveAsgiTest(TransactionTestCase):
+    """
+    Archive streamed by the ASGI handler selects images in a helper thread,
+    the data must be committed to be visible there.
+    """
+
+    def create_images(self, user):
+        album = Album.objects.create(user=user, name="foo",
+                                     path=Album.get_path(user, "foo"))
+        images = {}
+        for i in range(3):
+            name = default_storage.save(
+                f'albums/{album.path}/img{i}.png',
+                AlbumTest.generate_photo_file(None, f'img{i}.png'))
+            images[f'img{i}.png'] = ImageModel.objects.create(
+                album=album, file=name, path=f'img{i}.png',
+                width=100, height=100)
+        return images
+
+    async def test_album_archive_asgi(self):
+        user = await sync_to_async(User.objects.create)(
+            email="test_user@email.com", username="testinger")
+        images = await sync_to_async(self.create_images)(user)
+        token = await sync_to_async(Token.objects.create)(user=user)
+        response = await AsyncClient().get(
+            reverse('album-archive', kwargs={'path': "foo"}),
+            **{'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        AlbumTest.check_archive(self, b''.join(response.streaming_content),
+                                images)
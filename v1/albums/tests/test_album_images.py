@@ -1,10 +1,18 @@
+import hashlib
 import json
 import io
+import os
 import tempfile
+from datetime import datetime
+from unittest import mock
 
 from PIL import Image
 
+from django.core.cache import cache
 from rest_framework import status
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import (
     APITestCase, APIClient, RequestsClient, override_settings
 )
@@ -12,7 +20,13 @@ from rest_framework.reverse import reverse
 
 from v1.accounts.models.user import User
 from v1.albums.models.album import Album
+from v1.images.models.blob import Blob
 from v1.images.models.image import Image as ImageModel
+from v1.images import upload_handlers
+from v1.images.phash import to_unsigned
+from v1.images.thumbnails import get_thumbnail_directory
+from v1.jobs.models.job import Job
+from v1.jobs.worker import process_jobs
 
 
 MEDIA_ROOT = tempfile.mkdtemp()
@@ -21,6 +35,7 @@ MEDIA_ROOT = tempfile.mkdtemp()
 @override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class AlbumImageDetailTest(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user_data = {
             "email": "test_user@email.com",
             "username": "testinger",
@@ -54,12 +69,12 @@ class AlbumImageDetailTest(APITestCase):
         client.force_authenticate(u)
         return client
 
-    def generate_photo_file(self, filename=None):
+    def generate_photo_file(self, filename=None, color=(155, 0, 0)):
         n = filename
         if not n:
             n = 'test.png'
         file = io.BytesIO()
-        image = Image.new('RGBA', size=(100, 100), color=(155, 0, 0))
+        image = Image.new('RGBA', size=(100, 100), color=color)
         image.save(file, 'png')
         file.name = n
         file.seek(0)
@@ -109,4 +124,404 @@ class AlbumImageDetailTest(APITestCase):
         })
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(ImageModel.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(ImageModel.objects.count(), 0)
+
+    def get_preview(self, img_path, x_size, y_size):
+        url = reverse('album-img-preview', kwargs={
+            "album_path": self.album.name,
+            "img_path": img_path
+        })
+        return self.client.get(url, {'x_size': x_size, 'y_size': y_size})
+
+    def test_image_preview(self):
+        response = self.add_image(self.album)
+        img_uploaded = json.loads(response.content)['uploaded'][0]
+
+        response = self.get_preview(img_uploaded['path'], 50, 0)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        preview = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(preview.size, (50, 50))
+
+        img = ImageModel.objects.get(path=img_uploaded['path'])
+        directory = os.path.join(MEDIA_ROOT, get_thumbnail_directory(img))
+        self.assertEqual(os.listdir(directory), ['50x0.png'])
+
+        # cached preview is served again
+        response = self.get_preview(img_uploaded['path'], 50, 0)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+        self.assertEqual(os.listdir(directory), ['50x0.png'])
+
+        url = reverse('album-img-detail', kwargs={
+            "album_path": self.album.name,
+            "img_path": img_uploaded['path']
+        })
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(os.path.exists(directory))
+
+    def test_image_preview_invalid_size(self):
+        response = self.add_image(self.album)
+        img_uploaded = json.loads(response.content)['uploaded'][0]
+
+        response = self.get_preview(img_uploaded['path'], 0, 0)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(PREVIEW_MAX_SIZE=100):
+            for x_size, y_size in ((101, 0), (0, 101)):
+                response = self.get_preview(img_uploaded['path'], x_size,
+                                            y_size)
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+            response = self.get_preview(img_uploaded['path'], 100, 100)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response.close()
+
+    def test_image_preview_corrupt_file(self):
+        response = self.add_image(self.album)
+        img_uploaded = json.loads(response.content)['uploaded'][0]
+        img = ImageModel.objects.get(path=img_uploaded['path'])
+        # blob is shared with the other tests
+        img.file.name = 'corrupt.png'
+        img.save(update_fields=['file'])
+        with open(img.file.path, 'wb') as file:
+            file.write(b'not an image')
+
+        response = self.get_preview(img_uploaded['path'], 50, 0)
+        self.assertEqual(response.status_code,
+                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        directory = os.path.join(MEDIA_ROOT, get_thumbnail_directory(img))
+        self.assertEqual(os.listdir(directory), [])
+
+    def test_image_preview_eviction(self):
+        response = self.add_image(self.album)
+        img_uploaded = json.loads(response.content)['uploaded'][0]
+        img = ImageModel.objects.get(path=img_uploaded['path'])
+        directory = os.path.join(MEDIA_ROOT, get_thumbnail_directory(img))
+
+        with self.settings(THUMBNAILS_CACHE_MAX_BYTES=1):
+            for size in (10, 20, 30):
+                response = self.get_preview(img_uploaded['path'], size, 0)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                response.close()
+        # only the most recently rendered preview survives
+        self.assertEqual(os.listdir(directory), ['30x0.png'])
+
+    def test_image_upload_stored_as_blob(self):
+        response = self.add_image(self.album)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        img_uploaded = json.loads(response.content)['uploaded'][0]
+
+        img = ImageModel.objects.get(path=img_uploaded['path'])
+        self.assertEqual(img.file.name, img.blob.file.name)
+        self.assertEqual(img.file.name,
+                         Blob.get_blob_name(img.blob.digest, '.png'))
+        self.assertTrue(os.path.isfile(os.path.join(MEDIA_ROOT,
+                                                    img.file.name)))
+        self.assertEqual((img.width, img.height), (100, 100))
+        # streamed file was moved out of the album directory
+        self.assertFalse(os.path.exists(os.path.join(
+            MEDIA_ROOT, 'albums', self.album.path, img.path)))
+
+    def test_image_upload_deduplication(self):
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        upload = {f'file{i}': self.generate_photo_file() for i in range(3)}
+        upload['other'] = self.generate_photo_file(color=(0, 155, 0))
+        response = self.client.post(url, upload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)['uploaded']), 4)
+        self.assertEqual(Blob.objects.count(), 2)
+        blob = Blob.objects.get(references=3)
+
+        # same content in another album
+        self.client.post(reverse('album'), data={"name": "boo"})
+        url = reverse('album-detail', kwargs={'path': "boo"})
+        response = self.client.post(url, {'file': self.generate_photo_file()})
+        img_uploaded = json.loads(response.content)['uploaded'][0]
+        self.assertEqual(Blob.objects.count(), 2)
+        blob.refresh_from_db()
+        self.assertEqual(blob.references, 4)
+
+        blob_path = os.path.join(MEDIA_ROOT, blob.file.name)
+        url = reverse('album-img-detail', kwargs={
+            "album_path": "boo",
+            "img_path": img_uploaded['path']
+        })
+        self.client.delete(url)
+        blob.refresh_from_db()
+        self.assertEqual(blob.references, 3)
+        self.assertTrue(os.path.isfile(blob_path))
+
+        for img in list(ImageModel.objects.filter(blob=blob)):
+            url = reverse('album-img-detail', kwargs={
+                "album_path": self.album.name,
+                "img_path": img.path
+            })
+            self.client.delete(url)
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(os.path.exists(blob_path))
+
+    def test_image_upload_rollback_keeps_no_blob_file(self):
+        file = self.generate_photo_file(color=(1, 2, 3))
+        blob_path = os.path.join(MEDIA_ROOT, Blob.get_blob_name(
+            hashlib.sha256(file.getvalue()).hexdigest(), '.png'))
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        with mock.patch.object(ImageModel.objects, 'bulk_create',
+                               side_effect=DatabaseError):
+            response = self.client.post(url, {'file': file})
+        self.assertEqual(response.status_code,
+                         status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(blob_path))
+        # uploaded file was deleted too
+        self.assertEqual([name for name in os.listdir(os.path.join(
+            MEDIA_ROOT, 'albums', self.album.path)) if name.endswith('.png')],
+            [])
+
+        # the same content is stored again by the next upload
+        file.seek(0)
+        response = self.client.post(url, {'file': file})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(os.path.isfile(blob_path))
+
+    def test_image_batch_upload_failure_deletes_stored_files(self):
+        probe = upload_handlers.probe_image_dimensions
+
+        def failing_probe(name):
+            if 'broken' in name:
+                raise OSError('disk failure')
+            return probe(name)
+
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        upload = {f'file{i}': self.generate_photo_file(f'ok{i}.png')
+                  for i in range(3)}
+        upload['broken'] = self.generate_photo_file('broken.png')
+        with mock.patch.object(upload_handlers, 'probe_image_dimensions',
+                               failing_probe):
+            response = self.client.post(url, upload)
+        self.assertEqual(response.status_code,
+                         status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(ImageModel.objects.exists())
+        # files stored by the other workers were deleted too
+        self.assertEqual([name for name in os.listdir(os.path.join(
+            MEDIA_ROOT, 'albums', self.album.path)) if name.endswith('.png')],
+            [])
+
+    @override_settings(DATA_UPLOAD_MAX_NUMBER_FIELDS=1)
+    def test_image_upload_invalid_body_deletes_streamed_files(self):
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        # body is rejected after the files were streamed to the album
+        upload = {f'file{i}': self.generate_photo_file(f'ok{i}.png')
+                  for i in range(2)}
+        upload.update({'first': 'field', 'second': 'field'})
+        response = self.client.post(url, upload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImageModel.objects.exists())
+        self.assertEqual([name for name in os.listdir(os.path.join(
+            MEDIA_ROOT, 'albums', self.album.path)) if name.endswith('.png')],
+            [])
+
+    def test_image_upload_same_names(self):
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        upload = {f'file{i}': self.generate_photo_file() for i in range(3)}
+        response = self.client.post(url, upload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        uploaded = json.loads(response.content)['uploaded']
+        self.assertEqual(len({img['path'] for img in uploaded}), 3)
+
+    def test_image_upload_invalid_file(self):
+        file = io.BytesIO(b'definitely not an image')
+        file.name = 'fake.png'
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        response = self.client.post(url, {'file': file})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)
+        self.assertEqual(content['uploaded'], [])
+        self.assertEqual(content['errors'][0]['name'], 'fake.png')
+        self.assertIn('file', content['errors'][0]['error'])
+        self.assertEqual(ImageModel.objects.count(), 0)
+        album_directory = os.path.join(MEDIA_ROOT, 'albums', self.album.path)
+        self.assertFalse([name for name in os.listdir(album_directory)
+                          if name.startswith('fake')])
+
+    def test_image_batch_upload_query_count(self):
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        counts = []
+        for files_count in (1, 10):
+            upload = {f'file{i}': self.generate_photo_file(
+                          color=(files_count, i, 0))
+                      for i in range(files_count)}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url, upload)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(json.loads(response.content)['uploaded']),
+                             files_count)
+            counts.append(len(queries))
+        # album lookup, blobs lookup, insert and reference update, one
+        # insert of all the images and of the metadata job (in a savepoint),
+        # `fullpath` of the uploaded images costs no query
+        self.assertEqual(counts, [9, 9])
+        self.assertEqual(ImageModel.objects.count(), 11)
+
+    def test_image_detail_query_count(self):
+        response = self.add_image(self.album)
+        img_uploaded = json.loads(response.content)['uploaded'][0]
+        url = reverse('album-img-detail', kwargs={
+            "album_path": self.album.name,
+            "img_path": img_uploaded['path']
+        })
+        # album and image are resolved with one joined query
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        url = reverse('album-img-detail', kwargs={
+            "album_path": "unknown",
+            "img_path": img_uploaded['path']
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def exif_photo_file(self, name='photo.jpg'):
+        exif = Image.Exif()
+        exif[0x010F] = 'Canon'
+        exif[0x0110] = 'EOS 5D'
+        exif[0x0112] = 6
+        exif[0x0132] = '2020:07:14 18:30:00'
+        file = io.BytesIO()
+        Image.new('RGB', size=(80, 60), color=(0, 0, 200)).save(
+            file, 'jpeg', exif=exif)
+        file.name = name
+        file.seek(0)
+        return file
+
+    def test_image_metadata_extraction(self):
+        uploaded = self.upload_file('foo', self.exif_photo_file())
+        plain = self.upload_file('foo', self.generate_photo_file())
+        img = ImageModel.objects.get(path=uploaded['path'])
+        # metadata is not extracted by the upload request
+        self.assertIsNone(img.metadata_extracted)
+        job = Job.objects.get(kind=Job.KIND_EXTRACT_METADATA,
+                              payload__paths=[uploaded['path']])
+
+        self.assertEqual(process_jobs(), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (Job.STATUS_DONE, 1))
+
+        img.refresh_from_db()
+        self.assertIsNotNone(img.metadata_extracted)
+        self.assertEqual(img.camera, 'Canon EOS 5D')
+        self.assertEqual(img.orientation, 6)
+        self.assertEqual(timezone.localtime(img.taken_at).replace(
+            tzinfo=None), datetime(2020, 7, 14, 18, 30))
+        red, green, blue = img.dominant_color
+        self.assertGreater(blue, 150)
+        self.assertLess(red + green, 40)
+
+        img = ImageModel.objects.get(path=plain['path'])
+        self.assertIsNotNone(img.metadata_extracted)
+        self.assertIsNone(img.taken_at)
+        self.assertEqual(img.camera, '')
+        self.assertEqual(img.dominant_color, [155, 0, 0])
+
+    def test_image_search(self):
+        self.client.post(reverse('album'), data={"name": "boo"})
+        first = self.upload_file('foo', self.generate_photo_file('cat.png'))
+        second = self.upload_file('boo', self.generate_photo_file(
+            'black cat.png', color=(0, 0, 0)))
+        self.upload_file('boo', self.generate_photo_file('dog.png'))
+
+        other = User.objects.create(email="other@email.com",
+                                    username="other")
+        other_album = Album.objects.create(
+            user=other, name='foo', path=Album.get_path(other, 'foo'))
+        ImageModel.objects.create(album=other_album, path='cat.png',
+                                  name='Cat', file='cat.png',
+                                  width=100, height=100)
+        # owner is copied from the album
+        self.assertEqual(other.images.count(), 1)
+
+        url = reverse('album-search')
+        results = []
+        page_url = url + '?search=cat&page_size=1'
+        while page_url:
+            # images are joined with their albums
+            with self.assertNumQueries(1):
+                response = self.client.get(page_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            content = json.loads(response.content)
+            results += content['results']
+            page_url = content['next']
+        self.assertEqual([(img['path'], img['album']) for img in results],
+                         [(first['path'], 'foo'), (second['path'], 'boo')])
+
+        response = self.client.get(url, {'prefix': 'dog',
+                                         'ordering': '-created'})
+        self.assertEqual([img['name'] for img in json.loads(
+            response.content)['results']], ['Dog'])
+
+        response = self.client.get(url, {'ordering': 'name'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_album_named_search(self):
+        # search doesn't shadow the album
+        self.client.post(reverse('album'), data={"name": "search"})
+        self.upload_file('search', self.generate_photo_file('cat.png'))
+        response = self.client.get(reverse('album-detail',
+                                           kwargs={'path': 'search'}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['name'], 'search')
+        self.assertEqual(reverse('album-search'), '/search/images')
+
+    def upload_file(self, album_name, file):
+        url = reverse('album-detail', kwargs={'path': album_name})
+        response = self.client.post(url, {'file': file})
+        return json.loads(response.content)['uploaded'][0]
+
+    def gradient_file(self, size=(256, 256), flip=False, name='test.png'):
+        img = Image.linear_gradient('L').resize(size).rotate(90)
+        if flip:
+            img = img.transpose(Image.FLIP_LEFT_RIGHT)
+        file = io.BytesIO()
+        img.convert('RGB').save(file, 'png')
+        file.name = name
+        file.seek(0)
+        return file
+
+    def test_image_similar(self):
+        original = self.upload_file('foo', self.gradient_file())
+        self.assertIsNotNone(
+            ImageModel.objects.get(path=original['path']).phash)
+        duplicate = self.upload_file('foo', self.gradient_file())
+        self.upload_file('foo', self.gradient_file(flip=True))
+        self.client.post(reverse('album'), data={"name": "boo"})
+        resized = self.upload_file('boo', self.gradient_file((120, 120)))
+        # the same image of another user is never a candidate
+        other = User.objects.create(email="other@email.com",
+                                    username="other")
+        other_album = Album.objects.create(
+            user=other, name='foo', path=Album.get_path(other, 'foo'))
+        other_img = ImageModel(album=other_album, path='copy.png',
+                               file='copy.png', width=128, height=128)
+        other_img.set_phash(to_unsigned(ImageModel.objects.get(
+            path=original['path']).phash))
+        other_img.save()
+
+        url = reverse('album-img-similar', kwargs={
+            "album_path": self.album.name,
+            "img_path": original['path']
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)
+        self.assertEqual([img['path'] for img in content],
+                         [duplicate['path'], resized['path']])
+        self.assertEqual(content[0]['distance'], 0)
+        self.assertEqual(content[1]['fullpath'].split('/')[0], 'boo')
+
+        response = self.client.get(url, {'scope': 'album'})
+        self.assertEqual([img['path'] for img in json.loads(response.content)],
+                         [duplicate['path']])
+
+        response = self.client.get(url, {'distance': 100})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,169 @@
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from PIL import Image
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase, override_settings
+
+from v1.accounts.models.user import User
+from v1.albums.imports import (
+    CORRUPTED_MEMBER_MESSAGE, delete_orphaned_archives
+)
+from v1.images.models.image import Image as ImageModel
+from v1.images.staging import delete_abandoned_sessions
+from v1.jobs.models.job import Job
+from v1.jobs.worker import process_jobs
+
+MEDIA_ROOT = tempfile.mkdtemp()
+IMPORT_ARCHIVE_DIR = tempfile.mkdtemp()
+UPLOAD_STAGING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT,
+                   IMPORT_ARCHIVE_DIR=IMPORT_ARCHIVE_DIR,
+                   UPLOAD_STAGING_DIR=UPLOAD_STAGING_DIR,
+                   IMPORT_BATCH_SIZE=2)
+class ArchiveImportTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email='test_user@email.com',
+                                        username='testinger')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('album'), data={'name': 'foo'})
+
+    def generate_photo(self, color=(155, 0, 0), size=(100, 50)):
+        file = io.BytesIO()
+        Image.new('RGB', size=size, color=color).save(file, 'png')
+        return file.getvalue()
+
+    def generate_archive(self, members):
+        file = io.BytesIO()
+        with zipfile.ZipFile(file, 'w') as archive:
+            for name, data in members:
+                archive.writestr(name, data)
+        file.name = 'photos.zip'
+        file.seek(0)
+        return file
+
+    def test_import_archive(self):
+        archive = self.generate_archive([
+            ('red.png', self.generate_photo()),
+            ('trip/blue.png', self.generate_photo((0, 0, 155), (50, 100))),
+            ('trip/', b''),
+            ('copy of red.png', self.generate_photo()),
+            ('notes.txt', b'not an image'),
+            ('__MACOSX/._red.png', b'resource fork'),
+        ])
+        response = self.client.post(
+            reverse('album-import', kwargs={'path': 'foo'}),
+            {'archive': archive})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()['kind'], Job.KIND_IMPORT_ARCHIVE)
+        self.assertEqual(len(os.listdir(IMPORT_ARCHIVE_DIR)), 1)
+
+        # import and metadata extraction of both batches
+        self.assertEqual(process_jobs(), 3)
+        response = self.client.get(
+            reverse('job-detail', kwargs={'pk': response.json()['id']}))
+        job = response.json()
+        self.assertEqual(job['status'], Job.STATUS_DONE)
+        self.assertEqual((job['processed'], job['total']), (4, 4))
+        self.assertEqual(sorted(img['name'] for img in job['result'][
+            'uploaded']), ['Blue', 'Copy of red', 'Red'])
+        self.assertEqual(job['result']['errors'], [{
+            'name': 'notes.txt',
+            'error': {'file': ['Upload a valid image. The file you uploaded '
+                               'was either not an image or a corrupted '
+                               'image.']},
+        }])
+
+        images = {img.name: img for img in ImageModel.objects.all()}
+        self.assertEqual((images['Blue'].width, images['Blue'].height),
+                         (50, 100))
+        # same content is stored once
+        self.assertEqual(images['Red'].blob, images['Copy of red'].blob)
+        self.assertEqual(os.listdir(IMPORT_ARCHIVE_DIR), [])
+
+        response = self.client.get(reverse('album-detail',
+                                           kwargs={'path': 'foo'}))
+        self.assertEqual(len(response.json()['images']), 3)
+
+    def test_queued_archive_is_kept(self):
+        archive = self.generate_archive([('red.png', self.generate_photo())])
+        response = self.client.post(
+            reverse('album-import', kwargs={'path': 'foo'}),
+            {'archive': archive})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        path = Job.objects.get().payload['path']
+        orphan = os.path.join(IMPORT_ARCHIVE_DIR, 'orphan.zip')
+        open(orphan, 'wb').close()
+        old = (timezone.now() - datetime.timedelta(days=2)).timestamp()
+        for name in (path, orphan):
+            os.utime(name, (old, old))
+
+        # job still waits in the queue
+        delete_abandoned_sessions()
+        self.assertEqual(delete_orphaned_archives(), 1)
+        self.assertEqual(os.listdir(IMPORT_ARCHIVE_DIR),
+                         [os.path.basename(path)])
+
+        process_jobs()
+        self.assertEqual(ImageModel.objects.get().name, 'Red')
+        self.assertEqual(os.listdir(IMPORT_ARCHIVE_DIR), [])
+
+    def test_invalid_archive(self):
+        file = io.BytesIO(b'not a zip')
+        file.name = 'photos.zip'
+        response = self.client.post(
+            reverse('album-import', kwargs={'path': 'foo'}), {'archive': file})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            reverse('album-import', kwargs={'path': 'foo'}), {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.exists())
+
+    def test_import_command(self):
+        archive = self.generate_archive([
+            ('red.png', self.generate_photo()),
+            ('broken.png', self.generate_photo((0, 155, 0))),
+        ])
+        data = bytearray(archive.getvalue())
+        with zipfile.ZipFile(archive) as zf:
+            info = zf.getinfo('broken.png')
+        # flip a byte of the stored content, its CRC doesn't match then
+        position = info.header_offset + 30 + len(info.filename) + 40
+        data[position] ^= 0xff
+        path = os.path.join(tempfile.mkdtemp(), 'photos.zip')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'wb') as file:
+            file.write(data)
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_archive', 'test_user@email.com', 'foo', path,
+                     stdout=out, stderr=err)
+        self.assertIn('Processed 2/2 file(s).', out.getvalue())
+        self.assertIn('Done: 1 imported, 1 failed.', out.getvalue())
+        self.assertIn(CORRUPTED_MEMBER_MESSAGE, err.getvalue())
+        self.assertEqual(
+            list(ImageModel.objects.values_list('name', flat=True)), ['Red'])
+        # partially stored broken file is deleted, the valid one is a blob
+        self.assertEqual(
+            os.listdir(os.path.join(MEDIA_ROOT, 'albums',
+                                    'test_user@email.com-foo')), [])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(IMPORT_ARCHIVE_DIR, ignore_errors=True)
+        shutil.rmtree(UPLOAD_STAGING_DIR, ignore_errors=True)
+        super().tearDownClass()
@@ -0,0 +1,196 @@
+import datetime
+import errno
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from unittest import mock
+
+from PIL import Image
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase, override_settings
+
+from v1.accounts.models.user import User
+from v1.images.models.image import Image as ImageModel
+from v1.images.models.upload_session import UploadSession
+from v1.images.staging import (
+    copy_file, delete_abandoned_sessions, get_session_dir
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+UPLOAD_STAGING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT,
+                   UPLOAD_STAGING_DIR=UPLOAD_STAGING_DIR,
+                   UPLOAD_CHUNK_MAX_SIZE=1024)
+class ChunkedUploadTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email='test_user@email.com',
+                                        username='testinger')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('album'), data={'name': 'foo'})
+
+    def generate_photo(self, size=(80, 80)):
+        file = io.BytesIO()
+        # noise, so the PNG is larger than one chunk
+        Image.effect_noise(size, 64).convert('RGB').save(file, 'png')
+        return file.getvalue()
+
+    def start_upload(self, content, filename='big.png'):
+        response = self.client.post(
+            reverse('album-uploads', kwargs={'path': 'foo'}),
+            data={'filename': filename, 'size': len(content)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.json()
+
+    def put_chunk(self, upload_id, data, offset):
+        return self.client.put(
+            reverse('album-upload-detail',
+                    kwargs={'path': 'foo', 'upload_id': upload_id}),
+            data=data, content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload_url(self, upload_id):
+        return reverse('album-upload-detail',
+                       kwargs={'path': 'foo', 'upload_id': upload_id})
+
+    def test_chunked_upload(self):
+        content = self.generate_photo()
+        session = self.start_upload(content)
+        self.assertEqual(session['offset'], 0)
+        self.assertEqual(session['chunk_size'], 1024)
+
+        offset = 0
+        while offset < len(content):
+            chunk = content[offset:offset + 1000]
+            response = self.put_chunk(session['id'], chunk, offset)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            offset += len(chunk)
+            self.assertEqual(response.json()['offset'], offset)
+
+            if offset == 2000:
+                # resent chunk after a lost response
+                response = self.put_chunk(session['id'], chunk, 1000)
+                self.assertEqual(response.status_code,
+                                 status.HTTP_409_CONFLICT)
+                self.assertEqual(response.json(), {'offset': 2000})
+                # client resumes from the offset of the session
+                response = self.client.get(self.upload_url(session['id']))
+                self.assertEqual(response.json()['offset'], 2000)
+
+        response = self.client.post(self.upload_url(session['id']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['errors'], [])
+        self.assertEqual(len(data['uploaded']), 1)
+        self.assertEqual(data['uploaded'][0]['name'], 'Big')
+
+        img = ImageModel.objects.get(path=data['uploaded'][0]['path'])
+        self.assertEqual((img.width, img.height), (80, 80))
+        self.assertEqual(img.user, self.user)
+        self.assertEqual(img.blob.digest,
+                         hashlib.sha256(content).hexdigest())
+        with img.file.open('rb') as file:
+            self.assertEqual(file.read(), content)
+
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(get_session_dir(session['id'])))
+
+    def test_invalid_chunks(self):
+        content = self.generate_photo()
+        session = self.start_upload(content)
+
+        response = self.put_chunk(session['id'], b'x' * 1025, 0)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.put_chunk(session['id'], b'x' * 10, len(content) - 5)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.put_chunk(session['id'], b'x' * 10, 10)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        # incomplete upload can't be finalized
+        self.put_chunk(session['id'], content[:1000], 0)
+        response = self.client.post(self.upload_url(session['id']))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json(), {'offset': 1000})
+
+        response = self.client.delete(self.upload_url(session['id']))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(get_session_dir(session['id'])))
+        response = self.client.get(self.upload_url(session['id']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upload_of_other_user(self):
+        session = self.start_upload(b'x' * 10)
+        other = User.objects.create(email='other@email.com',
+                                    username='other')
+        self.client.force_authenticate(other)
+        self.client.post(reverse('album'), data={'name': 'foo'})
+        response = self.put_chunk(session['id'], b'x' * 10, 0)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_not_image(self):
+        session = self.start_upload(b'x' * 10, filename='notes.txt')
+        self.put_chunk(session['id'], b'x' * 10, 0)
+        response = self.client.post(self.upload_url(session['id']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['uploaded'], [])
+        self.assertEqual(data['errors'][0]['name'], 'notes.txt')
+        self.assertFalse(ImageModel.objects.exists())
+
+    def test_delete_abandoned_sessions(self):
+        abandoned = self.start_upload(b'x' * 10)
+        active = self.start_upload(b'x' * 10)
+        self.put_chunk(abandoned['id'], b'x' * 5, 0)
+        self.put_chunk(active['id'], b'x' * 5, 0)
+        UploadSession.objects.filter(pk=abandoned['id']).update(
+            modified=timezone.now() - datetime.timedelta(days=2))
+
+        # chunks of a session deleted with its album
+        orphan = get_session_dir(uuid.uuid4())
+        os.makedirs(orphan)
+        old = (timezone.now() - datetime.timedelta(days=2)).timestamp()
+        os.utime(orphan, (old, old))
+
+        self.assertEqual(delete_abandoned_sessions(), 1)
+        self.assertEqual(
+            list(UploadSession.objects.values_list('pk', flat=True)),
+            [uuid.UUID(active['id'])])
+        self.assertFalse(os.path.exists(get_session_dir(abandoned['id'])))
+        self.assertTrue(os.path.exists(get_session_dir(active['id'])))
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_copy_file_fallback(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        source_path = os.path.join(directory, 'source')
+        with open(source_path, 'wb') as file:
+            file.write(b'abc' * 1000)
+
+        unsupported = OSError(errno.EXDEV, 'Cross-device link')
+        with mock.patch('os.copy_file_range', side_effect=unsupported), \
+                mock.patch('os.sendfile', side_effect=unsupported):
+            with open(source_path, 'rb') as source, \
+                    open(os.path.join(directory, 'copy'), 'wb') as copy:
+                copy.write(b'123')
+                copy.flush()
+                copy_file(source.fileno(), copy.fileno(), 3000)
+        with open(os.path.join(directory, 'copy'), 'rb') as copy:
+            self.assertEqual(copy.read(), b'123' + b'abc' * 1000)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(UPLOAD_STAGING_DIR, ignore_errors=True)
+        super().tearDownClass()
@@ -1,14 +1,31 @@
 from django.urls import path
 
-from .views.album import AlbumListView, AlbumDetailView
+from .views.album import AlbumArchiveView, AlbumListView, AlbumDetailView
 from .views.album_admins import AlbumAdminsView
-from .views.image import ImageDetailView
+from .views.album_import import AlbumImportView
+from .views.upload import UploadSessionDetailView, UploadSessionListView
+from .views.image import (
+    ImageDetailView, ImagePreviewView, ImageSimilarView
+)
 
 urlpatterns = [
     path('', AlbumListView.as_view(), name='album'),
     path('<str:path>', AlbumDetailView.as_view(),
          name='album-detail'),
+    # must precede the image detail, which would match them as image path
+    path('<str:path>/archive', AlbumArchiveView.as_view(),
+         name='album-archive'),
+    path('<str:path>/import', AlbumImportView.as_view(),
+         name='album-import'),
+    path('<str:path>/uploads', UploadSessionListView.as_view(),
+         name='album-uploads'),
+    path('<str:path>/uploads/<uuid:upload_id>',
+         UploadSessionDetailView.as_view(), name='album-upload-detail'),
     path('<str:album_path>/<str:img_path>', ImageDetailView.as_view(),
          name='album-img-detail'),
+    path('<str:album_path>/<str:img_path>/preview', ImagePreviewView.as_view(),
+         name='album-img-preview'),
+    path('<str:album_path>/<str:img_path>/similar', ImageSimilarView.as_view(),
+         name='album-img-similar'),
     path('delete_all/', AlbumAdminsView.as_view(), name='albums-delete-all'),
 ]
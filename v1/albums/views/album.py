@@ -1,4 +1,11 @@
-from django.http import HttpResponseNotFound
+import os
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.db import transaction
+from django.db.models import Min, Prefetch
+from django.forms import ImageField
+from django.http import HttpResponseNotFound, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, authentication_classes, \
@@ -11,13 +18,37 @@ from django.utils.encoding import escape_uri_path
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from config.executor import sync_to_pool
+from v1.albums.archive import stream_album_archive
+from v1.albums.cache import (
+    album_list_namespace, album_namespace, cached_response,
+    invalidate_album, invalidate_album_list, latest_timestamp
+)
 from v1.albums.models.album import Album
+from v1.albums.pagination import (
+    AlbumKeysetPagination, ImageKeysetPagination
+)
 from v1.albums.serializers.album_detail import AlbumDetailSerializer
+from v1.albums.serializers.filters import (
+    AlbumFilterSerializer, ImageFilterSerializer
+)
 from v1.albums.serializers.album_list import (
     AlbumListSerializer
 )
+from v1.albums.views.base import AsyncAPIView
+from v1.images.derivatives import get_enabled_formats
+from v1.images.models.blob import Blob
 from v1.images.models.image import Image
-from v1.images.serializers.image import ImageUploadSerializer
+from v1.jobs.models.job import Job
+from v1.jobs.views.job import job_accepted_response
+from v1.jobs.worker import enqueue
+from v1.images.upload_handlers import (
+    AlbumUploadHandler, prepare_uploaded_files_async
+)
+
+storage = get_storage_class()()
+
+INVALID_IMAGE_MESSAGE = ImageField.default_error_messages['invalid_image']
 
 
 def get_album(user, path):
@@ -31,7 +62,60 @@ def get_album(user, path):
     return album
 
 
-class AlbumListView(APIView):
+def set_album_upload_handlers(request, album, user):
+    """
+    Makes uploaded files of the Django request to be streamed straight to
+    the album directory. It has no effect if the request body was already
+    parsed.
+
+    :return: The upload handler or `None`.
+    """
+    handler = AlbumUploadHandler(album, user, request)
+    try:
+        request.upload_handlers = [handler]
+    except AttributeError:
+        # files were already handled by the default upload handlers
+        return None
+    return handler
+
+
+def get_album_deletion(user, album):
+    """
+    :return: Pending or running job which deletes the album, or `None`.
+    """
+    jobs = Job.objects.filter(
+        user=user, kind=Job.KIND_DELETE_ALBUMS,
+        status__in=[Job.STATUS_PENDING, Job.STATUS_RUNNING]
+    ).order_by('created')
+    for job in jobs:
+        if album.pk in job.payload.get('albums', []):
+            return job
+    return None
+
+
+def delete_album(user, album):
+    """
+    Enqueues deletion of the album, unless it is being deleted already.
+
+    :return: The deletion job.
+    """
+    return get_album_deletion(user, album) or enqueue(
+        user, Job.KIND_DELETE_ALBUMS, {'albums': [album.pk]})
+
+
+def uploaded_image_data(img):
+    """
+    Returns item of `uploaded` list of the upload response.
+    """
+    return {
+        'name': img.name,
+        'path': img.path,
+        'fullpath': img.fullpath,
+        'modified': img.modified,
+    }
+
+
+class AlbumListView(AsyncAPIView):
     """
     List view for the album model.
     """
@@ -42,33 +126,73 @@ class AlbumListView(APIView):
         return qs.filter(user=request.user)
 
     @staticmethod
-    def get(request):
+    def prefetch_cover_images(request, qs):
+        """
+        Loads the cover image (the first uploaded one) of every album in one
+        batched query. Covers are stored in the `cover_images` attribute.
         """
-        List all users albums.
+        cover_ids = Image.objects.filter(
+            album__user=request.user
+        ).values('album').annotate(first_id=Min('pk')).values('first_id')
+        return qs.prefetch_related(Prefetch(
+            'image_set',
+            queryset=Image.objects.filter(pk__in=cover_ids),
+            to_attr='cover_images',
+        ))
 
-        :param request:
-        :return: list of albums.
+    @staticmethod
+    async def get(request):
+        """
+        List all users albums page by page. Albums can be filtered by name
+        (`search`, `prefix`) and creation time (`created_after`,
+        `created_before`) and sorted by `ordering` (`created`, `modified`,
+        `name`, `-` prefix for descending order).
+
+        :param request: GET
+        :return: page of albums and link to the next page.
         """
+        filters = AlbumFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def build():
+            qs = AlbumListView.get_queryset(
+                request,
+                Album.objects.all()
+            )
+            qs = filters.filter_queryset(qs)
+            qs = AlbumListView.prefetch_cover_images(request, qs)
+            paginator = AlbumKeysetPagination()
+            page = paginator.paginate_queryset(qs, request)
+            serializer = AlbumListSerializer(page, many=True)
+            last_modified = latest_timestamp(
+                *(album.updated_at for album in page),
+                *(img.modified for album in page
+                  for img in album.cover_images),
+            )
+            return paginator.get_paginated_data(serializer.data), last_modified
 
-        qs = AlbumListView.get_queryset(
-            request,
-            Album.objects.all()
+        return await sync_to_pool(cached_response)(
+            request, album_list_namespace(request.user.pk), build
         )
-        serializer = AlbumListSerializer(qs, many=True)
-        return Response(serializer.data)
 
     @staticmethod
-    def post(request):
+    async def post(request):
         """
         Create new album.
         :param request:
         :return: created album.
         """
+        return await sync_to_pool(AlbumListView.create_album)(request)
 
+    @staticmethod
+    def create_album(request):
         serializer = AlbumListSerializer(data=request.data,
                                          context={'user': request.user})
         if serializer.is_valid():
             serializer.save()
+            invalidate_album_list(request.user.pk)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         errors = serializer.errors.get('name')
         if len(errors) == 1 and errors[0].code == 'unique':
@@ -76,42 +200,76 @@ class AlbumListView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AlbumDetailView(APIView):
+class AlbumDetailView(AsyncAPIView):
     """
     API view to manipulate with specific album.
     """
 
     permission_classes = (IsAuthenticated,)
 
+    def initialize_request(self, request, *args, **kwargs):
+        # upload handlers are set on the Django request by `post`, before
+        # the body is parsed
+        self.http_request = request
+        return super().initialize_request(request, *args, **kwargs)
+
     @staticmethod
-    def get(request, path):
+    async def get(request, path):
         """
-        Retrieve one album.
+        Retrieve one album with one page of its images. Images can be
+        filtered by query params of `ImageFilterSerializer` (name, creation
+        and capture time, orientation and dimensions) and sorted by
+        `ordering` (`created`, `modified`, `name`, `width`, `height`,
+        `taken`, `-` prefix for descending order). `variants=true` includes
+        dimensions and size variants of the images.
         :param request: GET
         :param path: Path to the album in storage.
-        :return: Specific album with one photo to preview.
+        :return: Specific album with page of images and link to the next one.
         """
-        album = get_album(request.user, path)
-        serializer = AlbumDetailSerializer(album)
-        return Response(serializer.data)
+        album = await sync_to_pool(get_album)(request.user, path)
+        filters = ImageFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def build():
+            paginator = ImageKeysetPagination()
+            images = paginator.paginate_queryset(
+                filters.filter_queryset(album.image_set.all()), request)
+            serializer = AlbumDetailSerializer(album, context={
+                'images': images,
+                'variants': filters.validated_data['variants'],
+            })
+            data = serializer.data
+            data['next'] = paginator.get_next_link()
+            last_modified = latest_timestamp(
+                album.updated_at, *(img.modified for img in images)
+            )
+            return data, last_modified
+
+        return await sync_to_pool(cached_response)(
+            request, album_namespace(request.user.pk, album.path), build
+        )
 
     @staticmethod
-    def delete(request, path):
+    async def delete(request, path):
         """
-        Delete specific album.
+        Delete specific album. Album is deleted by the background job,
+        repeated request returns the job which is deleting it already.
         :param request: DELETE
         :param path: Path to the album in storage.
-        :return: in success return 200 status code.
+        :return: in success return 202 status code with the deletion job.
         """
-        album = get_album(request.user, path)
-        album.delete_album_directory()
-        album.delete()
-        return Response(None, status.HTTP_200_OK)
+        album = await sync_to_pool(get_album)(request.user, path)
+        job = await sync_to_pool(delete_album)(request.user, album)
+        return job_accepted_response(job)
 
-    @staticmethod
-    def post(request, path):
+    async def post(self, request, path):
         """
-        Upload new photos to the specific album.
+        Upload new photos to the specific album. Files are streamed straight
+        to the album directory, their headers are parsed in the upload pool
+        and all the images are inserted at once. Metadata (EXIF, dominant
+        colour) is extracted later by the background job.
         :param request: POST
         :param path: Path to the album in storage.
         :return: Info about loaded images and info with errors.
@@ -121,31 +279,125 @@ class AlbumDetailView(APIView):
             'errors': []
         }
 
-        album = get_album(request.user, path)
+        album = await sync_to_pool(get_album)(request.user, path)
+        handler = set_album_upload_handlers(self.http_request, album,
+                                            request.user)
 
-        if not request.FILES:
+        try:
+            files = await sync_to_pool(lambda: list(request.FILES.values()))()
+        except Exception:
+            # files streamed before the body turned out invalid
+            if handler is not None:
+                await sync_to_pool(handler.delete_stored_files)()
+            raise
+        if not files:
             return Response({}, status.HTTP_400_BAD_REQUEST)
 
         try:
-            for key, val in request.FILES.items():
-                image = Image.create_from_file(album, val, request.user)
-                serializer = ImageUploadSerializer(
-                    data=image, context={'user': request.user}
-                )
-                if serializer.is_valid():
-                    img = serializer.save()
-                    success_response['uploaded'].append({
-                        'name': img.name,
-                        'path': img.path,
-                        'fullpath': img.fullpath,
-                        'modified': img.modified,
-                    })
-                else:
+            prepared = await prepare_uploaded_files_async(album, request.user,
+                                                          files)
+            uploads = []
+            for upload in prepared:
+                if upload.stored_name is None:
                     success_response['errors'].append({
-                        'name': val.name,
-                        'error': serializer.errors
+                        'name': upload.file.name,
+                        'error': {'file': [INVALID_IMAGE_MESSAGE]}
                     })
+                else:
+                    uploads.append(upload)
+
+            images = await sync_to_pool(AlbumDetailView.create_images)(
+                request.user, album, uploads)
+
+            success_response['uploaded'] = [uploaded_image_data(img)
+                                            for img in images]
 
             return Response(success_response, status=status.HTTP_200_OK)
         except Exception as e:
-            raise APIException()
\ No newline at end of file
+            raise APIException()
+
+    @staticmethod
+    def create_images(user, album, uploads):
+        """
+        Inserts images of the prepared uploads at once. Uploaded files are
+        deleted if it fails, files moved to new blobs too.
+
+        :return: List of the created images.
+        """
+        images = []
+        try:
+            with transaction.atomic():
+                blobs = Blob.acquire([
+                    (upload.stored_name, upload.digest, upload.file.size)
+                    for upload in uploads
+                ])
+                try:
+                    for upload in uploads:
+                        blob = blobs[upload.digest]
+                        img = Image(
+                            album=album,
+                            user=user,
+                            blob=blob,
+                            file=blob.file.name,
+                            path=os.path.basename(upload.stored_name),
+                            name=os.path.splitext(
+                                upload.file.name)[0].capitalize(),
+                            width=upload.width,
+                            height=upload.height,
+                            variants={'bytes': blob.size},
+                        )
+                        img.set_phash(upload.phash)
+                        images.append(img)
+                    Image.objects.bulk_create(images)
+                    if images:
+                        paths = [img.path for img in images]
+                        # EXIF and colours are extracted in background
+                        enqueue(user, Job.KIND_EXTRACT_METADATA,
+                                {'album': album.pk, 'paths': paths})
+                        if get_enabled_formats():
+                            enqueue(user, Job.KIND_TRANSCODE_IMAGES,
+                                    {'album': album.pk, 'paths': paths})
+                        # size variants only of the images wider than them
+                        widths = settings.IMAGE_VARIANT_WIDTHS
+                        paths = [img.path for img in images
+                                 if widths and img.width > widths[0]]
+                        if paths:
+                            enqueue(user, Job.KIND_RENDER_VARIANTS,
+                                    {'album': album.pk, 'paths': paths})
+                except Exception:
+                    # rows of the new blobs are still locked, their files
+                    # are moved back before the rollback
+                    Blob.revert(blobs)
+                    raise
+        except Exception:
+            for upload in uploads:
+                storage.delete(upload.stored_name)
+            raise
+        if images:
+            invalidate_album(album)
+        return images
+
+
+class AlbumArchiveView(APIView):
+    """
+    API view to download the whole album.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    @staticmethod
+    def get(request, path):
+        """
+        Download all the album images in one ZIP archive. Archive is
+        generated while it is sent, so its size isn't known in advance.
+        :param request: GET
+        :param path: Path to the album in storage.
+        :return: Streamed ZIP archive.
+        """
+        album = get_album(request.user, path)
+        response = StreamingHttpResponse(stream_album_archive(album),
+                                         content_type='application/zip')
+        # album path is already escaped
+        filename = Album.get_folder_name(album.path)
+        response['Content-Disposition'] = (
+            f"attachment; filename*=UTF-8''{filename}.zip")
+        return response
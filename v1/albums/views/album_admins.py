@@ -1,9 +1,10 @@
-from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from v1.albums.models.album import Album
+from v1.jobs.models.job import Job
+from v1.jobs.views.job import job_accepted_response
+from v1.jobs.worker import enqueue
 
 
 class AlbumAdminsView(APIView):
@@ -11,9 +12,7 @@ class AlbumAdminsView(APIView):
 
     @staticmethod
     def delete(request):
-        qs = Album.objects.all().iterator()
-        for album in qs:
-            album.delete_album_directory()
-            album.delete()
-        return Response(None, status=status.HTTP_200_OK)
-
+        albums = list(Album.objects.values_list('pk', flat=True))
+        job = enqueue(request.user, Job.KIND_DELETE_ALBUMS,
+                      {'albums': albums})
+        return job_accepted_response(job)
@@ -0,0 +1,53 @@
+import os
+import zipfile
+
+from django.utils.translation import gettext as _
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from config.executor import sync_to_pool
+from v1.albums.imports import store_import_archive
+from v1.albums.views.album import get_album
+from v1.albums.views.base import AsyncAPIView
+from v1.jobs.models.job import Job
+from v1.jobs.views.job import job_accepted_response
+from v1.jobs.worker import enqueue
+
+
+class AlbumImportView(AsyncAPIView):
+    """
+    API view to import ZIP archive of images to the album.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    @staticmethod
+    async def post(request, path):
+        """
+        Import all the images of the ZIP archive (`archive` file). Images
+        are imported by the background job, its `processed` and `total`
+        report the progress and `result` has the uploaded images and errors
+        in the shape of the upload response.
+        :param request: POST
+        :param path: Path to the album in storage.
+        :return: 202 status code with the import job, 400 if the file isn't
+        a ZIP archive.
+        """
+        album = await sync_to_pool(get_album)(request.user, path)
+        file = await sync_to_pool(lambda: request.FILES.get('archive'))()
+        if file is None or not zipfile.is_zipfile(file):
+            return Response({'archive': [_('Upload a valid ZIP archive.')]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        job = await sync_to_pool(AlbumImportView.enqueue_import)(
+            request.user, album, file)
+        return job_accepted_response(job)
+
+    @staticmethod
+    def enqueue_import(user, album, file):
+        path = store_import_archive(file)
+        try:
+            return enqueue(user, Job.KIND_IMPORT_ARCHIVE,
+                           {'album': album.pk, 'path': path})
+        except Exception:
+            os.remove(path)
+            raise
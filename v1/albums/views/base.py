@@ -0,0 +1,60 @@
+import asyncio
+import functools
+
+from rest_framework.views import APIView
+
+from config.executor import sync_to_pool
+
+
+class AsyncAPIView(APIView):
+    """
+    `APIView` with async handlers (`async def get(...)`), sync handlers
+    run in the thread pool as a whole.
+
+    DRF and the ORM of Django 3.2 are sync only, so authentication,
+    permission checks and the blocking parts of the handlers run in
+    `sync_to_pool`. Under ASGI the request body is received and the response
+    is sent by the event loop, so slow clients don't hold any thread, and
+    the sync parts of all the requests share the bounded thread pool of the
+    process (see `config.executor`). Under WSGI the view is run by
+    `async_to_sync`.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        # Django 3.2 recognizes async views by the view function only
+        @functools.wraps(view)
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return async_view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_pool(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(),
+                                  self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_pool(handler)(request, *args,
+                                                       **kwargs)
+        except Exception as exc:
+            response = await sync_to_pool(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args,
+                                               **kwargs)
+        return self.response
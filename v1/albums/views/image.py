@@ -1,17 +1,39 @@
+from functools import reduce
+from operator import or_
+
+from PIL import Image as PILImage
+
+from django.db.models import Q
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework import status
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.views import APIView
 
-from .album import get_album
+from config.executor import sync_to_pool
+
+from ...albums.cache import invalidate_album
+from ...albums.models.album import Album
+from ...albums.pagination import ImageSearchPagination
+from ...albums.serializers.filters import ImageFilterSerializer
+from ...albums.views.base import AsyncAPIView
+from ...images.derivatives import get_accepted_formats, get_enabled_formats
 from ...images.models.image import Image as ImageModel
-from ...images.serializers.image import ImageSerializer
+from ...images.phash import (
+    candidate_chunks, hamming_distance, to_unsigned
+)
+from ...images.serializers.image import (
+    ImageSerializer, ImagePreviewSerializer, ImageSearchSerializer,
+    ImageSimilarSerializer, ImageVariantsSerializer
+)
+from ...images.thumbnails import thumbnail_cache
 
 
 def get_image(user, album_path, img_path):
     """
-    Function returns specific image of some album.
+    Function returns specific image of some album. Album and image are
+    resolved with one joined query.
     If image doesn't exist it will return 404 response.
     :param user: User instance
     :param album_path: Albums' path.
@@ -19,39 +41,47 @@ def get_image(user, album_path, img_path):
     :return: Image instance or raise 404 response.
     """
 
-    album = get_album(user, album_path)
     img = get_object_or_404(
-        album.image_set.all(), path=img_path
+        ImageModel.objects.select_related('album'),
+        album__user=user,
+        album__path=Album.get_path(user, album_path),
+        path=img_path,
     )
     return img
 
 
-class ImageDetailView(APIView):
+class ImageDetailView(AsyncAPIView):
     """
     API view to retrieving specific images.
     """
     permission_classes = (IsAuthenticated, )
 
     @staticmethod
-    def get(request, album_path, img_path):
+    async def get(request, album_path, img_path):
         """
         Retrieve specific image.
         User can't access to another album via the access policy.
         So if user will request some doesn't exist albums user
         will get 404 response.
 
-        :param request: GET
+        :param request: GET, `variants=true` includes dimensions and size
+        variants of the image.
         :param album_path: Albums' path.
         :param img_path: Images' path.
-        :return: Image or 404 Response.
+        :return: Image, 400 or 404 Response.
         """
 
-        img = get_image(request.user, album_path, img_path)
-        serializer = ImageSerializer(img)
+        options = ImageVariantsSerializer(data=request.query_params)
+        if not options.is_valid():
+            return Response(options.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+        img = await sync_to_pool(get_image)(request.user, album_path,
+                                            img_path)
+        serializer = ImageSerializer(img, context=options.validated_data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @staticmethod
-    def delete(request, album_path, img_path):
+    async def delete(request, album_path, img_path):
         """
         Delete specific image.
         :param request: DELETE
@@ -60,7 +90,155 @@ class ImageDetailView(APIView):
         :return: Image or 404 Response.
         """
 
-        img = get_image(request.user, album_path, img_path)
-        img.delete_image_file()
-        img.delete()
+        img = await sync_to_pool(get_image)(request.user, album_path,
+                                            img_path)
+        await sync_to_pool(ImageDetailView.delete_image)(img)
         return Response(None, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def delete_image(img):
+        img.delete()
+        img.delete_image_file()
+        invalidate_album(img.album)
+
+
+class ImageSearchView(AsyncAPIView):
+    """
+    API view to search images across all the albums of the user.
+    """
+    permission_classes = (IsAuthenticated, )
+
+    @staticmethod
+    def get(request):
+        """
+        Search images of all the user's albums page by page. Images are
+        filtered by query params of `ImageFilterSerializer` (name, creation
+        and capture time, orientation and dimensions) and sorted by
+        `ordering` (`created` or `taken`, `-` prefix for descending order).
+        Every page is loaded with one query joined with the albums.
+        `variants=true` includes dimensions and size variants of the images.
+
+        :param request: GET
+        :return: page of images with their album folder names and link to
+        the next page, or 400 Response.
+        """
+
+        filters = ImageFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        qs = filters.filter_queryset(
+            ImageModel.objects.filter(user=request.user)
+        ).select_related('album')
+        paginator = ImageSearchPagination()
+        page = paginator.paginate_queryset(qs, request)
+        serializer = ImageSearchSerializer(
+            page, many=True,
+            context={'variants': filters.validated_data['variants']})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class ImagePreviewView(AsyncAPIView):
+    """
+    API view to retrieving resized previews of specific images.
+    """
+    permission_classes = (IsAuthenticated, )
+
+    @staticmethod
+    def get(request, album_path, img_path):
+        """
+        Retrieve preview of specific image. Preview is fit into
+        `x_size` x `y_size` box keeping the aspect ratio. Zero size means
+        that dimension is not limited. Previews are cached on disk. Preview
+        is encoded to the smallest derivative format the client accepts
+        (`Accept` header), if any is enabled.
+
+        :param request: GET with `x_size` and `y_size` query params.
+        :param album_path: Albums' path.
+        :param img_path: Images' path.
+        :return: Preview file, 400, 404 or 415 Response.
+        """
+
+        serializer = ImagePreviewSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        img = get_image(request.user, album_path, img_path)
+        formats = get_accepted_formats(request)
+        try:
+            preview = thumbnail_cache.open(
+                img, serializer.validated_data['x_size'],
+                serializer.validated_data['y_size'],
+                formats[0] if formats else None)
+        except (OSError, PILImage.DecompressionBombError):
+            # `UnidentifiedImageError` is `OSError` too
+            return Response({'detail': 'Image can\'t be decoded.'},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        response = FileResponse(preview)
+        if get_enabled_formats():
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class ImageSimilarView(AsyncAPIView):
+    """
+    API view to find near-duplicates of specific images.
+    """
+    permission_classes = (IsAuthenticated, )
+
+    @staticmethod
+    def get(request, album_path, img_path):
+        """
+        Retrieve images of the user which look like the specific image, i.e.
+        their perceptual hashes differ at most in `distance` bits. Candidates
+        are selected via indexed chunks of the hash (multi-index hashing),
+        so the whole collection is never scanned.
+
+        :param request: GET with `distance`, `scope` (`album` or `all`) and
+        `variants` query params.
+        :param album_path: Albums' path.
+        :param img_path: Images' path.
+        :return: Images ordered by the distance, 400, 404 or 409 Response.
+        """
+
+        serializer = ImageSimilarSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+        distance = serializer.validated_data['distance']
+
+        img = get_image(request.user, album_path, img_path)
+        if img.phash is None:
+            return Response(
+                {'detail': 'Perceptual hash of the image is not computed yet.'},
+                status=status.HTTP_409_CONFLICT)
+
+        phash = to_unsigned(img.phash)
+        # every branch is scoped by the user, so it is looked up by its own
+        # `(user, phash_i)` index and other users' images are never read
+        lookup = reduce(or_, (
+            Q(user=request.user, **{f'phash_{i}__in': values})
+            for i, values in enumerate(candidate_chunks(phash, distance))
+        ))
+        qs = ImageModel.objects.select_related('album').filter(
+            lookup).exclude(pk=img.pk)
+        if serializer.validated_data['scope'] == 'album':
+            qs = qs.filter(album=img.album)
+
+        similar = []
+        for candidate in qs:
+            candidate_distance = hamming_distance(
+                phash, to_unsigned(candidate.phash))
+            if candidate_distance <= distance:
+                similar.append((candidate_distance, candidate.pk, candidate))
+        similar.sort(key=lambda item: item[:2])
+
+        data = ImageSerializer(
+            [item[2] for item in similar], many=True,
+            context={'variants': serializer.validated_data['variants']}
+        ).data
+        for item, (candidate_distance, _, _) in zip(data, similar):
+            item['distance'] = candidate_distance
+        return Response(data, status=status.HTTP_200_OK)
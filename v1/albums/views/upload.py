@@ -0,0 +1,209 @@
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.db import transaction
+from django.utils.translation import gettext as _
+from rest_framework import status
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from config.executor import sync_to_pool
+from v1.albums.views.album import (
+    AlbumDetailView, INVALID_IMAGE_MESSAGE, get_album, uploaded_image_data
+)
+from v1.albums.views.base import AsyncAPIView
+from v1.images.models.image import Image
+from v1.images.models.upload_session import UploadSession
+from v1.images.serializers.upload_session import UploadSessionSerializer
+from v1.images.staging import (
+    ChunkConflict, IncompleteChunk, assemble_chunks, delete_session_files,
+    write_chunk
+)
+from v1.images.upload_handlers import (
+    StoredUploadedFile, open_album_file, prepare_uploaded_file
+)
+
+storage = get_storage_class()()
+
+# header with the offset of the chunk in the file
+OFFSET_HEADER = 'HTTP_UPLOAD_OFFSET'
+
+
+def get_upload_session(user, path, upload_id):
+    album = get_album(user, path)
+    return get_object_or_404(album.upload_sessions.select_related('album'),
+                             pk=upload_id, user=user)
+
+
+class UploadSessionListView(AsyncAPIView):
+    """
+    API view to start resumable chunked upload of an image.
+    """
+    permission_classes = (IsAuthenticated, )
+
+    @staticmethod
+    async def post(request, path):
+        """
+        Start new upload of the file (`filename`, `size` in bytes). Chunks
+        are sent by PUT to the upload session.
+        :param request: POST
+        :param path: Path to the album in storage.
+        :return: Created upload session.
+        """
+        album = await sync_to_pool(get_album)(request.user, path)
+        serializer = UploadSessionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+        await sync_to_pool(serializer.save)(user=request.user, album=album)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(AsyncAPIView):
+    """
+    API view to send chunks of the upload, to finalize and to abort it.
+    """
+    permission_classes = (IsAuthenticated, )
+
+    @staticmethod
+    async def get(request, path, upload_id):
+        """
+        Retrieve upload session. Interrupted upload is resumed from its
+        `offset`.
+        :param request: GET
+        :param path: Path to the album in storage.
+        :param upload_id: ID of the upload session.
+        :return: Upload session.
+        """
+        session = await sync_to_pool(get_upload_session)(request.user, path,
+                                                         upload_id)
+        return Response(UploadSessionSerializer(session).data,
+                        status=status.HTTP_200_OK)
+
+    @staticmethod
+    async def put(request, path, upload_id):
+        """
+        Send next chunk of the file in the raw request body. Offset of the
+        chunk is in the `Upload-Offset` header, it must be equal to the
+        offset of the session.
+        :param request: PUT
+        :param path: Path to the album in storage.
+        :param upload_id: ID of the upload session.
+        :return: Upload session with the new offset, 409 with the current
+        offset if the chunk doesn't follow the received data.
+        """
+        session = await sync_to_pool(get_upload_session)(request.user, path,
+                                                         upload_id)
+        try:
+            offset = int(request.META[OFFSET_HEADER])
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': _('`Upload-Offset` and `Content-Length` headers '
+                             'are required.')},
+                status=status.HTTP_400_BAD_REQUEST)
+        if length <= 0 or length > settings.UPLOAD_CHUNK_MAX_SIZE:
+            return Response(
+                {'detail': _('Chunk must have 1 to {} bytes.').format(
+                    settings.UPLOAD_CHUNK_MAX_SIZE)},
+                status=status.HTTP_400_BAD_REQUEST)
+        if offset + length > session.size:
+            return Response(
+                {'detail': _('Chunk exceeds size of the file.')},
+                status=status.HTTP_400_BAD_REQUEST)
+        if offset != session.offset:
+            return Response({'offset': session.offset},
+                            status=status.HTTP_409_CONFLICT)
+
+        try:
+            await sync_to_pool(write_chunk)(session, request.stream, offset,
+                                            length)
+        except ChunkConflict as e:
+            return Response({'offset': e.offset},
+                            status=status.HTTP_409_CONFLICT)
+        except IncompleteChunk:
+            return Response({'detail': _('Chunk is incomplete.')},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(UploadSessionSerializer(session).data,
+                        status=status.HTTP_200_OK)
+
+    @staticmethod
+    async def post(request, path, upload_id):
+        """
+        Finalize complete upload. Chunks are concatenated to the album
+        directory and the image is created as if it was uploaded at once.
+        :param request: POST
+        :param path: Path to the album in storage.
+        :param upload_id: ID of the upload session.
+        :return: Info about loaded image and info with errors, 409 if the
+        upload isn't complete.
+        """
+        session = await sync_to_pool(get_upload_session)(request.user, path,
+                                                         upload_id)
+        if not session.complete:
+            return Response({'offset': session.offset},
+                            status=status.HTTP_409_CONFLICT)
+        images, errors = await sync_to_pool(
+            UploadSessionDetailView.finalize)(request.user, session)
+        return Response({
+            'uploaded': [uploaded_image_data(img) for img in images],
+            'errors': errors,
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    async def delete(request, path, upload_id):
+        """
+        Abort upload and delete its chunks.
+        :param request: DELETE
+        :param path: Path to the album in storage.
+        :param upload_id: ID of the upload session.
+        :return: 204 status code.
+        """
+        session = await sync_to_pool(get_upload_session)(request.user, path,
+                                                         upload_id)
+        await sync_to_pool(UploadSessionDetailView.delete_session)(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @staticmethod
+    def finalize(user, session):
+        """
+        Assembles the file in the album directory and feeds it to the
+        pipeline of the multipart upload (`prepare_uploaded_file`,
+        `AlbumDetailView.create_images`).
+
+        :return: Tuple of created images and errors.
+        """
+        album = session.album
+        with transaction.atomic():
+            # concurrent finalize of the same session waits and gets 404
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), pk=session.pk)
+            filename = Image.generate_path(session.filename, user)[0]
+            stored_name, destination = open_album_file(album, filename)
+            try:
+                with destination:
+                    digest = assemble_chunks(session, destination)
+            except Exception:
+                storage.delete(stored_name)
+                raise
+            UploadSessionDetailView.delete_session(session)
+
+        file = StoredUploadedFile(
+            stored_name=stored_name,
+            digest=digest,
+            name=session.filename,
+            content_type=None,
+            size=session.size,
+            charset=None,
+        )
+        upload = prepare_uploaded_file(album, user, file)
+        if upload.stored_name is None:
+            return [], [{'name': session.filename,
+                         'error': {'file': [INVALID_IMAGE_MESSAGE]}}]
+        return AlbumDetailView.create_images(user, album, [upload]), []
+
+    @staticmethod
+    def delete_session(session):
+        pk = session.pk
+        session.delete()
+        delete_session_files(pk)
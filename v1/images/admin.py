@@ -1,5 +1,9 @@
 from django.contrib import admin
 
+from v1.images.models.blob import Blob
 from v1.images.models.image import Image
+from v1.images.models.upload_session import UploadSession
 
 admin.site.register(Image)
+admin.site.register(Blob)
+admin.site.register(UploadSession)
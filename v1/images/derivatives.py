@@ -0,0 +1,68 @@
+import mimetypes
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+
+from v1.images.transcoding import DERIVATIVE_FORMATS, is_supported
+
+storage = get_storage_class()()
+
+# mimetypes of older Pythons don't know AVIF
+mimetypes.add_type('image/avif', '.avif')
+
+
+def get_enabled_formats():
+    """
+    Returns formats of `IMAGE_DERIVATIVE_FORMATS` which Pillow can encode,
+    in the order of preference (the usually smaller ones first).
+    """
+    enabled = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', [])
+    return [image_format for image_format in DERIVATIVE_FORMATS
+            if image_format in enabled and is_supported(image_format)]
+
+
+def get_derivative_name(name, image_format):
+    """
+    Returns name of the derivative of the file. Derivative is stored next to
+    its source with the extension appended (e.g. blobs/ab/cd/abcd.png.webp),
+    so it can be found without the database.
+    """
+    return name + DERIVATIVE_FORMATS[image_format][0]
+
+
+def delete_derivatives(name):
+    """
+    Deletes all the derivatives of the file (relative to `MEDIA_ROOT`).
+    """
+    for image_format in DERIVATIVE_FORMATS:
+        storage.delete(get_derivative_name(name, image_format))
+
+
+def parse_accept(header):
+    """
+    :return: Set of media types accepted by the `Accept` header (q > 0).
+    """
+    accepted = set()
+    for item in header.split(','):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            accepted.add(media_type.lower())
+    return accepted
+
+
+def get_accepted_formats(request):
+    """
+    Returns enabled derivative formats which the client explicitly accepts
+    (`image/*` doesn't count, old browsers send it too), preferred first.
+    """
+    accepted = parse_accept(request.META.get('HTTP_ACCEPT', ''))
+    return [image_format for image_format in get_enabled_formats()
+            if DERIVATIVE_FORMATS[image_format][1] in accepted]
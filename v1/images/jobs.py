@@ -0,0 +1,174 @@
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from v1.albums.cache import invalidate_album
+from v1.albums.models.album import Album
+from v1.images.derivatives import get_enabled_formats
+from v1.images.metadata import extract_metadata as extract_file_metadata
+from v1.images.models.image import Image
+from v1.images.pools import get_process_pool
+from v1.images.thumbnails import thumbnail_cache
+from v1.images.transcoding import transcode_file
+
+storage = get_storage_class()()
+
+EXIF_DATETIME_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+
+def parse_exif_datetime(value):
+    """
+    Parses EXIF datetime (it has no time zone, the current one is used).
+    """
+    if not value:
+        return None
+    try:
+        taken_at = datetime.strptime(value[:19], EXIF_DATETIME_FORMAT)
+    except ValueError:
+        return None
+    return timezone.make_aware(taken_at)
+
+
+def map_files(paths):
+    """
+    Extracts metadata of the files in the process pool (or in this process
+    if `METADATA_WORKERS` is 0).
+    """
+    workers = getattr(settings, 'METADATA_WORKERS', 2)
+    if workers <= 0:
+        return list(map(extract_file_metadata, paths))
+    pool = get_process_pool('metadata', workers)
+    return list(pool.map(extract_file_metadata, paths))
+
+
+def extract_metadata(job):
+    """
+    Job handler which fills metadata columns of the images from `paths` list
+    of the `album` of the payload. Every file is read once, even if several
+    images share its blob. Images are processed in batches of
+    `METADATA_BATCH_SIZE`, the progress is stored in `job.processed`.
+    """
+    batch_size = getattr(settings, 'METADATA_BATCH_SIZE', 200)
+    album = Album.objects.filter(pk=job.payload['album']).first()
+    if album is None:
+        # album was deleted in the meantime
+        return
+
+    paths = job.payload['paths']
+    for start in range(0, len(paths), batch_size):
+        images = list(Image.objects.filter(
+            album=album, path__in=paths[start:start + batch_size]))
+        files = sorted({img.file.name for img in images})
+        results = dict(zip(files, map_files(
+            [storage.path(name) for name in files])))
+
+        now = timezone.now()
+        for img in images:
+            metadata = results[img.file.name] or {}
+            img.taken_at = parse_exif_datetime(metadata.get('taken_at'))
+            img.orientation = metadata.get('orientation')
+            img.camera = metadata.get('camera', '')[:255]
+            img.dominant_color = metadata.get('dominant_color')
+            img.metadata_extracted = now
+        Image.objects.bulk_update(images, Image.METADATA_FIELDS)
+
+        job.processed += len(images)
+        job.save(update_fields=['processed', 'modified'])
+
+    invalidate_album(album)
+
+
+def transcode_files(paths, formats):
+    """
+    Transcodes the files in the process pool (or in this process if
+    `TRANSCODE_WORKERS` is 0).
+    """
+    workers = getattr(settings, 'TRANSCODE_WORKERS', 2)
+    quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+    arguments = ([formats] * len(paths), [quality] * len(paths))
+    if workers <= 0:
+        return list(map(transcode_file, paths, *arguments))
+    pool = get_process_pool('transcode', workers)
+    return list(pool.map(transcode_file, paths, *arguments))
+
+
+def transcode_images(job):
+    """
+    Job handler which stores derivatives (`IMAGE_DERIVATIVE_FORMATS`) of the
+    images from `paths` list of the `album` of the payload. Every file is
+    transcoded once, even if several images share its blob. Images are
+    processed in batches of `TRANSCODE_BATCH_SIZE`, the progress is stored
+    in `job.processed`.
+    """
+    formats = get_enabled_formats()
+    batch_size = getattr(settings, 'TRANSCODE_BATCH_SIZE', 50)
+    album = Album.objects.filter(pk=job.payload['album']).first()
+    if album is None or not formats:
+        return
+
+    paths = job.payload['paths']
+    for start in range(0, len(paths), batch_size):
+        images = list(Image.objects.filter(
+            album=album, path__in=paths[start:start + batch_size]))
+        files = sorted({img.file.name for img in images})
+        transcode_files([storage.path(name) for name in files], formats)
+
+        job.processed += len(images)
+        job.save(update_fields=['processed', 'modified'])
+
+
+def render_variant_sizes(img, widths):
+    """
+    Renders the size variants of the image next to its thumbnails, so the
+    previews of `srcset` are served right away. Unlike the cached
+    thumbnails, they are never evicted, so the recorded sizes stay valid.
+
+    :return: List of `[width, height, bytes]` of the variants narrower than
+        the image.
+    """
+    sizes = []
+    for width in widths:
+        if img.width is None or width >= img.width:
+            break
+        path = thumbnail_cache.render_variant(img, width)
+        with PILImage.open(path) as preview:
+            sizes.append([preview.width, preview.height,
+                          os.path.getsize(path)])
+    return sizes
+
+
+def render_variants(job):
+    """
+    Job handler which renders size variants (`IMAGE_VARIANT_WIDTHS`) of the
+    images from `paths` list of the `album` of the payload and stores their
+    dimensions and sizes in `Image.variants`, so serializers need no file
+    access. Images are processed in batches of `VARIANTS_BATCH_SIZE`, the
+    progress is stored in `job.processed`.
+    """
+    widths = getattr(settings, 'IMAGE_VARIANT_WIDTHS', [])
+    batch_size = getattr(settings, 'VARIANTS_BATCH_SIZE', 50)
+    album = Album.objects.filter(pk=job.payload['album']).first()
+    if album is None:
+        return
+
+    paths = job.payload['paths']
+    for start in range(0, len(paths), batch_size):
+        images = list(album.image_set.filter(
+            path__in=paths[start:start + batch_size]))
+        for img in images:
+            try:
+                sizes = render_variant_sizes(img, widths)
+            except (OSError, ValueError):
+                # file is broken or was deleted in the meantime
+                continue
+            img.variants = {**(img.variants or {}), 'sizes': sizes}
+        Image.objects.bulk_update(images, ['variants'])
+
+        job.processed += len(images)
+        job.save(update_fields=['processed', 'modified'])
+
+    invalidate_album(album)
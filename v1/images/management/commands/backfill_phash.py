@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import get_storage_class
+from django.core.management.base import BaseCommand
+
+from v1.images.models.image import Image
+from v1.images.phash import dhash
+
+storage = get_storage_class()()
+
+
+def compute_phash(path):
+    """
+    Computes perceptual hash of the file in the worker process.
+    """
+    try:
+        return dhash(path)
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Computes perceptual hashes of the images which have none.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of images hashed and updated at once.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of worker processes.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        processed = failed = 0
+        last_pk = 0
+
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = list(Image.objects.filter(
+                    phash__isnull=True, pk__gt=last_pk
+                ).order_by('pk')[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+
+                # deduplicated images share the file, so hash it once
+                names = sorted({img.file.name for img in batch})
+                hashes = dict(zip(names, pool.map(
+                    compute_phash, [storage.path(name) for name in names]
+                )))
+
+                updated = []
+                for img in batch:
+                    value = hashes[img.file.name]
+                    if value is None:
+                        failed += 1
+                        continue
+                    img.set_phash(value)
+                    updated.append(img)
+                Image.objects.bulk_update(updated, Image.PHASH_FIELDS)
+                processed += len(updated)
+                self.stdout.write(f'Hashed {processed} image(s).')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {processed} hashed, {failed} failed.'))
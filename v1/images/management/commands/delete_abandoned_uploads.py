@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from v1.albums.imports import delete_orphaned_archives
+from v1.images.staging import delete_abandoned_sessions
+
+
+class Command(BaseCommand):
+    help = ('Deletes chunked uploads which received no chunk for a while '
+            'and old import archives without a queued job.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=None,
+            help='Seconds since the last chunk, UPLOAD_SESSION_TTL by '
+                 'default.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = delete_abandoned_sessions(options['max_age'])
+        archives = delete_orphaned_archives(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} abandoned upload(s) and {archives} orphaned '
+            f'import archive(s).'))
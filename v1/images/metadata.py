@@ -0,0 +1,65 @@
+from PIL import Image as PILImage
+
+# EXIF tags
+EXIF_IFD = 0x8769
+DATE_TIME_ORIGINAL = 0x9003
+DATE_TIME = 0x0132
+ORIENTATION = 0x0112
+MAKE = 0x010F
+MODEL = 0x0110
+
+# image is downscaled to this size to find its dominant colour
+COLOR_SAMPLE_SIZE = (64, 64)
+PALETTE_COLORS = 8
+
+
+def _clean(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'ignore')
+    if value is None:
+        return ''
+    return str(value).strip('\x00 ')
+
+
+def dominant_color(img):
+    """
+    Returns `[r, g, b]` of the most frequent colour of the reduced palette.
+    """
+    sample = img.convert('RGB')
+    sample.thumbnail(COLOR_SAMPLE_SIZE)
+    quantized = sample.quantize(colors=PALETTE_COLORS)
+    count, index = max(quantized.getcolors())
+    palette = quantized.getpalette()
+    return palette[index * 3:index * 3 + 3]
+
+
+def extract_metadata(path):
+    """
+    Extracts metadata of the image file. EXIF is read from the header, the
+    image is decoded only (in reduced size if the format allows it) to find
+    the dominant colour. It doesn't use Django, so it can run in the worker
+    processes.
+
+    :return: Dict with `taken_at` (EXIF string), `orientation`, `camera` and
+    `dominant_color`, or `None` if the file can't be read.
+    """
+    try:
+        with PILImage.open(path) as img:
+            exif = img.getexif()
+            taken_at = (exif.get_ifd(EXIF_IFD).get(DATE_TIME_ORIGINAL)
+                        or exif.get(DATE_TIME))
+            camera = ' '.join(filter(None, (_clean(exif.get(MAKE)),
+                                            _clean(exif.get(MODEL)))))
+            orientation = exif.get(ORIENTATION)
+
+            img.draft('RGB', COLOR_SAMPLE_SIZE)
+            color = dominant_color(img)
+    except Exception:
+        return None
+
+    return {
+        'taken_at': _clean(taken_at) or None,
+        'orientation': orientation if isinstance(orientation, int) else None,
+        'camera': camera,
+        'dominant_color': color,
+    }
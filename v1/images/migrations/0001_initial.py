@@ -0,0 +1,39 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import v1.images.models.image
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('albums', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Image',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.ImageField(height_field='height', help_text='Representation of image in filesystem.', max_length=1024, upload_to=v1.images.models.image.image_directory_path, verbose_name='Image file', width_field='width')),
+                ('height', models.PositiveSmallIntegerField(blank=True, help_text='Image height. It will be populated automatically.', null=True, verbose_name='Image height')),
+                ('width', models.PositiveSmallIntegerField(blank=True, help_text='Image width. It will be populated automatically.', null=True, verbose_name='Image width')),
+                ('path', models.CharField(blank=True, help_text='Name of the image file (e.g. elephant.jpg).', max_length=1024, null=True, verbose_name='Path')),
+                ('name', models.CharField(blank=True, help_text='Name of the image. It is generated from filename.', max_length=1024, null=True, verbose_name='Name')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='Timestamp of creation.', verbose_name='Created')),
+                ('modified', models.DateTimeField(auto_now=True, help_text='Timestamp of last modification.', verbose_name='Modified')),
+                ('album', models.ForeignKey(help_text='Image belongs to album.', on_delete=django.db.models.deletion.CASCADE, related_name='image_set', to='albums.album')),
+            ],
+            options={
+                'verbose_name': 'Image',
+                'verbose_name_plural': 'Images',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['album', 'created', 'id'], name='images_imag_album_i_7fbb69_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['album', 'path'], name='images_imag_album_i_a2d29a_idx'),
+        ),
+    ]
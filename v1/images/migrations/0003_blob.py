@@ -0,0 +1,34 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0002_path_lookup_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='SHA-256 of the content.', max_length=64, unique=True, verbose_name='Digest')),
+                ('file', models.FileField(help_text='Representation of the content in filesystem.', max_length=1024, upload_to='', verbose_name='File')),
+                ('size', models.PositiveBigIntegerField(help_text='Size of the content in bytes.', verbose_name='Size')),
+                ('references', models.PositiveIntegerField(default=0, help_text='Number of images which use the blob.', verbose_name='References')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='Timestamp of creation.', verbose_name='Created')),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='blob',
+            field=models.ForeignKey(blank=True, help_text='Deduplicated content of the image. Images uploaded before deduplication have none.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='images', to='images.blob'),
+        ),
+    ]
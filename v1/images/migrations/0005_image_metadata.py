@@ -0,0 +1,38 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0004_phash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='camera',
+            field=models.CharField(blank=True, default='', help_text='Camera make and model from EXIF. It is extracted in background.', max_length=255, verbose_name='Camera'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='dominant_color',
+            field=models.JSONField(blank=True, help_text='Dominant colour of the image as `[r, g, b]`. It is extracted in background.', null=True, verbose_name='Dominant colour'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='metadata_extracted',
+            field=models.DateTimeField(blank=True, help_text='Timestamp of the metadata extraction, empty while it is pending.', null=True, verbose_name='Metadata extracted'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='orientation',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='EXIF orientation (1-8). It is extracted in background.', null=True, verbose_name='Orientation'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='taken_at',
+            field=models.DateTimeField(blank=True, help_text='Capture time from EXIF. It is extracted in background.', null=True, verbose_name='Taken at'),
+        ),
+    ]
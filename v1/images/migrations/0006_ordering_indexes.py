@@ -0,0 +1,55 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Trigram index of the upper-cased name serves `icontains` and
+    `istartswith` lookups on PostgreSQL. Other databases use the B-tree
+    indexes only.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS images_image_name_trgm ON images_image '
+        'USING gin (UPPER("name"::text) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS images_image_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0005_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['album', 'modified', 'id'], name='images_imag_album_i_a433da_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['album', 'name', 'id'], name='images_imag_album_i_8b713e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['album', 'width', 'id'], name='images_imag_album_i_b4992b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['album', 'height', 'id'], name='images_imag_album_i_964a80_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['album', 'taken_at', 'id'], name='images_imag_album_i_34e6e9_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_album_user(apps, schema_editor):
+    Album = apps.get_model('albums', 'Album')
+    Image = apps.get_model('images', 'Image')
+    Image.objects.filter(user__isnull=True).update(user=models.Subquery(
+        Album.objects.filter(
+            pk=models.OuterRef('album')).values('user')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('images', '0006_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='user',
+            field=models.ForeignKey(blank=True, help_text='Owner of the album, copied for the search across albums. It is set from the album automatically.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='images', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(copy_album_user, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['user', 'created', 'id'], name='images_imag_user_id_f60c02_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['user', 'taken_at', 'id'], name='images_imag_user_id_f24152_idx'),
+        ),
+    ]
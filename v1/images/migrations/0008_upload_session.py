@@ -0,0 +1,39 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('albums', '0003_ordering_indexes'),
+        ('images', '0007_image_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Random ID, it is a part of the upload URL.', primary_key=True, serialize=False)),
+                ('filename', models.CharField(help_text='Original name of the uploaded file.', max_length=255, verbose_name='File name')),
+                ('size', models.PositiveBigIntegerField(help_text='Size of the whole file in bytes.', verbose_name='Size')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Number of bytes received so far.', verbose_name='Offset')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='Timestamp of creation.', verbose_name='Created')),
+                ('modified', models.DateTimeField(auto_now=True, help_text='Timestamp of the last received chunk.', verbose_name='Modified')),
+                ('album', models.ForeignKey(help_text='Album the image is uploaded to.', on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='albums.album')),
+                ('user', models.ForeignKey(help_text='User who uploads the image.', on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload session',
+                'verbose_name_plural': 'Upload sessions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['modified'], name='images_uplo_modifie_37fb8d_idx'),
+        ),
+    ]
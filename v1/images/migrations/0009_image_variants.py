@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0008_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='variants',
+            field=models.JSONField(blank=True, help_text='Size of the file in `bytes` and pre-generated size variants as `sizes` list of `[width, height, bytes]`. It is filled on upload, variants in background.', null=True, verbose_name='Variants'),
+        ),
+    ]
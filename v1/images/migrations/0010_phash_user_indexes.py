@@ -0,0 +1,45 @@
+# Generated by Django 3.2.8 on 2026-10-18 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='image',
+            name='images_imag_phash_0_079141_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='image',
+            name='images_imag_phash_1_3c5d7a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='image',
+            name='images_imag_phash_2_1aba2b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='image',
+            name='images_imag_phash_3_1192e3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['user', 'phash_0'], name='images_imag_user_id_6d7faa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['user', 'phash_1'], name='images_imag_user_id_355ceb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['user', 'phash_2'], name='images_imag_user_id_08280a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['user', 'phash_3'], name='images_imag_user_id_f80cfe_idx'),
+        ),
+    ]
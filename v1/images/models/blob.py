@@ -0,0 +1,173 @@
+import os
+from collections import Counter, defaultdict
+
+from django.core.files.storage import get_storage_class
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.translation import gettext as _
+
+from v1.images.derivatives import delete_derivatives
+
+storage = get_storage_class()()
+
+
+class Blob(models.Model):
+    """
+    Blob is unique content of uploaded image files. It is stored only once
+    (named by the SHA-256 of the content) and shared by all the images with
+    the same content. `references` counts the images which use the blob.
+    """
+    digest = models.CharField(
+        _('Digest'),
+        max_length=64,
+        unique=True,
+        help_text=_('SHA-256 of the content.'),
+    )
+
+    file = models.FileField(
+        _('File'),
+        max_length=1024,
+        help_text=_('Representation of the content in filesystem.'),
+    )
+
+    size = models.PositiveBigIntegerField(
+        _('Size'),
+        help_text=_('Size of the content in bytes.'),
+    )
+
+    references = models.PositiveIntegerField(
+        _('References'),
+        default=0,
+        help_text=_('Number of images which use the blob.'),
+    )
+
+    created = models.DateTimeField(
+        _('Created'),
+        auto_now_add=True,
+        help_text=_('Timestamp of creation.'),
+    )
+
+    class Meta:
+        verbose_name = _('Blob')
+        verbose_name_plural = _('Blobs')
+
+    def __str__(self):
+        return self.digest
+
+    @staticmethod
+    def get_blob_name(digest, extension):
+        """
+        Returns name of the blob file relative to `MEDIA_ROOT`
+        (e.g. blobs/ab/cd/abcd...ef.jpg).
+        """
+        return '{}/{}/{}/{}{}'.format('blobs', digest[:2], digest[2:4],
+                                      digest, extension.lower())
+
+    @staticmethod
+    def acquire(uploads):
+        """
+        Takes one reference of the blob for every upload. Uploads are tuples
+        of stored file name, digest and size. Files with new content are
+        moved to the blob storage, duplicates are deleted. It must be called
+        in a transaction.
+
+        Blob files are moved or deleted only while their rows are locked, so
+        concurrent `acquire` and `release` of the same content never touch
+        the file at once. If the transaction fails, `revert` must be called
+        before it is rolled back (while the rows are still locked).
+
+        :return: Dict of blobs by digest.
+        """
+        counts = Counter(digest for _, digest, _ in uploads)
+        blobs = {
+            blob.digest: blob
+            for blob in Blob.objects.select_for_update().filter(
+                digest__in=counts)
+        }
+
+        missing = {}
+        for stored_name, digest, size in uploads:
+            if digest not in blobs and digest not in missing:
+                missing[digest] = Blob(
+                    digest=digest, size=size,
+                    file=Blob.get_blob_name(
+                        digest, os.path.splitext(stored_name)[1]))
+        if missing:
+            # blob can be created by concurrent upload in the meantime, its
+            # row is locked only when that transaction finishes
+            Blob.objects.bulk_create(missing.values(), ignore_conflicts=True)
+            blobs.update({
+                blob.digest: blob
+                for blob in Blob.objects.select_for_update().filter(
+                    digest__in=missing)
+            })
+
+        try:
+            for stored_name, digest, _ in uploads:
+                blob = blobs[digest]
+                if (digest not in missing or hasattr(blob, 'moved_from')
+                        or storage.exists(blob.file.name)):
+                    storage.delete(stored_name)
+                    continue
+                absolute_path = storage.path(blob.file.name)
+                os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+                # same filesystem, so it is only a rename
+                os.replace(storage.path(stored_name), absolute_path)
+                blob.moved_from = stored_name
+        except Exception:
+            Blob.revert(blobs)
+            raise
+
+        # one query per distinct number of references
+        by_count = defaultdict(list)
+        for digest, count in counts.items():
+            by_count[count].append(blobs[digest].pk)
+            blobs[digest].references += count
+        for count, pks in by_count.items():
+            Blob.objects.filter(pk__in=pks).update(
+                references=F('references') + count)
+        return blobs
+
+    @staticmethod
+    def revert(blobs):
+        """
+        Moves files of the blobs created by `acquire` back to their stored
+        names, so they are deleted with the other uploaded files and no blob
+        file is left without its row after the rollback.
+        """
+        for blob in blobs.values():
+            moved_from = getattr(blob, 'moved_from', None)
+            if moved_from is not None:
+                os.replace(storage.path(blob.file.name),
+                           storage.path(moved_from))
+                del blob.moved_from
+
+    @staticmethod
+    def release(blob_ids):
+        """
+        Drops one reference of the blob for every item of `blob_ids`. Blobs
+        without references are deleted with their files, so images using
+        them must be deleted before. Files are deleted before the rows are
+        unlocked, so concurrent `acquire` of the same content waits and then
+        stores its file again.
+        """
+        counts = Counter(blob_ids)
+        if not counts:
+            return
+
+        by_count = defaultdict(list)
+        for pk, count in counts.items():
+            by_count[count].append(pk)
+
+        with transaction.atomic():
+            for count, pks in by_count.items():
+                Blob.objects.filter(pk__in=pks).update(
+                    references=Greatest(F('references') - count, 0))
+            orphans = list(Blob.objects.select_for_update().filter(
+                pk__in=counts, references=0))
+            Blob.objects.filter(pk__in=[blob.pk for blob in orphans]).delete()
+
+            for blob in orphans:
+                storage.delete(blob.file.name)
+                delete_derivatives(blob.file.name)
@@ -10,7 +10,12 @@ from django.utils.encoding import escape_uri_path
 from PIL import Image as PILImage
 import time
 
+from v1.accounts.models.user import User
 from v1.albums.models.album import Album
+from v1.images.derivatives import delete_derivatives
+from v1.images.models.blob import Blob
+from v1.images.phash import CHUNKS, split_hash, to_signed
+from v1.images.thumbnails import thumbnail_cache
 
 logger = logging.getLogger(__name__)
 storage = get_storage_class()()
@@ -33,6 +38,16 @@ class Image(models.Model):
         on_delete=models.CASCADE,
     )
 
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        related_name='images',
+        on_delete=models.CASCADE,
+        help_text=_('Owner of the album, copied for the search across '
+                    'albums. It is set from the album automatically.'),
+    )
+
     file = models.ImageField(
         _('Image file'),
         max_length=1024,
@@ -42,6 +57,16 @@ class Image(models.Model):
         help_text=_('Representation of image in filesystem.')
     )
 
+    blob = models.ForeignKey(
+        Blob,
+        null=True,
+        blank=True,
+        related_name='images',
+        on_delete=models.PROTECT,
+        help_text=_('Deduplicated content of the image. Images uploaded '
+                    'before deduplication have none.'),
+    )
+
     height = models.PositiveSmallIntegerField(
         _('Image height'),
         null=True,
@@ -56,6 +81,67 @@ class Image(models.Model):
         help_text=_('Image width. It will be populated automatically.')
     )
 
+    phash = models.BigIntegerField(
+        _('Perceptual hash'),
+        null=True,
+        blank=True,
+        help_text=_('64 bits difference hash (dHash) of the image, signed.'),
+    )
+
+    # 16 bits chunks of the perceptual hash for the multi-index lookup
+    phash_0 = models.PositiveIntegerField(null=True, blank=True)
+    phash_1 = models.PositiveIntegerField(null=True, blank=True)
+    phash_2 = models.PositiveIntegerField(null=True, blank=True)
+    phash_3 = models.PositiveIntegerField(null=True, blank=True)
+
+    taken_at = models.DateTimeField(
+        _('Taken at'),
+        null=True,
+        blank=True,
+        help_text=_('Capture time from EXIF. It is extracted in background.'),
+    )
+
+    orientation = models.PositiveSmallIntegerField(
+        _('Orientation'),
+        null=True,
+        blank=True,
+        help_text=_('EXIF orientation (1-8). It is extracted in background.'),
+    )
+
+    camera = models.CharField(
+        _('Camera'),
+        max_length=255,
+        blank=True,
+        default='',
+        help_text=_('Camera make and model from EXIF. It is extracted in '
+                    'background.'),
+    )
+
+    dominant_color = models.JSONField(
+        _('Dominant colour'),
+        null=True,
+        blank=True,
+        help_text=_('Dominant colour of the image as `[r, g, b]`. It is '
+                    'extracted in background.'),
+    )
+
+    metadata_extracted = models.DateTimeField(
+        _('Metadata extracted'),
+        null=True,
+        blank=True,
+        help_text=_('Timestamp of the metadata extraction, empty while it is '
+                    'pending.'),
+    )
+
+    variants = models.JSONField(
+        _('Variants'),
+        null=True,
+        blank=True,
+        help_text=_('Size of the file in `bytes` and pre-generated size '
+                    'variants as `sizes` list of `[width, height, bytes]`. '
+                    'It is filled on upload, variants in background.'),
+    )
+
     path = models.CharField(
         _('Path'),
         max_length=1024,
@@ -97,26 +183,69 @@ class Image(models.Model):
     class Meta:
         verbose_name = _('Image')
         verbose_name_plural = _('Images')
+        indexes = [
+            # keyset pagination of the album images by every ordering
+            models.Index(fields=['album', 'created', 'id']),
+            models.Index(fields=['album', 'modified', 'id']),
+            models.Index(fields=['album', 'name', 'id']),
+            models.Index(fields=['album', 'width', 'id']),
+            models.Index(fields=['album', 'height', 'id']),
+            models.Index(fields=['album', 'taken_at', 'id']),
+            # search across the albums of the user
+            models.Index(fields=['user', 'created', 'id']),
+            models.Index(fields=['user', 'taken_at', 'id']),
+            # image lookup by its path on every request
+            models.Index(fields=['album', 'path']),
+            # near-duplicates lookup among the images of the user
+            models.Index(fields=['user', 'phash_0']),
+            models.Index(fields=['user', 'phash_1']),
+            models.Index(fields=['user', 'phash_2']),
+            models.Index(fields=['user', 'phash_3']),
+        ]
 
     def __str__(self):
         return self.name or _('This image has no name')
 
+    def save(self, *args, **kwargs):
+        if self.user_id is None and self.album_id is not None:
+            self.user_id = self.album.user_id
+        super().save(*args, **kwargs)
+
     @property
     def fullpath(self):
         """
         Fullpath of the image for access image detail in URL.  It is composed
-        by album path and the image filename.
+        by album path and the image filename. Album must be already loaded
+        (`select_related`, prefetch or related manager), otherwise it costs
+        one query per image.
         """
         return '{}/{}'.format(Album.get_folder_name(self.album.path),
                               self.path)
 
+    METADATA_FIELDS = ['taken_at', 'orientation', 'camera', 'dominant_color',
+                       'metadata_extracted']
+
+    PHASH_FIELDS = ['phash'] + [f'phash_{i}' for i in range(CHUNKS)]
+
+    def set_phash(self, value):
+        """
+        Sets perceptual hash (unsigned integer or `None`) and its chunks.
+        """
+        if value is None:
+            for field in Image.PHASH_FIELDS:
+                setattr(self, field, None)
+            return
+        self.phash = to_signed(value)
+        for i, chunk in enumerate(split_hash(value)):
+            setattr(self, f'phash_{i}', chunk)
+
     @staticmethod
-    def create_from_file(album, file, user):
+    def generate_path(filename, user):
         """
-        Cretes `Image` instance from the file (Django `File` object). Parses
-        and generates `name` and assigns image to album.
+        Generates `path` and `name` of the image from the uploaded file name.
+        Path is composed from name, user ID, time(ms) and extension.
         """
-        filename, extension = os.path.splitext(file.name)
+        filename, extension = os.path.splitext(filename)
 
         # path composed from name, user ID, time(ms) and extension
         new_filename = '{filename}-{user_id}_{time}{extension}'.format(
@@ -126,18 +255,8 @@ class Image(models.Model):
             time=round(time.time()*1000)
         )
 
-        # change also filename of file object itself
-        file.name = new_filename
-
         nice_image_name = filename.capitalize()
-
-        image = {
-            'album': album.pk,
-            'path': new_filename,
-            'name': nice_image_name,
-            'file': file,
-        }
-        return image
+        return new_filename, nice_image_name
 
     @staticmethod
     def get_image_name(filename, fb_user_id):
@@ -158,9 +277,24 @@ class Image(models.Model):
         """
         return os.path.dirname(self.file.name)
 
+    @staticmethod
+    def delete_image_files(images):
+        """
+        Deletes files of the images with all their thumbnails and
+        derivatives. Blobs are released, so images must be deleted from the
+        database before.
+        """
+        Blob.release([img.blob_id for img in images if img.blob_id])
+        for img in images:
+            if img.blob_id is None:
+                # image stored before deduplication
+                storage.delete(img.file.name)
+                delete_derivatives(img.file.name)
+            thumbnail_cache.delete(img)
+
     def delete_image_file(self):
         """
-        Deletes image file with all its thumbnails.
+        Deletes image file with all its thumbnails and derivatives. Image
+        must be deleted from the database before.
         """
-        # delete image file
-        storage.delete(self.file.name)
\ No newline at end of file
+        Image.delete_image_files([self])
@@ -0,0 +1,79 @@
+import uuid
+
+from django.db import models
+from django.utils.translation import gettext as _
+
+from v1.accounts.models.user import User
+from v1.albums.models.album import Album
+
+
+class UploadSession(models.Model):
+    """
+    Resumable chunked upload of one image. Chunks are stored in the staging
+    area (`UPLOAD_STAGING_DIR/<id>/`) in order, `offset` is the number of
+    bytes received so far. Session is deleted once the image is finalized.
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text=_('Random ID, it is a part of the upload URL.'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        related_name='upload_sessions',
+        on_delete=models.CASCADE,
+        help_text=_('User who uploads the image.'),
+    )
+
+    album = models.ForeignKey(
+        Album,
+        related_name='upload_sessions',
+        on_delete=models.CASCADE,
+        help_text=_('Album the image is uploaded to.'),
+    )
+
+    filename = models.CharField(
+        _('File name'),
+        max_length=255,
+        help_text=_('Original name of the uploaded file.'),
+    )
+
+    size = models.PositiveBigIntegerField(
+        _('Size'),
+        help_text=_('Size of the whole file in bytes.'),
+    )
+
+    offset = models.PositiveBigIntegerField(
+        _('Offset'),
+        default=0,
+        help_text=_('Number of bytes received so far.'),
+    )
+
+    created = models.DateTimeField(
+        _('Created'),
+        auto_now_add=True,
+        help_text=_('Timestamp of creation.'),
+    )
+
+    modified = models.DateTimeField(
+        _('Modified'),
+        auto_now=True,
+        help_text=_('Timestamp of the last received chunk.'),
+    )
+
+    class Meta:
+        verbose_name = _('Upload session')
+        verbose_name_plural = _('Upload sessions')
+        indexes = [
+            # lookup of the abandoned sessions
+            models.Index(fields=['modified']),
+        ]
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def complete(self):
+        return self.offset == self.size
@@ -0,0 +1,83 @@
+from itertools import combinations
+
+import numpy as np
+from PIL import Image as PILImage
+
+# dHash compares 9 x 8 grayscale pixels, so it has 64 bits
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+
+# hash is split into chunks for the multi-index lookup
+CHUNKS = 4
+CHUNK_BITS = 64 // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+_BIT_WEIGHTS = 1 << np.arange(63, -1, -1, dtype=np.uint64)
+
+
+def dhash(path):
+    """
+    Computes 64 bits difference hash (dHash) of the image. Image is
+    downscaled to 9 x 8 grayscale pixels and every bit tells whether pixel
+    is brighter than its right neighbour.
+
+    :return: Hash as unsigned integer.
+    """
+    with PILImage.open(path) as img:
+        # let the JPEG decoder downscale while decoding
+        img.draft('L', (HASH_WIDTH * 4, HASH_HEIGHT * 4))
+        small = img.convert('L').resize((HASH_WIDTH, HASH_HEIGHT),
+                                        PILImage.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(_BIT_WEIGHTS[bits].sum(dtype=np.uint64))
+
+
+def to_signed(value):
+    """
+    Converts unsigned 64 bits hash to signed one (for `BigIntegerField`).
+    """
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def split_hash(value):
+    """
+    Splits unsigned hash to `CHUNKS` integers of `CHUNK_BITS` bits.
+    """
+    return [(value >> (CHUNK_BITS * (CHUNKS - i - 1))) & CHUNK_MASK
+            for i in range(CHUNKS)]
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def chunk_neighbours(chunk, radius):
+    """
+    Returns all the chunk values within the Hamming `radius` of the chunk.
+    """
+    values = [chunk]
+    for distance in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), distance):
+            value = chunk
+            for bit in bits:
+                value ^= 1 << bit
+            values.append(value)
+    return values
+
+
+def candidate_chunks(value, distance):
+    """
+    Multi-index hashing: if two hashes differ in at most `distance` bits,
+    at least one of their `CHUNKS` chunks differs in at most
+    `distance // CHUNKS` bits.
+
+    :return: List of allowed values of every chunk. Hash matching any of them
+    is a candidate.
+    """
+    radius = distance // CHUNKS
+    return [chunk_neighbours(chunk, radius) for chunk in split_hash(value)]
@@ -0,0 +1,22 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# process pools of the background jobs by their name
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(name, workers):
+    """
+    Returns process pool `name` shared by the jobs of one kind (metadata
+    extraction, transcoding), it is created by the first call. Processes are
+    spawned, because the pool is created from the worker thread.
+    """
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pools[name]
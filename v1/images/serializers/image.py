@@ -1,30 +1,119 @@
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.db.models import QuerySet
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
 from ..models.image import Image
 from ...albums.models.album import Album
 
+storage = get_storage_class()()
+
+
+class ImageListSerializer(serializers.ListSerializer):
+    """
+    List serializer of images. `Image.fullpath` needs the album of the image,
+    so albums are joined to the querysets which don't select them yet.
+    """
+    def to_representation(self, data):
+        if isinstance(data, QuerySet) and not data.query.select_related:
+            data = data.select_related('album')
+        return super().to_representation(data)
+
 
 class ImageSerializer(serializers.ModelSerializer):
     """
-    REST API serializer for the Image model.
+    REST API serializer for the Image model. If `variants` context key is
+    true, dimensions of the image and its size variants (srcset) with their
+    URLs are included too. They are read from `Image.variants`, so the
+    serialization needs no queries and file access.
     """
-    class Meta:
-        model = Image
-        fields = ['path', 'fullpath', 'name', 'modified']
+    VARIANT_FIELDS = ['width', 'height', 'variants']
 
+    variants = serializers.SerializerMethodField()
 
-class ImageUploadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Image
-        fields = ['album', 'path', 'fullpath', 'name', 'file']
+        fields = ['path', 'fullpath', 'name', 'modified', 'width', 'height',
+                  'variants']
+        list_serializer_class = ImageListSerializer
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get('variants'):
+            for name in ImageSerializer.VARIANT_FIELDS:
+                fields.pop(name)
+        return fields
+
+    def get_variants(self, obj):
+        """
+        Returns variants from the narrowest one to the original file, every
+        with `width`, `height`, `bytes` and `url`. Previews are sent in the
+        format of the image (`bytes` may differ if the client accepts a
+        derivative format).
+        """
+        data = obj.variants or {}
+        preview_url = reverse('album-img-preview', kwargs={
+            'album_path': Album.get_folder_name(obj.album.path),
+            'img_path': obj.path,
+        })
+        variants = [
+            {'width': width, 'height': height, 'bytes': size,
+             'url': f'{preview_url}?x_size={width}&y_size=0'}
+            for width, height, size in data.get('sizes', [])
+        ]
+        if 'bytes' in data:
+            variants.append({'width': obj.width, 'height': obj.height,
+                             'bytes': data['bytes'],
+                             'url': storage.url(obj.file.name)})
+        return variants
+
+
+class ImageVariantsSerializer(serializers.Serializer):
+    """
+    Query param which includes size variants in the image representation.
+    """
+    variants = serializers.BooleanField(default=False)
+
+
+class ImageSearchSerializer(ImageSerializer):
+    """
+    Image found by the search across albums, with folder name of its album.
+    """
+    album = serializers.SerializerMethodField()
+
+    class Meta(ImageSerializer.Meta):
+        fields = ImageSerializer.Meta.fields + ['album']
+
+    def get_album(self, obj):
+        return Album.get_folder_name(obj.album.path)
 
 
 class ImagePreviewSerializer(serializers.Serializer):
     x_size = serializers.IntegerField(min_value=0)
     y_size = serializers.IntegerField(min_value=0)
 
+    @staticmethod
+    def validate_size(value):
+        if value > settings.PREVIEW_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Size can\'t be larger than {settings.PREVIEW_MAX_SIZE}.')
+        return value
+
+    def validate_x_size(self, value):
+        return self.validate_size(value)
+
+    def validate_y_size(self, value):
+        return self.validate_size(value)
+
     def validate(self, data):
         if data['x_size'] + data['y_size'] == 0:
             raise serializers.ValidationError('Both sizes can\'t be zero!')
 
         return data
+
+
+class ImageSimilarSerializer(ImageVariantsSerializer):
+    distance = serializers.IntegerField(min_value=0, max_value=10,
+                                        default=6)
+    scope = serializers.ChoiceField(choices=['album', 'all'], default='all')
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.utils.translation import gettext as _
+from rest_framework import serializers
+
+from ..models.upload_session import UploadSession
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    REST API serializer for the UploadSession model. `chunk_size` is the
+    maximum size of one chunk.
+    """
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'offset', 'chunk_size',
+                  'created', 'modified']
+        read_only_fields = ['id', 'offset', 'created', 'modified']
+
+    def get_chunk_size(self, obj):
+        return settings.UPLOAD_CHUNK_MAX_SIZE
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError(_('File is empty.'))
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                _('File is larger than {} bytes.').format(
+                    settings.UPLOAD_MAX_SIZE))
+        return value
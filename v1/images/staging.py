@@ -0,0 +1,211 @@
+import datetime
+import errno
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from v1.images.models.upload_session import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# block size of the reads from the request and the hashing
+BLOCK_SIZE = 256 * 1024
+
+
+class ChunkConflict(Exception):
+    """
+    Chunk doesn't start at the offset of the session. Current offset is in
+    the `offset` attribute.
+    """
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+class IncompleteChunk(Exception):
+    """
+    Request body is shorter than its `Content-Length`.
+    """
+
+
+def get_session_dir(session_id):
+    """
+    Returns directory of the session chunks in the staging area. Staging
+    area is out of `MEDIA_ROOT`, so chunks are never served.
+    """
+    return os.path.join(settings.UPLOAD_STAGING_DIR, str(session_id))
+
+
+def write_chunk(session, stream, offset, length):
+    """
+    Receives chunk of `length` bytes from the `stream` and appends it to the
+    session. Body is stored to a temporary file first, the session is locked
+    only to check the offset and to move the file in place, so an
+    interrupted or concurrent request never corrupts the upload.
+
+    :return: New offset of the session.
+    """
+    directory = get_session_dir(session.pk)
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix='.',
+                                     suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as destination:
+            remaining = length
+            while remaining:
+                data = stream.read(min(BLOCK_SIZE, remaining))
+                if not data:
+                    raise IncompleteChunk()
+                destination.write(data)
+                remaining -= len(data)
+
+        with transaction.atomic():
+            locked = UploadSession.objects.select_for_update().get(
+                pk=session.pk)
+            if locked.offset != offset:
+                raise ChunkConflict(locked.offset)
+            # chunks are named by their offset, so a chunk resent after an
+            # interrupted request replaces the previous attempt
+            os.replace(temporary, os.path.join(directory, f'{offset:020d}'))
+            locked.offset = offset + length
+            locked.save(update_fields=['offset', 'modified'])
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    session.offset = locked.offset
+    return session.offset
+
+
+def get_chunk_paths(session):
+    """
+    Returns paths of the session chunks from the first to the last byte.
+    """
+    directory = get_session_dir(session.pk)
+    paths = []
+    position = 0
+    while position < session.size:
+        path = os.path.join(directory, f'{position:020d}')
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            raise IncompleteChunk(position)
+        if size == 0:
+            raise IncompleteChunk(position)
+        paths.append(path)
+        position += size
+    return paths
+
+
+def copy_file(source, destination, count):
+    """
+    Appends `count` bytes of the `source` file descriptor to the
+    `destination` one. Data are copied by the kernel (`copy_file_range`,
+    reflinked on filesystems which support it, or `sendfile`) and only
+    unsupported systems fall back to reads and writes.
+    """
+    for copy in (getattr(os, 'copy_file_range', None),
+                 getattr(os, 'sendfile', None)):
+        if copy is None:
+            continue
+        try:
+            while count:
+                if copy is os.sendfile:
+                    copied = copy(destination, source, None, count)
+                else:
+                    copied = copy(source, destination, count)
+                if copied == 0:
+                    raise IncompleteChunk()
+                count -= copied
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                               errno.EOPNOTSUPP):
+                raise
+    while count:
+        data = os.read(source, min(BLOCK_SIZE, count))
+        if not data:
+            raise IncompleteChunk()
+        os.write(destination, data)
+        count -= len(data)
+
+
+def assemble_chunks(session, destination):
+    """
+    Concatenates chunks of the complete session to the opened `destination`
+    file.
+
+    :return: SHA-256 of the content.
+    """
+    destination.flush()
+    hasher = hashlib.sha256()
+    for path in get_chunk_paths(session):
+        with open(path, 'rb') as chunk:
+            copy_file(chunk.fileno(), destination.fileno(),
+                      os.fstat(chunk.fileno()).st_size)
+            # content is hashed from the page cache, chunk was just written
+            chunk.seek(0)
+            for block in iter(lambda: chunk.read(BLOCK_SIZE), b''):
+                hasher.update(block)
+    return hasher.hexdigest()
+
+
+def delete_session_files(session_id):
+    shutil.rmtree(get_session_dir(session_id), ignore_errors=True)
+
+
+def delete_abandoned_sessions(max_age=None):
+    """
+    Deletes sessions without any chunk received for `max_age` seconds
+    (`UPLOAD_SESSION_TTL` by default) with their chunks, and the other old
+    files of the staging area (chunks of deleted albums or users).
+
+    :return: Number of deleted sessions.
+    """
+    if max_age is None:
+        max_age = settings.UPLOAD_SESSION_TTL
+    expired_before = timezone.now() - datetime.timedelta(seconds=max_age)
+
+    expired = list(UploadSession.objects.filter(
+        modified__lt=expired_before).values_list('pk', flat=True))
+    UploadSession.objects.filter(pk__in=expired).delete()
+    for pk in expired:
+        delete_session_files(pk)
+
+    staging_dir = settings.UPLOAD_STAGING_DIR
+    try:
+        names = os.listdir(staging_dir)
+    except FileNotFoundError:
+        names = []
+    live = {
+        str(pk) for pk in UploadSession.objects.filter(
+            pk__in=[name for name in names if _is_uuid(name)]
+        ).values_list('pk', flat=True)
+    }
+    for name in names:
+        path = os.path.join(staging_dir, name)
+        if name in live:
+            continue
+        if os.path.getmtime(path) < expired_before.timestamp():
+            logger.info('Deleting orphaned upload %s', name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+    return len(expired)
+
+
+def _is_uuid(name):
+    try:
+        uuid.UUID(name)
+    except ValueError:
+        return False
+    return True
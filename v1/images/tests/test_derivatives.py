@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import tempfile
+
+from PIL import Image
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase, override_settings
+
+from v1.accounts.models.user import User
+from v1.images.derivatives import get_derivative_name, parse_accept
+from v1.images.models.image import Image as ImageModel
+from v1.images.thumbnails import get_thumbnail_directory
+from v1.jobs.models.job import Job
+from v1.jobs.worker import process_jobs
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT,
+                   IMAGE_DERIVATIVE_FORMATS=['WEBP', 'AVIF'],
+                   TRANSCODE_WORKERS=0, METADATA_WORKERS=0)
+class DerivativeTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email='test_user@email.com',
+                                        username='testinger')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('album'), data={'name': 'foo'})
+
+    def upload_photo(self, name='photo.png'):
+        img = Image.new('RGB', (256, 256))
+        img.putdata([(x, y, (x * y) % 256)
+                     for y in range(256) for x in range(256)])
+        file = io.BytesIO()
+        img.save(file, 'png')
+        file.name = name
+        file.seek(0)
+        response = self.client.post(
+            reverse('album-detail', kwargs={'path': 'foo'}), {'file': file})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)['uploaded'][0]
+
+    def get_media(self, name, accept):
+        response = self.client.get(reverse('media', kwargs={'path': name}),
+                                   HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+        return response
+
+    def test_parse_accept(self):
+        self.assertEqual(
+            parse_accept('image/avif,image/webp;q=0.9, image/png;q=0,*/*'),
+            {'image/avif', 'image/webp', '*/*'})
+        self.assertEqual(parse_accept(''), set())
+
+    def test_transcode_on_upload(self):
+        uploaded = self.upload_photo()
+        self.assertTrue(Job.objects.filter(
+            kind=Job.KIND_TRANSCODE_IMAGES).exists())
+        process_jobs()
+
+        name = ImageModel.objects.get(path=uploaded['path']).file.name
+        fullpath = os.path.join(MEDIA_ROOT, name)
+        size = os.path.getsize(fullpath)
+        for image_format in ('WEBP', 'AVIF'):
+            derivative = get_derivative_name(fullpath, image_format)
+            self.assertLess(os.path.getsize(derivative), size)
+            with Image.open(derivative) as img:
+                self.assertEqual(img.format, image_format)
+                self.assertEqual(img.size, (256, 256))
+
+        response = self.get_media(name, 'image/webp,*/*')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('Accept', response['Vary'])
+
+        # the smallest of the accepted formats is sent
+        sizes = {
+            content_type: os.path.getsize(
+                get_derivative_name(fullpath, image_format))
+            for image_format, content_type in (('WEBP', 'image/webp'),
+                                               ('AVIF', 'image/avif'))
+        }
+        response = self.get_media(name, 'image/avif,image/webp,*/*')
+        self.assertEqual(response['Content-Type'],
+                         min(sizes, key=sizes.get))
+
+        response = self.get_media(name, 'image/*')
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+        # derivatives are deleted with the blob
+        self.client.delete(reverse('album-img-detail', kwargs={
+            'album_path': 'foo', 'img_path': uploaded['path']}))
+        for image_format in ('WEBP', 'AVIF'):
+            self.assertFalse(os.path.exists(
+                get_derivative_name(fullpath, image_format)))
+
+    def test_preview_format(self):
+        uploaded = self.upload_photo()
+        url = reverse('album-img-preview', kwargs={
+            'album_path': 'foo', 'img_path': uploaded['path']})
+
+        response = self.client.get(url, {'x_size': 50, 'y_size': 0},
+                                   HTTP_ACCEPT='image/webp,*/*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Accept', response['Vary'])
+        preview = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((preview.format, preview.size), ('WEBP', (50, 50)))
+
+        response = self.client.get(url, {'x_size': 50, 'y_size': 0})
+        preview = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(preview.format, 'PNG')
+
+        img = ImageModel.objects.get(path=uploaded['path'])
+        directory = os.path.join(MEDIA_ROOT, get_thumbnail_directory(img))
+        self.assertEqual(sorted(os.listdir(directory)),
+                         ['50x0-webp.webp', '50x0.png'])
+
+    @override_settings(IMAGE_DERIVATIVE_FORMATS=[])
+    def test_derivatives_disabled(self):
+        uploaded = self.upload_photo()
+        self.assertFalse(Job.objects.filter(
+            kind=Job.KIND_TRANSCODE_IMAGES).exists())
+        name = ImageModel.objects.get(path=uploaded['path']).file.name
+        response = self.get_media(name, 'image/webp,*/*')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertFalse(response.has_header('Vary'))
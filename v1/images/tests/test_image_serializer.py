@@ -0,0 +1,44 @@
+import tempfile
+
+from rest_framework.test import APITestCase, override_settings
+
+from v1.accounts.models.user import User
+from v1.albums.models.album import Album
+from v1.images.models.image import Image
+from v1.images.serializers.image import ImageSerializer
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageSerializerTest(APITestCase):
+
+    def setUp(self):
+        user = User.objects.create(email="test_user@email.com",
+                                   username="testinger")
+        self.albums = [
+            Album.objects.create(user=user, name=name,
+                                 path=Album.get_path(user, name))
+            for name in ('foo', 'boo')
+        ]
+        for album in self.albums:
+            for i in range(5):
+                Image.objects.create(album=album, path=f'img{i}.png',
+                                     name=f'Img{i}',
+                                     file=f'albums/{album.path}/img{i}.png',
+                                     width=10, height=10)
+
+    def test_images_queryset_query_count(self):
+        # albums are joined, not fetched per image
+        with self.assertNumQueries(1):
+            data = ImageSerializer(Image.objects.all(), many=True).data
+        self.assertEqual(len(data), 10)
+        self.assertEqual({img['fullpath'].split('/')[0] for img in data},
+                         {'foo', 'boo'})
+
+    def test_album_images_query_count(self):
+        # album of the related manager is reused
+        with self.assertNumQueries(1):
+            data = ImageSerializer(self.albums[0].image_set.all(),
+                                   many=True).data
+        self.assertEqual(data[0]['fullpath'], 'foo/img0.png')
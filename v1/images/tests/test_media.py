@@ -0,0 +1,152 @@
+import asyncio
+import os
+import tempfile
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient, override_settings
+from rest_framework.reverse import reverse
+
+from v1.accounts.models.user import User
+from v1.albums.models.album import Album
+from v1.images.models.image import Image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='test_user@email.com',
+                                        username='testinger')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.album = Album.objects.create(
+            user=self.user, name='foo', path=Album.get_path(self.user, 'foo'))
+        self.content = bytes(range(256)) * 4
+        self.path = f'albums/{self.album.path}/test.png'
+        Image.objects.create(album=self.album, path='test.png',
+                             file=self.path, width=1, height=1)
+        os.makedirs(os.path.join(MEDIA_ROOT, 'albums', self.album.path),
+                    exist_ok=True)
+        with open(os.path.join(MEDIA_ROOT, self.path), 'wb') as file:
+            file.write(self.content)
+        self.url = reverse('media', kwargs={'path': self.path})
+
+    def get_content(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_media_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.get_content(response), self.content)
+
+    def test_media_conditional_get(self):
+        response = self.client.get(self.url)
+        response.close()
+
+        response = self.client.get(self.url,
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_media_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code,
+                         status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['Content-Range'],
+                         f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(self.get_content(response), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(self.get_content(response), self.content[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code,
+                         status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        # range of modified file is ignored
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19',
+                                   HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_content(response), self.content)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_media_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/' + quote(self.path))
+        self.assertEqual(response.content, b'')
+
+    def test_media_not_found(self):
+        response = self.client.get(reverse('media',
+                                           kwargs={'path': 'albums/foo'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('media',
+                                           kwargs={'path': '../etc/passwd'}))
+        self.assertIn(response.status_code, (status.HTTP_400_BAD_REQUEST,
+                                             status.HTTP_404_NOT_FOUND))
+
+    def test_media_owner_only(self):
+        # neither anonymous nor another user can tell the file exists
+        response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        other = User.objects.create(email='other_user@email.com',
+                                    username='other')
+        client = APIClient()
+        client.force_authenticate(other)
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # token of the request is checked as by the API
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # files of no image aren't served at all
+        path = f'albums/{self.album.path}/orphan.png'
+        with open(os.path.join(MEDIA_ROOT, path), 'wb') as file:
+            file.write(self.content)
+        response = self.client.get(reverse('media', kwargs={'path': path}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_media_thumbnail_owner_only(self):
+        path = f'albums/{self.album.path}/thumbnails/test.png/1x0.png'
+        os.makedirs(os.path.dirname(os.path.join(MEDIA_ROOT, path)),
+                    exist_ok=True)
+        with open(os.path.join(MEDIA_ROOT, path), 'wb') as file:
+            file.write(self.content)
+        url = reverse('media', kwargs={'path': path})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_media_asgi_concurrent(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.user)
+        responses = await asyncio.gather(*(
+            client.get(self.url, **{'Range': f'bytes={i}-{i + 9}'})
+            for i in range(5)
+        ))
+        for i, response in enumerate(responses):
+            self.assertEqual(response.status_code,
+                             status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(self.get_content(response),
+                             self.content[i:i + 10])
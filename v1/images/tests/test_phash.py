@@ -0,0 +1,88 @@
+import io
+import os
+import random
+import tempfile
+
+from django.core.management import call_command
+from PIL import Image as PILImage
+from rest_framework.test import APITestCase, override_settings
+
+from v1.accounts.models.user import User
+from v1.albums.models.album import Album
+from v1.images.models.image import Image
+from v1.images.phash import (
+    candidate_chunks, dhash, hamming_distance, split_hash, to_signed,
+    to_unsigned
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def gradient(size=(256, 256), flip=False):
+    img = PILImage.linear_gradient('L').resize(size)
+    if flip:
+        img = img.transpose(PILImage.FLIP_TOP_BOTTOM)
+    return img.rotate(90).convert('RGB')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PerceptualHashTest(APITestCase):
+
+    def save(self, img, name):
+        path = os.path.join(MEDIA_ROOT, name)
+        img.save(path)
+        return path
+
+    def test_near_duplicates(self):
+        original = dhash(self.save(gradient(), 'original.png'))
+        resized = dhash(self.save(gradient((100, 100)), 'resized.jpg'))
+        flipped = dhash(self.save(gradient(flip=True), 'flipped.png'))
+        self.assertLessEqual(hamming_distance(original, resized), 4)
+        self.assertGreater(hamming_distance(original, flipped), 32)
+
+    def test_signed_conversion(self):
+        for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+            self.assertEqual(to_unsigned(to_signed(value)), value)
+            self.assertGreaterEqual(to_signed(value), -(1 << 63))
+
+    def test_candidate_chunks(self):
+        rnd = random.Random(0)
+        value = rnd.getrandbits(64)
+        for distance in (0, 3, 7, 10):
+            candidates = candidate_chunks(value, distance)
+            for _ in range(200):
+                other = value
+                for bit in rnd.sample(range(64), distance):
+                    other ^= 1 << bit
+                # every hash within the distance matches at least one chunk
+                self.assertTrue(any(
+                    chunk in values
+                    for chunk, values in zip(split_hash(other), candidates)
+                ))
+
+    def test_backfill_command(self):
+        user = User.objects.create(email="test_user@email.com",
+                                   username="testinger")
+        album = Album.objects.create(user=user, name='foo',
+                                     path=Album.get_path(user, 'foo'))
+        os.makedirs(os.path.join(MEDIA_ROOT, 'albums', album.path),
+                    exist_ok=True)
+        for i in range(3):
+            name = f'albums/{album.path}/img{i}.png'
+            self.save(gradient(), name)
+            Image.objects.create(album=album, path=f'img{i}.png', file=name,
+                                 width=256, height=256)
+        Image.objects.create(album=album, path='broken.png',
+                             file=f'albums/{album.path}/broken.png',
+                             width=1, height=1)
+
+        call_command('backfill_phash', batch_size=2, workers=2,
+                     stdout=io.StringIO())
+        expected = dhash(os.path.join(MEDIA_ROOT, 'albums', album.path,
+                                      'img0.png'))
+        hashed = Image.objects.exclude(phash=None)
+        self.assertEqual(hashed.count(), 3)
+        for img in hashed:
+            self.assertEqual(to_unsigned(img.phash), expected)
+            self.assertEqual([img.phash_0, img.phash_1, img.phash_2,
+                              img.phash_3], split_hash(expected))
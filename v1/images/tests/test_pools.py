@@ -0,0 +1,23 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from v1.images import pools
+from v1.images.pools import get_process_pool
+
+
+def square(value):
+    return value * value
+
+
+class ProcessPoolTest(SimpleTestCase):
+
+    @mock.patch.dict(pools._pools, clear=True)
+    def test_pool_per_name(self):
+        metadata = get_process_pool('metadata', 1)
+        self.addCleanup(metadata.shutdown)
+        transcode = get_process_pool('transcode', 1)
+        self.addCleanup(transcode.shutdown)
+        self.assertIs(get_process_pool('metadata', 1), metadata)
+        self.assertIsNot(transcode, metadata)
+        self.assertEqual(list(metadata.map(square, [2, 3])), [4, 9])
@@ -0,0 +1,133 @@
+import io
+import json
+import tempfile
+
+from PIL import Image
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase, override_settings
+
+from v1.accounts.models.user import User
+from v1.images.models.image import Image as ImageModel
+from v1.images.serializers.image import ImageSerializer
+from v1.images.thumbnails import thumbnail_cache
+from v1.jobs.models.job import Job
+from v1.jobs.worker import process_jobs
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_WIDTHS=[320, 640],
+                   METADATA_WORKERS=0)
+class ImageVariantsTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email='test_user@email.com',
+                                        username='testinger')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('album'), data={'name': 'foo'})
+
+    def upload_photo(self, size, name='photo.png'):
+        file = io.BytesIO()
+        Image.new('RGB', size=size, color=(155, 0, 0)).save(file, 'png')
+        file.name = name
+        file.seek(0)
+        response = self.client.post(
+            reverse('album-detail', kwargs={'path': 'foo'}), {'file': file})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)['uploaded'][0], file.getvalue()
+
+    def get_images(self, **params):
+        response = self.client.get(
+            reverse('album-detail', kwargs={'path': 'foo'}), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)['images']
+
+    def test_variants(self):
+        uploaded, content = self.upload_photo((800, 400))
+        self.assertTrue(Job.objects.filter(
+            kind=Job.KIND_RENDER_VARIANTS).exists())
+
+        # original is known right after the upload
+        image = self.get_images(variants='true')[0]
+        self.assertEqual((image['width'], image['height']), (800, 400))
+        self.assertEqual(len(image['variants']), 1)
+        self.assertEqual(image['variants'][0]['bytes'], len(content))
+
+        process_jobs()
+        image = self.get_images(variants='true')[0]
+        self.assertEqual(
+            [(v['width'], v['height']) for v in image['variants']],
+            [(320, 160), (640, 320), (800, 400)])
+
+        variant = image['variants'][0]
+        response = self.client.get(variant['url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        preview = b''.join(response.streaming_content)
+        self.assertEqual(len(preview), variant['bytes'])
+        self.assertEqual(Image.open(io.BytesIO(preview)).size, (320, 160))
+
+        original = image['variants'][-1]
+        response = self.client.get(original['url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), content)
+
+        url = reverse('album-img-detail', kwargs={
+            'album_path': 'foo', 'img_path': uploaded['path']})
+        response = self.client.get(url, {'variants': 'true'})
+        self.assertEqual(json.loads(response.content), image)
+
+    def test_variants_not_evicted(self):
+        uploaded, _ = self.upload_photo((800, 400))
+        process_jobs()
+        variant = self.get_images(variants='true')[0]['variants'][0]
+
+        preview_url = reverse('album-img-preview', kwargs={
+            'album_path': 'foo', 'img_path': uploaded['path']})
+        response = self.client.get(preview_url,
+                                   {'x_size': 100, 'y_size': 100})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+        with override_settings(THUMBNAILS_CACHE_MAX_BYTES=0):
+            thumbnail_cache._evict()
+        self.assertEqual(
+            [path for _, _, path in thumbnail_cache._thumbnail_files()], [])
+
+        response = self.client.get(variant['url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(b''.join(response.streaming_content)),
+                         variant['bytes'])
+
+    def test_variants_optional(self):
+        self.upload_photo((800, 400))
+        process_jobs()
+        image = self.get_images()[0]
+        self.assertEqual(set(image),
+                         {'path', 'fullpath', 'name', 'modified'})
+
+        response = self.client.get(
+            reverse('album-detail', kwargs={'path': 'foo'}),
+            {'variants': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_small_image_has_no_variants(self):
+        self.upload_photo((100, 50))
+        self.assertFalse(Job.objects.filter(
+            kind=Job.KIND_RENDER_VARIANTS).exists())
+        image = self.get_images(variants='true')[0]
+        self.assertEqual([v['width'] for v in image['variants']], [100])
+
+    def test_variants_query_count(self):
+        for i in range(3):
+            self.upload_photo((800, 400), f'photo{i}.png')
+        process_jobs()
+        # variants are read from the image rows only
+        with self.assertNumQueries(1):
+            data = ImageSerializer(ImageModel.objects.all(), many=True,
+                                   context={'variants': True}).data
+        self.assertEqual([len(image['variants']) for image in data],
+                         [3, 3, 3])
@@ -0,0 +1,239 @@
+import glob
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from PIL import Image as PILImage
+
+from v1.images.transcoding import DERIVATIVE_FORMATS, save_image
+
+logger = logging.getLogger(__name__)
+storage = get_storage_class()()
+
+# name of the subdirectory of the album directory with all the thumbnails
+THUMBNAILS_DIRECTORY = 'thumbnails'
+
+# size variants (`<width>w.<ext>`) are stored with the thumbnails, but they
+# are never evicted
+VARIANT_NAME_RE = re.compile(r'^\d+w\.')
+
+# formats which are stored as is, everything else is rendered as PNG
+PRESERVED_FORMATS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+
+
+def get_thumbnail_directory(image):
+    """
+    Returns directory with all the thumbnails of the image. It is relative
+    path to `MEDIA_ROOT` (e.g. albums/<album path>/thumbnails/<image path>).
+    """
+    return os.path.join('albums',
+                        image.album.path,
+                        THUMBNAILS_DIRECTORY,
+                        image.path)
+
+
+def get_variant_name(width):
+    return f'{width}w'
+
+
+def get_thumbnail_extension(img_format):
+    if img_format in DERIVATIVE_FORMATS:
+        return DERIVATIVE_FORMATS[img_format][0]
+    return PRESERVED_FORMATS[img_format]
+
+
+def render_thumbnail(source, destination, x_size, y_size, img_format=None):
+    """
+    Renders resized copy of the `source` image to the `destination` file.
+    Aspect ratio is kept and image is never enlarged. Zero size means that
+    dimension is not limited. Thumbnail is encoded to the derivative
+    `img_format` if it is set.
+
+    :return: Pillow format of the rendered thumbnail.
+    """
+    with PILImage.open(source) as img:
+        source_format = img.format
+        size = (x_size or img.width, y_size or img.height)
+        # let the JPEG decoder downscale while decoding
+        img.draft('RGB', size)
+        img.thumbnail(size)
+
+        if img_format in DERIVATIVE_FORMATS:
+            # metadata is dropped as from the other thumbnails
+            save_image(img, destination, img_format,
+                       getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80), {})
+            return img_format
+
+        img_format = source_format
+        if img_format not in PRESERVED_FORMATS:
+            img_format = 'PNG'
+        if img_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.save(destination, img_format)
+    return img_format
+
+
+class ThumbnailCache:
+    """
+    On-disk cache of rendered thumbnails with LRU eviction.
+
+    Thumbnails are keyed by image and size. Modification time of the file
+    is used as the LRU clock: it is bumped on every hit. When the estimated
+    size of the cache exceeds `THUMBNAILS_CACHE_MAX_BYTES` the cache
+    directories are scanned and the least recently used thumbnails are
+    removed until the cache fits `THUMBNAILS_CACHE_LOW_WATERMARK` of the
+    budget.
+
+    Size variants (`render_variant`) are stored in the same directories but
+    they aren't part of the cache: they are kept until the image is deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._size = None
+
+    @property
+    def max_bytes(self):
+        return getattr(settings, 'THUMBNAILS_CACHE_MAX_BYTES',
+                       512 * 1024 * 1024)
+
+    @property
+    def low_watermark(self):
+        return getattr(settings, 'THUMBNAILS_CACHE_LOW_WATERMARK', 0.9)
+
+    def _thumbnail_files(self):
+        pattern = os.path.join(storage.location, 'albums', '*',
+                               THUMBNAILS_DIRECTORY, '*', '*')
+        for path in glob.iglob(pattern):
+            if VARIANT_NAME_RE.match(os.path.basename(path)):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+    def _find(self, directory, name, img_format=None):
+        if img_format is None:
+            extensions = PRESERVED_FORMATS.values()
+        else:
+            extensions = [get_thumbnail_extension(img_format)]
+        for extension in extensions:
+            path = os.path.join(directory, name + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def open(self, image, x_size, y_size, img_format=None):
+        """
+        Opens thumbnail of the image for reading. Thumbnail is rendered if it
+        isn't cached yet. Just rendered thumbnail is never evicted by its own
+        insertion. `img_format` selects derivative format of the thumbnail,
+        otherwise format of the image is kept.
+        """
+        directory = storage.path(get_thumbnail_directory(image))
+        if y_size == 0 and img_format is None:
+            path = self._find(directory, get_variant_name(x_size))
+            if path:
+                try:
+                    return open(path, 'rb')
+                except OSError:
+                    # image was deleted in the meantime
+                    pass
+
+        name = f'{x_size}x{y_size}'
+        if img_format is not None:
+            # never mistaken for the thumbnail of a WebP image
+            name += '-' + img_format.lower()
+
+        path = self._find(directory, name, img_format)
+        if path:
+            try:
+                os.utime(path)
+                return open(path, 'rb')
+            except OSError:
+                # evicted in the meantime
+                pass
+
+        path = self._render(image, directory, name, x_size, y_size,
+                            img_format)
+        file = open(path, 'rb')
+        self._add(path, os.fstat(file.fileno()).st_size)
+        return file
+
+    def render_variant(self, image, width):
+        """
+        Renders size variant of the image `width` pixels wide in the format
+        of the image. It is served by `open` instead of the cached thumbnail
+        of the same size.
+
+        :return: Path of the variant.
+        """
+        directory = storage.path(get_thumbnail_directory(image))
+        return self._render(image, directory, get_variant_name(width), width,
+                            0)
+
+    @staticmethod
+    def _render(image, directory, name, x_size, y_size, img_format=None):
+        os.makedirs(directory, exist_ok=True)
+        # render into temporary file, so readers never see partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                img_format = render_thumbnail(
+                    storage.path(image.file.name), tmp, x_size, y_size,
+                    img_format
+                )
+            path = os.path.join(directory,
+                                name + get_thumbnail_extension(img_format))
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def _add(self, path, size):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(s for _, s, _ in self._thumbnail_files())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+
+    def _evict(self, keep=None):
+        files = sorted(self._thumbnail_files())
+        total = sum(size for _, size, _ in files)
+        limit = self.max_bytes * self.low_watermark
+        for _, size, path in files:
+            if total <= limit:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                logger.warning('Can not evict thumbnail %s', path)
+                continue
+            total -= size
+        self._size = total
+
+    def delete(self, image):
+        """
+        Deletes all the thumbnails of the image.
+        """
+        shutil.rmtree(storage.path(get_thumbnail_directory(image)),
+                      ignore_errors=True)
+
+
+thumbnail_cache = ThumbnailCache()
@@ -0,0 +1,90 @@
+import functools
+import os
+import tempfile
+
+from PIL import Image as PILImage
+from PIL import features
+
+# formats of the derivatives: extension and content type
+DERIVATIVE_FORMATS = {
+    'AVIF': ('.avif', 'image/avif'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+
+@functools.lru_cache()
+def is_supported(image_format):
+    """
+    Checks whether Pillow was built with the encoder of the format.
+    """
+    return features.check(image_format.lower())
+
+
+def prepare_for_format(img):
+    """
+    Converts the image to a mode the derivative formats can encode.
+    """
+    if img.mode in ('RGB', 'RGBA'):
+        return img
+    if img.mode in ('LA', 'PA') or 'transparency' in img.info:
+        return img.convert('RGBA')
+    return img.convert('RGB')
+
+
+def save_image(img, destination, image_format, quality, source_info):
+    """
+    Encodes the image to the derivative format. EXIF (orientation) and
+    colour profile of the source are kept.
+    """
+    options = {'quality': quality}
+    for key in ('exif', 'icc_profile'):
+        if source_info.get(key):
+            options[key] = source_info[key]
+    prepare_for_format(img).save(destination, image_format, **options)
+
+
+def transcode_file(path, formats, quality):
+    """
+    Encodes the image file to the derivative `formats`, next to the file
+    with the extension of the format appended. Derivatives which aren't
+    smaller than the source are dropped, they would never be served.
+    Animated and broken images are skipped. It runs in the worker process,
+    so it only needs Pillow.
+
+    :return: List of formats of the stored derivatives.
+    """
+    stored = []
+    try:
+        source_size = os.path.getsize(path)
+        with PILImage.open(path) as img:
+            if getattr(img, 'is_animated', False):
+                return stored
+            img.load()
+            info = dict(img.info)
+            converted = prepare_for_format(img)
+    except (OSError, ValueError):
+        return stored
+
+    for image_format in formats:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                save_image(converted, tmp, image_format, quality, info)
+            if os.path.getsize(tmp_path) < source_size:
+                # readers never see a partial file
+                os.replace(tmp_path,
+                           path + DERIVATIVE_FORMATS[image_format][0])
+                stored.append(image_format)
+            else:
+                os.unlink(tmp_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    if not os.path.exists(path):
+        # source was deleted in the meantime
+        for image_format in stored:
+            os.unlink(path + DERIVATIVE_FORMATS[image_format][0])
+        return []
+    return stored
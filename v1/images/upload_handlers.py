@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import get_storage_class
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from v1.images.models.image import Image
+from v1.images.phash import dhash
+
+logger = logging.getLogger(__name__)
+storage = get_storage_class()()
+
+_upload_pool = None
+_upload_pool_lock = threading.Lock()
+
+# result of `prepare_uploaded_file`
+PreparedUpload = namedtuple(
+    'PreparedUpload',
+    ['file', 'stored_name', 'digest', 'width', 'height', 'phash']
+)
+
+
+def get_album_file_name(album, filename):
+    """
+    Returns name of the new file in the album directory which is not taken
+    yet. It is relative path to `MEDIA_ROOT`.
+    """
+    return storage.get_available_name(
+        '{}/{}/{}'.format('albums', album.path, filename)
+    )
+
+
+def open_album_file(album, filename):
+    """
+    Creates new empty file in the album directory. Name is reserved with
+    `O_EXCL`, so concurrent uploads never write into the same file.
+
+    :return: Tuple of the name relative to `MEDIA_ROOT` and opened file.
+    """
+    while True:
+        name = get_album_file_name(album, filename)
+        absolute_path = storage.path(name)
+        os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+        try:
+            fd = os.open(absolute_path,
+                         os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            continue
+        return name, os.fdopen(fd, 'wb')
+
+
+def probe_image_dimensions(name):
+    """
+    Reads width and height of the stored image. Only the header is parsed,
+    the image is never decoded.
+
+    :return: `(width, height)` or `(None, None)` if it isn't an image.
+    """
+    with storage.open(name, 'rb') as file:
+        return get_image_dimensions(file)
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    Uploaded file which has been already written to the storage. Its name
+    relative to `MEDIA_ROOT` is in the `stored_name` attribute and SHA-256
+    of the content in the `digest` attribute.
+    """
+
+    def __init__(self, stored_name, digest, name, content_type, size,
+                 charset, content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset,
+                         content_type_extra)
+        self.stored_name = stored_name
+        self.digest = digest
+
+    def open(self, mode='rb'):
+        self.file = storage.open(self.stored_name, mode)
+        return self
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class AlbumUploadHandler(FileUploadHandler):
+    """
+    Upload handler which streams files chunk by chunk straight to the album
+    directory. Files are named via `Image.generate_path`, so nothing is
+    buffered in the memory or in temporary files. Content is hashed while it
+    is streamed. Names of the complete files are kept in `stored_names`,
+    so they can be deleted if the request fails before they are prepared.
+    """
+
+    def __init__(self, album, user, request=None):
+        super().__init__(request)
+        self.album = album
+        self.user = user
+        self.stored_name = None
+        self.stored_names = []
+        self.destination = None
+        self.hasher = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        filename, _ = Image.generate_path(self.file_name, self.user)
+        self.stored_name, self.destination = open_album_file(self.album,
+                                                             filename)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.destination.write(raw_data)
+        self.hasher.update(raw_data)
+
+    def file_complete(self, file_size):
+        self.destination.close()
+        self.destination = None
+        self.stored_names.append(self.stored_name)
+        return StoredUploadedFile(
+            stored_name=self.stored_name,
+            digest=self.hasher.hexdigest(),
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        if self.destination is not None:
+            self.destination.close()
+            self.destination = None
+            storage.delete(self.stored_name)
+
+    def delete_stored_files(self):
+        """
+        Deletes all the files streamed by the handler.
+        """
+        self.upload_interrupted()
+        for name in self.stored_names:
+            storage.delete(name)
+        self.stored_names = []
+
+
+def store_uploaded_file(album, user, file):
+    """
+    Stores uploaded file to the album directory, unless it was already
+    streamed there by `AlbumUploadHandler`.
+
+    :return: Name of the stored file relative to `MEDIA_ROOT` and SHA-256 of
+    the content.
+    """
+    if isinstance(file, StoredUploadedFile):
+        return file.stored_name, file.digest
+
+    filename, _ = Image.generate_path(file.name, user)
+    name, destination = open_album_file(album, filename)
+    hasher = hashlib.sha256()
+    try:
+        with destination:
+            for chunk in file.chunks():
+                destination.write(chunk)
+                hasher.update(chunk)
+    except Exception:
+        storage.delete(name)
+        raise
+    return name, hasher.hexdigest()
+
+
+def get_upload_pool():
+    """
+    Returns thread pool shared by all the upload requests. Its size is set
+    by `UPLOAD_WORKERS`.
+    """
+    global _upload_pool
+    with _upload_pool_lock:
+        if _upload_pool is None:
+            _upload_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'UPLOAD_WORKERS', 4),
+                thread_name_prefix='upload',
+            )
+    return _upload_pool
+
+
+def prepare_uploaded_file(album, user, file):
+    """
+    Stores uploaded file, hashes it, reads its dimensions and computes its
+    perceptual hash. Files which aren't images are deleted.
+
+    :return: `PreparedUpload`. All but the file are `None` if the file isn't
+    an image.
+    """
+    stored_name, digest = store_uploaded_file(album, user, file)
+    try:
+        width, height = probe_image_dimensions(stored_name)
+    except Exception:
+        storage.delete(stored_name)
+        raise
+    if width is None:
+        storage.delete(stored_name)
+        return PreparedUpload(file, None, None, None, None, None)
+
+    try:
+        phash = dhash(storage.path(stored_name))
+    except Exception:
+        # header is fine, but the image can't be decoded
+        logger.warning('Can not compute perceptual hash of %s', stored_name)
+        phash = None
+    return PreparedUpload(file, stored_name, digest, width, height, phash)
+
+
+def collect_prepared_uploads(files, results):
+    """
+    Returns results of `prepare_uploaded_file` of all the files. If any of
+    them failed, files stored for the whole batch are deleted (nothing
+    creates their images) and the first error is raised.
+    """
+    errors = [result for result in results
+              if isinstance(result, BaseException)]
+    if not errors:
+        return list(results)
+    for file, result in zip(files, results):
+        if isinstance(result, PreparedUpload):
+            name = result.stored_name
+        else:
+            # file streamed by `AlbumUploadHandler`
+            name = getattr(file, 'stored_name', None)
+        if name:
+            storage.delete(name)
+    raise errors[0]
+
+
+def prepare_uploaded_files(album, user, files):
+    """
+    Runs `prepare_uploaded_file` for all the files in the upload pool.
+    Results are in the same order as the files. All the files are finished
+    before an error is raised, so none is left stored.
+    """
+    pool = get_upload_pool()
+    futures = [pool.submit(prepare_uploaded_file, album, user, file)
+               for file in files]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return collect_prepared_uploads(files, results)
+
+
+async def prepare_uploaded_files_async(album, user, files):
+    """
+    Async version of `prepare_uploaded_files`, the event loop isn't blocked
+    while the upload pool works.
+    """
+    pool = get_upload_pool()
+    results = await asyncio.gather(*(
+        asyncio.wrap_future(pool.submit(prepare_uploaded_file, album, user,
+                                        file))
+        for file in files
+    ), return_exceptions=True)
+    return collect_prepared_uploads(files, results)
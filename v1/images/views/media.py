@@ -0,0 +1,276 @@
+import mimetypes
+import os
+import re
+from stat import S_ISREG
+from urllib.parse import quote
+
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from config.executor import sync_to_pool
+from v1.images.derivatives import (
+    get_accepted_formats, get_derivative_name, get_enabled_formats
+)
+from v1.images.models.image import Image
+from v1.images.thumbnails import THUMBNAILS_DIRECTORY
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    File object which reads at most `length` bytes from the `start`
+    offset. `fileno()` is exposed, so the WSGI server can still send it with
+    `sendfile` (file position and `Content-Length` bound the transfer).
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Parses single range `Range` header.
+
+    :return: Tuple `(start, end)` (both inclusive), `None` if the header
+    should be ignored or `False` if the range is not satisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # multiple or invalid ranges, the whole file is sent
+        return None
+    start, end = match.groups()
+    if start == '':
+        # suffix range, last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    Checks `If-Range` header. Range is honoured only if the file wasn't
+    modified since the client got its first part.
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_media_user(request):
+    """
+    Authenticates the request by the authentication classes of the API
+    (token, session or basic credentials).
+
+    :return: User or `None` if the request is anonymous or the credentials
+        are invalid.
+    """
+    authenticators = [authentication() for authentication in
+                      api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        user = Request(request, authenticators=authenticators).user
+    except APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+def is_media_owned(user, path):
+    """
+    Checks that the media file belongs to an image of the user. Media files
+    are the blobs (`blobs/ab/cd/<digest>.<ext>`), files of the images
+    stored before deduplication (`albums/<album>/<image>`) and thumbnails
+    (`albums/<album>/thumbnails/<image>/<size>.<ext>`), derivatives have the
+    name of their source with another extension appended.
+    """
+    parts = path.split('/')
+    if len(parts) == 4 and parts[0] == 'blobs':
+        digest = parts[3].split('.')[0]
+        return Image.objects.filter(blob__digest=digest,
+                                    album__user=user).exists()
+    if len(parts) == 3 and parts[0] == 'albums':
+        paths = [parts[2], os.path.splitext(parts[2])[0]]
+        return Image.objects.filter(album__user=user, album__path=parts[1],
+                                    path__in=paths).exists()
+    if (len(parts) == 5 and parts[0] == 'albums'
+            and parts[2] == THUMBNAILS_DIRECTORY):
+        return Image.objects.filter(album__user=user, album__path=parts[1],
+                                    path=parts[3]).exists()
+    return False
+
+
+def authorize_media(request, path):
+    """
+    Raises 404 unless the file belongs to the user of the request, so
+    another user can't even learn the file exists.
+    """
+    user = get_media_user(request)
+    if user is None or not is_media_owned(user, path):
+        raise Http404('File does not exist')
+
+
+def stat_media_file(fullpath):
+    """
+    :return: `os.stat_result` of the regular file or raise 404.
+    """
+    try:
+        stat = os.stat(fullpath)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File does not exist')
+    if not S_ISREG(stat.st_mode):
+        raise Http404('File does not exist')
+    return stat
+
+
+def select_variant(request, path, fullpath, stat):
+    """
+    Picks the smallest of the file and its derivatives accepted by the
+    client.
+
+    :return: Tuple of path, full path and `os.stat_result` of the variant.
+    """
+    selected = (path, fullpath, stat)
+    for image_format in get_accepted_formats(request):
+        variant = get_derivative_name(fullpath, image_format)
+        try:
+            variant_stat = os.stat(variant)
+        except OSError:
+            continue
+        if variant_stat.st_size < selected[2].st_size:
+            selected = (get_derivative_name(path, image_format), variant,
+                        variant_stat)
+    return selected
+
+
+def is_negotiable(fullpath):
+    """
+    Only images have derivatives.
+    """
+    content_type, _ = mimetypes.guess_type(fullpath)
+    return (bool(get_enabled_formats()) and content_type is not None
+            and content_type.startswith('image/'))
+
+
+async def serve_media(request, path):
+    """
+    Serves files from `MEDIA_ROOT` to the owner of the image they belong to,
+    everyone else gets 404. The request is authenticated as API requests.
+
+    It supports conditional requests (`If-None-Match`, `If-Modified-Since`)
+    and single `Range` requests. Files are sent by `FileResponse`, so the WSGI
+    server can use `sendfile`. If `MEDIA_ACCEL_REDIRECT_PREFIX` is set, only
+    `X-Accel-Redirect` header is returned and nginx sends the file itself
+    (its location must be `internal`, so the files are never served
+    without this view).
+    Images are replaced by their smallest derivative (WebP, AVIF) the
+    client accepts.
+
+    The view is async: the file is looked up and opened in the thread pool
+    and under ASGI the content is sent by the event loop, so slow clients
+    don't hold any thread.
+    """
+    fullpath = safe_join(settings.MEDIA_ROOT, path)
+    await sync_to_pool(authorize_media)(request, path)
+    stat = await sync_to_pool(stat_media_file)(fullpath)
+    negotiable = is_negotiable(fullpath)
+    if negotiable:
+        path, fullpath, stat = await sync_to_pool(select_variant)(
+            request, path, fullpath, stat)
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+    }
+
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=last_modified)
+
+    if response is None:
+        response = await sync_to_pool(_file_response)(
+            request, path, fullpath, stat.st_size, etag, last_modified)
+
+    for header, value in headers.items():
+        response[header] = value
+    # files of the user mustn't be stored by shared caches
+    patch_cache_control(response, private=True,
+                        max_age=settings.MEDIA_CACHE_MAX_AGE)
+    if negotiable:
+        patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def _file_response(request, path, fullpath, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    if accel_prefix:
+        # nginx handles ranges and sends the file
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix + quote(path)
+        return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(RangeFile(file, start, length),
+                                status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
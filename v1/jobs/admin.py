@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from v1.jobs.models.job import Job
+
+admin.site.register(Job)
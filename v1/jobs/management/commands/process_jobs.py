@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from v1.jobs.worker import process_jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs pending background jobs (e.g. album deletions).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when there is no pending job.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = process_jobs()
+            if count:
+                self.stdout.write(f'Processed {count} job(s).')
+            if options['once']:
+                return
+            time.sleep(getattr(settings, 'JOBS_POLL_INTERVAL', 60))
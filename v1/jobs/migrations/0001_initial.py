@@ -0,0 +1,39 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('delete_albums', 'Delete albums')], help_text='What the job does.', max_length=64, verbose_name='Kind')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', help_text='State of the job.', max_length=16, verbose_name='Status')),
+                ('payload', models.JSONField(default=dict, help_text='Arguments of the job.', verbose_name='Payload')),
+                ('processed', models.PositiveIntegerField(default=0, help_text='Number of items processed so far.', verbose_name='Processed')),
+                ('error', models.TextField(blank=True, default='', help_text='Error of the failed job.', verbose_name='Error')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='Timestamp of creation.', verbose_name='Created')),
+                ('modified', models.DateTimeField(auto_now=True, help_text='Timestamp of last modification.', verbose_name='Modified')),
+                ('user', models.ForeignKey(help_text='User who started the job.', on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'created'], name='jobs_job_status_139a07_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('delete_albums', 'Delete albums'), ('extract_metadata', 'Extract image metadata')], help_text='What the job does.', max_length=64, verbose_name='Kind'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:46
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_kind_extract_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='result',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Result of the finished job, if it has any.', null=True, verbose_name='Result'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='total',
+            field=models.PositiveIntegerField(blank=True, help_text='Number of items to process, if it is known.', null=True, verbose_name='Total'),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('delete_albums', 'Delete albums'), ('extract_metadata', 'Extract image metadata'), ('import_archive', 'Import ZIP archive')], help_text='What the job does.', max_length=64, verbose_name='Kind'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_job_import_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('delete_albums', 'Delete albums'), ('extract_metadata', 'Extract image metadata'), ('import_archive', 'Import ZIP archive'), ('transcode_images', 'Transcode images')], help_text='What the job does.', max_length=64, verbose_name='Kind'),
+        ),
+    ]
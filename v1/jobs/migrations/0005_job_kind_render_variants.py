@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_kind_transcode_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('delete_albums', 'Delete albums'), ('extract_metadata', 'Extract image metadata'), ('import_archive', 'Import ZIP archive'), ('transcode_images', 'Transcode images'), ('render_variants', 'Render image variants')], help_text='What the job does.', max_length=64, verbose_name='Kind'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.8 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_job_kind_render_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='How many times the job was started. Job abandoned by a stopped worker is started again.', verbose_name='Attempts'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'modified'], name='jobs_job_status_5f5c63_idx'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext as _
+
+from v1.accounts.models.user import User
+
+
+class Job(models.Model):
+    """
+    Job represents some long running work (e.g. deletion of albums) which is
+    done by the background worker instead of the request.
+    """
+    KIND_DELETE_ALBUMS = 'delete_albums'
+    KIND_EXTRACT_METADATA = 'extract_metadata'
+    KIND_IMPORT_ARCHIVE = 'import_archive'
+    KIND_TRANSCODE_IMAGES = 'transcode_images'
+    KIND_RENDER_VARIANTS = 'render_variants'
+    KIND_CHOICES = (
+        (KIND_DELETE_ALBUMS, _('Delete albums')),
+        (KIND_EXTRACT_METADATA, _('Extract image metadata')),
+        (KIND_IMPORT_ARCHIVE, _('Import ZIP archive')),
+        (KIND_TRANSCODE_IMAGES, _('Transcode images')),
+        (KIND_RENDER_VARIANTS, _('Render image variants')),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_RUNNING, _('Running')),
+        (STATUS_DONE, _('Done')),
+        (STATUS_FAILED, _('Failed')),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        help_text=_('User who started the job.')
+    )
+
+    kind = models.CharField(
+        _('Kind'),
+        max_length=64,
+        choices=KIND_CHOICES,
+        help_text=_('What the job does.'),
+    )
+
+    status = models.CharField(
+        _('Status'),
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        help_text=_('State of the job.'),
+    )
+
+    payload = models.JSONField(
+        _('Payload'),
+        default=dict,
+        help_text=_('Arguments of the job.'),
+    )
+
+    processed = models.PositiveIntegerField(
+        _('Processed'),
+        default=0,
+        help_text=_('Number of items processed so far.'),
+    )
+
+    total = models.PositiveIntegerField(
+        _('Total'),
+        null=True,
+        blank=True,
+        help_text=_('Number of items to process, if it is known.'),
+    )
+
+    result = models.JSONField(
+        _('Result'),
+        null=True,
+        encoder=DjangoJSONEncoder,
+        blank=True,
+        help_text=_('Result of the finished job, if it has any.'),
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        _('Attempts'),
+        default=0,
+        help_text=_('How many times the job was started. Job abandoned by '
+                    'a stopped worker is started again.'),
+    )
+
+    error = models.TextField(
+        _('Error'),
+        blank=True,
+        default='',
+        help_text=_('Error of the failed job.'),
+    )
+
+    created = models.DateTimeField(
+        _('Created'),
+        auto_now_add=True,
+        help_text=_('Timestamp of creation.'),
+    )
+
+    modified = models.DateTimeField(
+        _('Modified'),
+        auto_now=True,
+        help_text=_('Timestamp of last modification.'),
+    )
+
+    class Meta:
+        verbose_name = _('Job')
+        verbose_name_plural = _('Jobs')
+        indexes = [
+            # worker picks the oldest pending job
+            models.Index(fields=['status', 'created']),
+            # running jobs without heartbeat are requeued
+            models.Index(fields=['status', 'modified']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} ({self.status})'
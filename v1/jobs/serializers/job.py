@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+from v1.jobs.models.job import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    REST API serializer for the Job model.
+    """
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'processed', 'total', 'result',
+                  'error', 'created', 'modified']
@@ -0,0 +1,155 @@
+import json
+import io
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from PIL import Image
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient, override_settings
+from rest_framework.reverse import reverse
+
+from v1.accounts.models.user import User
+from v1.albums.models.album import Album
+from v1.images.models.image import Image as ImageModel
+from v1.jobs.models.job import Job
+from v1.jobs.worker import (
+    Heartbeat, claim_next_job, enqueue, process_jobs
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class JobTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="test_user@email.com",
+            username="testinger",
+            first_name="Tester",
+            last_name="Testerov",
+        )
+        self.client = self.prepare_client(self.user)
+        self.client.post(reverse('album'), data={"name": "foo"})
+        self.album = Album.objects.get(user=self.user, name="foo")
+
+    def prepare_client(self, u):
+        client = APIClient()
+        client.force_authenticate(u)
+        return client
+
+    def generate_photo_file(self, filename=None):
+        file = io.BytesIO()
+        image = Image.new('RGBA', size=(100, 100), color=(155, 0, 0))
+        image.save(file, 'png')
+        file.name = filename or 'test.png'
+        file.seek(0)
+        return file
+
+    @override_settings(JOBS_DELETE_BATCH_SIZE=2)
+    def test_album_deletion_in_batches(self):
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        upload = {f'file{i}': self.generate_photo_file() for i in range(5)}
+        self.client.post(url, upload)
+        files = [os.path.join(MEDIA_ROOT, img.file.name)
+                 for img in ImageModel.objects.all()]
+        self.assertEqual(len(files), 5)
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = Job.objects.get(pk=json.loads(response.content)['id'])
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        # album is kept until the job is processed
+        self.assertEqual(Album.objects.count(), 1)
+
+        # metadata extraction of the upload and the deletion
+        self.assertEqual(process_jobs(), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertEqual(job.processed, 5)
+        self.assertEqual(Album.objects.count(), 0)
+        self.assertEqual(ImageModel.objects.count(), 0)
+        for file in files:
+            self.assertFalse(os.path.exists(file))
+
+    def test_job_of_another_user(self):
+        job = enqueue(self.user, Job.KIND_DELETE_ALBUMS,
+                      {'albums': [self.album.pk]})
+        new_user = User.objects.create(email="new_user@email.com",
+                                       username="new123")
+        response = self.prepare_client(new_user).get(
+            reverse('job-detail', kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_failed_job(self):
+        job = enqueue(self.user, Job.KIND_DELETE_ALBUMS, {})
+        process_jobs()
+        response = self.client.get(reverse('job-detail',
+                                           kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)
+        self.assertEqual(content['status'], Job.STATUS_FAILED)
+        self.assertNotEqual(content['error'], '')
+
+    def test_album_deletion_enqueued_once(self):
+        url = reverse('album-detail', kwargs={'path': self.album.name})
+        first = json.loads(self.client.delete(url).content)['id']
+        second = json.loads(self.client.delete(url).content)['id']
+        self.assertEqual(first, second)
+        self.assertEqual(Job.objects.filter(
+            kind=Job.KIND_DELETE_ALBUMS).count(), 1)
+
+    @override_settings(JOBS_LEASE_TIMEOUT=60, JOBS_MAX_ATTEMPTS=2)
+    def test_abandoned_job_requeued(self):
+        job = enqueue(self.user, Job.KIND_DELETE_ALBUMS,
+                      {'albums': [self.album.pk]})
+        self.assertEqual(claim_next_job(), job)
+        # worker is alive (recent heartbeat), the job isn't taken again
+        self.assertIsNone(claim_next_job())
+
+        # worker died, no heartbeat since
+        stale = timezone.now() - timedelta(minutes=5)
+        Job.objects.filter(pk=job.pk).update(modified=stale)
+        self.assertEqual(process_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DONE, 2))
+        self.assertEqual(Album.objects.count(), 0)
+
+    @override_settings(JOBS_LEASE_TIMEOUT=60, JOBS_MAX_ATTEMPTS=1)
+    def test_abandoned_job_failed_after_attempts(self):
+        job = enqueue(self.user, Job.KIND_DELETE_ALBUMS,
+                      {'albums': [self.album.pk]})
+        claim_next_job()
+        stale = timezone.now() - timedelta(minutes=5)
+        Job.objects.filter(pk=job.pk).update(modified=stale)
+        self.assertEqual(process_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertNotEqual(job.error, '')
+
+
+class HeartbeatTest(TransactionTestCase):
+    """
+    Heartbeat updates the job from its own thread and DB connection.
+    """
+
+    @override_settings(JOBS_HEARTBEAT_INTERVAL=0.01)
+    def test_heartbeat(self):
+        user = User.objects.create(email='test_user@email.com',
+                                   username='testinger')
+        job = Job.objects.create(user=user, kind=Job.KIND_DELETE_ALBUMS,
+                                 payload={'albums': []})
+        claim_next_job()
+        stale = timezone.now() - timedelta(minutes=5)
+        Job.objects.filter(pk=job.pk).update(modified=stale)
+        with Heartbeat(job):
+            time.sleep(0.1)
+        job.refresh_from_db()
+        self.assertGreater(job.modified, stale)
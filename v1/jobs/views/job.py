@@ -0,0 +1,40 @@
+from rest_framework import status
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+
+from v1.jobs.serializers.job import JobSerializer
+
+
+def job_accepted_response(job):
+    """
+    Returns 202 response with the queued job. `Location` header points to
+    the job status.
+    """
+    serializer = JobSerializer(job)
+    return Response(
+        serializer.data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': reverse('job-detail', kwargs={'pk': job.pk})},
+    )
+
+
+class JobDetailView(APIView):
+    """
+    API view to check status of the background job.
+    """
+    permission_classes = (IsAuthenticated, )
+
+    @staticmethod
+    def get(request, pk):
+        """
+        Retrieve status of the users' job.
+        :param request: GET
+        :param pk: ID of the job.
+        :return: Job or 404 Response.
+        """
+        job = get_object_or_404(request.user.jobs.all(), pk=pk)
+        serializer = JobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,187 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from v1.jobs.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# functions which do the work of the job, they get `Job` instance
+JOB_HANDLERS = {
+    Job.KIND_DELETE_ALBUMS: 'v1.albums.jobs.delete_albums',
+    Job.KIND_EXTRACT_METADATA: 'v1.images.jobs.extract_metadata',
+    Job.KIND_IMPORT_ARCHIVE: 'v1.albums.jobs.import_archive',
+    Job.KIND_TRANSCODE_IMAGES: 'v1.images.jobs.transcode_images',
+    Job.KIND_RENDER_VARIANTS: 'v1.images.jobs.render_variants',
+}
+
+
+def enqueue(user, kind, payload):
+    """
+    Creates new pending job and wakes up the worker once the current
+    transaction is committed.
+    """
+    job = Job.objects.create(user=user, kind=kind, payload=payload)
+    transaction.on_commit(worker.wake)
+    return job
+
+
+def requeue_stale_jobs():
+    """
+    Running jobs without heartbeat for `JOBS_LEASE_TIMEOUT` seconds were
+    abandoned by a stopped worker (e.g. recycled web process). They are
+    pending again, or failed after `JOBS_MAX_ATTEMPTS` attempts.
+
+    :return: Number of requeued jobs.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.STATUS_RUNNING,
+        modified__lt=now - timedelta(
+            seconds=getattr(settings, 'JOBS_LEASE_TIMEOUT', 300))
+    )
+    max_attempts = getattr(settings, 'JOBS_MAX_ATTEMPTS', 3)
+    stale.filter(attempts__gte=max_attempts).update(
+        status=Job.STATUS_FAILED, modified=now,
+        error='Worker of the job stopped.')
+    return stale.filter(attempts__lt=max_attempts).update(
+        status=Job.STATUS_PENDING, modified=now)
+
+
+def claim_next_job():
+    """
+    Marks the oldest pending job as running and returns it. Job is claimed
+    with a conditional update, so several workers (threads or processes)
+    never run the same job. Abandoned jobs are requeued before.
+    """
+    requeue_stale_jobs()
+    while True:
+        job = Job.objects.filter(
+            status=Job.STATUS_PENDING
+        ).order_by('created', 'pk').first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(
+            pk=job.pk, status=Job.STATUS_PENDING
+        ).update(status=Job.STATUS_RUNNING, attempts=F('attempts') + 1,
+                 modified=now)
+        if claimed:
+            job.status = Job.STATUS_RUNNING
+            job.attempts += 1
+            job.modified = now
+            return job
+
+
+class Heartbeat:
+    """
+    Context manager which bumps `modified` of the running job every
+    `JOBS_HEARTBEAT_INTERVAL` seconds from a helper thread, so the job isn't
+    requeued while its worker is alive.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name=f'job-{job.pk}-heartbeat',
+                                        daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        interval = getattr(settings, 'JOBS_HEARTBEAT_INTERVAL', 30)
+        try:
+            while not self._stopped.wait(interval):
+                Job.objects.filter(
+                    pk=self.job.pk, status=Job.STATUS_RUNNING
+                ).update(modified=timezone.now())
+        except Exception:
+            logger.exception('Heartbeat of job %s failed', self.job.pk)
+        finally:
+            connection.close()
+
+
+def run_job(job):
+    """
+    Runs handler of the job and stores the result. Handlers must be safe
+    to run again, job of a stopped worker is restarted from the beginning.
+    """
+    try:
+        handler = import_string(JOB_HANDLERS[job.kind])
+        with Heartbeat(job):
+            handler(job)
+        job.status = Job.STATUS_DONE
+    except Exception as e:
+        logger.exception('Job %s failed', job.pk)
+        job.status = Job.STATUS_FAILED
+        job.error = str(e)
+    job.save(update_fields=['status', 'error', 'processed', 'total',
+                            'result', 'modified'])
+
+
+def process_jobs():
+    """
+    Runs pending jobs until there is none.
+
+    :return: Number of processed jobs.
+    """
+    count = 0
+    job = claim_next_job()
+    while job is not None:
+        run_job(job)
+        count += 1
+        job = claim_next_job()
+    return count
+
+
+class JobWorker:
+    """
+    In-process worker. It is a daemon thread started with the web process
+    (see `config.gunicorn`) or on the first wake up, which processes pending
+    jobs right away, when it is woken up and every `JOBS_POLL_INTERVAL`
+    seconds. It is disabled by `JOBS_WORKER_THREAD` if the `process_jobs`
+    command runs the jobs instead.
+    """
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        if not getattr(settings, 'JOBS_WORKER_THREAD', True):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='jobs-worker', daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            try:
+                process_jobs()
+            except Exception:
+                logger.exception('Job worker failed')
+            finally:
+                connection.close()
+            self._wakeup.wait(getattr(settings, 'JOBS_POLL_INTERVAL', 60))
+            self._wakeup.clear()
+
+
+worker = JobWorker()